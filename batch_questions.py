@@ -0,0 +1,334 @@
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, RateLimitError, InternalServerError
+from db_connections import close_connections
+from pipeline_metrics import (METRICS_MODES, DEFAULT_METRICS_FILE, add_count, configure_metrics, report_metrics,
+                              timed_stage)
+from query_with_llm import (OPENAI_MODEL, LLM_REQUEST_OPTIONS, load_api_key, get_available_databases,
+                            get_template_sql, lookup_cached_sql, cache_generated_sql, forget_cached_sql, build_sql_messages,
+                            read_sql_response, stream_sql_query)
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_SQL_WORKERS = 4
+DEFAULT_RETRIES = 5
+# Seconds before the first retry; each further retry waits twice as long, up to MAX_BACKOFF_SECONDS
+DEFAULT_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+DEFAULT_REQUEST_TIMEOUT = 60.0
+DEFAULT_REPORT_ROWS = 20
+DEFAULT_REPORT_FILE = "question_report.md"
+
+# Errors that are worth retrying: rate limits, 5xx replies, timeouts and dropped connections
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APITimeoutError, APIConnectionError)
+
+def load_questions(questions_path):
+    """
+    Read the questions of a batch, one per line.
+
+    Blank lines and lines starting with '#' are skipped, and repeated
+    questions are asked once.
+
+    Parameters:
+        questions_path (str): Path to the question file.
+
+    Returns:
+        list of str: The questions in file order.
+    """
+    with open(questions_path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return list(dict.fromkeys(line for line in lines if line and not line.startswith("#")))
+
+def get_retry_delay(error, attempt, backoff):
+    """
+    Get the seconds to wait before retrying a failed request.
+
+    The server's Retry-After header is used when present; otherwise the delay
+    doubles with every attempt, with jitter so concurrent retries spread out.
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after is not None:
+            return min(float(retry_after), MAX_BACKOFF_SECONDS)
+    except ValueError:
+        pass
+    return min(backoff * 2 ** attempt, MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.0)
+
+async def generate_sql_async(client, semaphore, question, db_path, retries, backoff):
+    """
+    Turn a question into SQL with a non-blocking API call, retrying transient failures.
+
+    Parameters:
+        client (AsyncOpenAI): The API client, or None to answer from templates and the cache only.
+        semaphore (asyncio.Semaphore): Limits the number of requests in flight.
+        question (str): The natural language question.
+        db_path (str): Path to the SQLite database the question is about.
+        retries (int): Number of retries after rate limits, server errors and timeouts.
+        backoff (float): Seconds before the first retry.
+
+    Returns:
+        str: The SQL query.
+    """
+    sql_query = get_template_sql(question, db_path) or lookup_cached_sql(question, db_path)
+    if sql_query:
+        return sql_query
+    if client is None:
+        raise RuntimeError("No SQL template matches this question and no OPENAI_API_KEY is set to ask the model.")
+
+    messages = build_sql_messages(question, db_path)
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.chat.completions.create(model=OPENAI_MODEL, messages=messages,
+                                                                **LLM_REQUEST_OPTIONS)
+                add_count("llm_seconds", time.perf_counter() - start)
+            break
+        except RETRYABLE_ERRORS as e:
+            if attempt == retries:
+                raise RuntimeError(f"An error occurred while generating SQL after {retries} retries: {e}")
+            add_count("llm_retries")
+            # Sleeping outside the semaphore lets other questions use the slot meanwhile
+            await asyncio.sleep(get_retry_delay(e, attempt, backoff))
+        except Exception as e:
+            raise RuntimeError(f"An error occurred while generating SQL: {e}")
+
+    sql_query = read_sql_response(response)
+    cache_generated_sql(question, db_path, sql_query)
+    return sql_query
+
+def run_report_query(sql_query, db_path):
+    """
+    Execute a query for the report in a worker thread and fetch its rows.
+
+    The guardrails of stream_sql_query apply (default LIMIT and time limit).
+
+    Returns:
+        tuple: (list of column names, list of result rows)
+    """
+    columns, rows = stream_sql_query(sql_query, db_path)
+    try:
+        return columns, list(rows)
+    finally:
+        rows.close()
+
+async def answer_question(client, semaphore, executor, question, db_path, retries, backoff):
+    """
+    Generate the SQL of one question for one database and run it.
+
+    Returns:
+        dict: The database, question, SQL, columns, rows, error (None on success) and seconds taken.
+    """
+    result = {"database": os.path.basename(db_path), "question": question, "sql": None,
+              "columns": [], "rows": [], "error": None}
+    start = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    try:
+        result["sql"] = await generate_sql_async(client, semaphore, question, db_path, retries, backoff)
+        # SQLite calls block, so they run in the thread pool while other questions wait on the API
+        try:
+            result["columns"], result["rows"] = await loop.run_in_executor(executor, run_report_query,
+                                                                           result["sql"], db_path)
+        except RuntimeError:
+            forget_cached_sql(question, db_path)
+            raise
+        add_count("questions_answered")
+    except Exception as e:
+        result["error"] = str(e)
+        add_count("questions_failed")
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+async def run_batch(questions, db_paths, base_url=None, concurrency=DEFAULT_CONCURRENCY,
+                    sql_workers=DEFAULT_SQL_WORKERS, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF_SECONDS,
+                    timeout=DEFAULT_REQUEST_TIMEOUT, api_key=None):
+    """
+    Answer every question against every database concurrently.
+
+    Parameters:
+        questions (list of str): The questions to ask.
+        db_paths (list of str): The databases to ask them about.
+        base_url (str): API base URL, e.g. of llm_stub_server.py; OPENAI_BASE_URL or the OpenAI API when None.
+        concurrency (int): Maximum number of API requests in flight.
+        sql_workers (int): Threads executing the generated SQL.
+        retries (int): Retries per request after transient API errors.
+        backoff (float): Seconds before the first retry.
+        timeout (float): Seconds before an API request times out.
+        api_key (str): API key; read from the .env file when None. Without one only questions
+            matching a SQL template or in the SQL cache are answered.
+
+    Returns:
+        list of dict: One result per question and database (see answer_question), in input order.
+    """
+    try:
+        api_key = api_key or load_api_key()
+    except ValueError as e:
+        print(f"Warning: {e} Only questions matching a SQL template can be answered.")
+    # Retries are handled here, with backoff that frees the concurrency slot while waiting
+    client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=timeout) if api_key else None
+    semaphore = asyncio.Semaphore(concurrency)
+    try:
+        with ThreadPoolExecutor(max_workers=sql_workers) as executor:
+            tasks = [answer_question(client, semaphore, executor, question, db_path, retries, backoff)
+                     for db_path in db_paths for question in questions]
+            return await asyncio.gather(*tasks)
+    finally:
+        if client is not None:
+            await client.close()
+
+def format_markdown_table(columns, rows):
+    """
+    Format result rows as a Markdown table.
+    """
+    def cell(value):
+        return "" if value is None else str(value).replace("|", "\\|").replace("\n", " ")
+    lines = ["| " + " | ".join(cell(col) for col in columns) + " |", "|" + "---|" * len(columns)]
+    lines += ["| " + " | ".join(cell(value) for value in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+def format_report(results, questions, seconds, report_rows=DEFAULT_REPORT_ROWS):
+    """
+    Format the results of a batch as one Markdown report, grouped by database.
+
+    Parameters:
+        results (list of dict): Output of run_batch.
+        questions (list of str): The questions asked, numbered in this order.
+        seconds (float): Wall time of the batch.
+        report_rows (int): Rows shown per answer; the row count is always given.
+
+    Returns:
+        str: The report.
+    """
+    failed = sum(1 for result in results if result["error"])
+    lines = [
+        "# Schedule Question Report",
+        "",
+        f"Generated {datetime.now():%Y-%m-%d %H:%M} from {len(questions)} questions on "
+        f"{len({result['database'] for result in results})} databases in {seconds:.1f}s: "
+        f"{len(results) - failed} answered, {failed} failed.",
+    ]
+    numbers = {question: idx for idx, question in enumerate(questions, 1)}
+    current_database = None
+    for result in results:
+        if result["database"] != current_database:
+            current_database = result["database"]
+            lines += ["", f"## {current_database}"]
+        lines += ["", f"### {numbers[result['question']]}. {result['question']}", ""]
+        if result["sql"]:
+            lines += ["```sql", result["sql"], "```", ""]
+        if result["error"]:
+            lines.append(f"Error: {result['error']}")
+        elif not result["rows"]:
+            lines.append("No results found or the query did not return any data.")
+        else:
+            lines.append(format_markdown_table(result["columns"], result["rows"][:report_rows]))
+            row_count = len(result["rows"])
+            lines += ["", f"{row_count} rows, first {report_rows} shown." if row_count > report_rows
+                      else f"{row_count} rows."]
+    return "\n".join(lines) + "\n"
+
+def write_report(results, questions, seconds, output_path, report_rows=DEFAULT_REPORT_ROWS):
+    """
+    Write the batch report: JSON when output_path ends in .json, Markdown otherwise.
+    """
+    with open(output_path, "w", encoding="utf-8") as f:
+        if output_path.lower().endswith(".json"):
+            json.dump({"seconds": seconds, "questions": questions, "results": results}, f, indent=2, default=str)
+        else:
+            f.write(format_report(results, questions, seconds, report_rows))
+
+def parse_args():
+    """
+    Parse command line options for the batch question runner.
+    """
+    parser = argparse.ArgumentParser(
+        description="Ask a file of questions against one or more databases concurrently and write a single report.")
+    parser.add_argument("questions", help="Text file with one question per line ('#' starts a comment line).")
+    parser.add_argument("--databases",
+                        help="Comma separated database file names in the Database directory (default: all).")
+    parser.add_argument("--output", default=DEFAULT_REPORT_FILE,
+                        help="Report file; Markdown, or JSON when the name ends in .json.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Maximum number of API requests in flight.")
+    parser.add_argument("--sql-workers", type=int, default=DEFAULT_SQL_WORKERS,
+                        help="Threads executing the generated SQL.")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help="Retries per request after rate limits, server errors and timeouts.")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF_SECONDS,
+                        help="Seconds before the first retry; doubled for every further retry.")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_REQUEST_TIMEOUT,
+                        help="Seconds before an API request times out.")
+    parser.add_argument("--base-url",
+                        help="OpenAI compatible API base URL, e.g. http://127.0.0.1:8765/v1 for llm_stub_server.py.")
+    parser.add_argument("--report-rows", type=int, default=DEFAULT_REPORT_ROWS,
+                        help="Result rows shown per answer in the Markdown report.")
+    parser.add_argument("--metrics", choices=METRICS_MODES,
+                        help="Record time and counters of the batch; print a summary table or append JSON lines.")
+    parser.add_argument("--metrics-file", default=DEFAULT_METRICS_FILE,
+                        help="JSON lines file written with --metrics jsonl.")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    configure_metrics(args.metrics, args.metrics_file)
+    try:
+        run_batch_command(args)
+    finally:
+        close_connections()
+        report_metrics()
+
+def run_batch_command(args):
+    """
+    Run the batch described by the command line options and write its report.
+    """
+    try:
+        questions = load_questions(args.questions)
+    except OSError as e:
+        print(f"Error reading question file: {e}")
+        return
+    if not questions:
+        print(f"Error: no questions found in {args.questions}")
+        return
+
+    available = get_available_databases()
+    names = [name.strip() for name in args.databases.split(",") if name.strip()] if args.databases else available
+    missing = [name for name in names if name not in available]
+    if missing:
+        print(f"Error: database(s) not found in the Database directory: {', '.join(missing)}")
+        return
+    if not names:
+        print("Error: No databases found in the Database directory.")
+        return
+    db_paths = [os.path.join(os.getcwd(), "Database", name) for name in names]
+
+    # A local stub server needs no key
+    api_key = None
+    if args.base_url or os.getenv("OPENAI_BASE_URL"):
+        try:
+            api_key = load_api_key()
+        except ValueError:
+            api_key = "stub"
+
+    print(f"Asking {len(questions)} questions on {len(db_paths)} databases "
+          f"({args.concurrency} concurrent requests, {args.sql_workers} SQL workers)...")
+    start = time.perf_counter()
+    with timed_stage("batch"):
+        results = asyncio.run(run_batch(questions, db_paths, args.base_url, args.concurrency, args.sql_workers,
+                                        args.retries, args.backoff, args.timeout, api_key))
+    seconds = time.perf_counter() - start
+
+    write_report(results, questions, seconds, args.output, args.report_rows)
+    failed = [result for result in results if result["error"]]
+    print(f"Answered {len(results) - len(failed)} of {len(results)} questions in {seconds:.1f}s.")
+    for result in failed:
+        print(f"  - {result['database']}: {result['question']}: {result['error']}")
+    print(f"Report written to: {os.path.abspath(args.output)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import multiprocessing
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from pipeline_metrics import enable_stage_timing, reset_stage_timings, get_stage_timings, get_peak_rss_mb
+from synthetic_schedule import generate_xer, generate_pdf
+from table_export import EXPORT_FORMATS
+
+BENCHMARK_DIR_NAME = "Benchmarks"
+XER_MODES = ("pandas", "stream", "bulk")
+DEFAULT_SIZES = "1000,10000,100000"
+DEFAULT_PDF_SIZES = "1000"
+# Table whose row count is checked after each run, so a failed import is not reported as fast
+RESULT_TABLES = {"pandas": "TASK", "stream": "TASK", "bulk": "TASK", "pdf": "PROJECT_DATA"}
+
+def run_case(mode, input_path, run_dir, batch_size, export_format):
+    """
+    Import one input file and measure it. Runs in its own worker process so
+    peak memory belongs to this case alone.
+
+    Parameters:
+        mode (str): pandas, stream, bulk or pdf.
+        input_path (str): XER or PDF file to import.
+        run_dir (str): Empty directory the database and exports are written to.
+        batch_size (int): Rows per executemany batch in stream mode.
+        export_format (str): Format of the per-table exports.
+
+    Returns:
+        dict: Wall time, per-stage times, peak RSS and imported row count.
+    """
+    # Imports happen here so their memory is part of each case, not the harness
+    from parse_xer_to_sql import (parse_xer_to_sqlite_and_csv, stream_xer_to_sqlite_and_csv,
+                                  bulk_load_xer_to_sqlite_and_csv)
+    from parse_pdf_to_sql import parse_pdf_to_sqlite_and_csv
+
+    os.chdir(run_dir)
+    sqlite_db_path = os.path.join(run_dir, "Database", "benchmark_database.db")
+    export_dir = os.path.join(run_dir, "CSV Exports")
+    enable_stage_timing()
+    reset_stage_timings()
+
+    # The importers print a line per table; keep the report readable
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        start = time.perf_counter()
+        if mode == "pandas":
+            parse_xer_to_sqlite_and_csv(input_path, sqlite_db_path, export_dir, export_format)
+        elif mode == "stream":
+            stream_xer_to_sqlite_and_csv(input_path, sqlite_db_path, export_dir, batch_size, export_format=export_format)
+        elif mode == "bulk":
+            bulk_load_xer_to_sqlite_and_csv(input_path, sqlite_db_path, export_dir, export_format=export_format)
+        else:
+            parse_pdf_to_sqlite_and_csv(input_path, sqlite_db_path, export_dir, export_format=export_format)
+        wall_seconds = time.perf_counter() - start
+
+    rows = 0
+    if os.path.exists(sqlite_db_path):
+        conn = sqlite3.connect(sqlite_db_path)
+        try:
+            rows = conn.execute(f'SELECT COUNT(*) FROM "{RESULT_TABLES[mode]}"').fetchone()[0]
+        except sqlite3.Error:
+            rows = 0
+        finally:
+            conn.close()
+    return {
+        "wall_seconds": wall_seconds,
+        "stages": get_stage_timings(),
+        "peak_rss_mb": get_peak_rss_mb(),
+        "rows": rows,
+    }
+
+def run_isolated(mode, input_path, run_dir, batch_size, export_format):
+    """
+    Run one case in a fresh single-worker process and return its measurements.
+    """
+    os.makedirs(run_dir, exist_ok=True)
+    # spawn gives each case a clean interpreter, so peak RSS is not inherited from the harness
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(run_case, mode, input_path, run_dir, batch_size, export_format).result()
+
+def format_result(result):
+    """
+    Format one measured case as a report line followed by its stage breakdown.
+    """
+    wall = result["wall_seconds"]
+    peak = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] is not None else "n/a"
+    line = (f"{result['mode']:<7} {result['activities']:>9} {result['input_mb']:>9.1f} {wall:>9.2f} "
+            f"{result['activities_per_second']:>11.0f} {result['mb_per_second']:>7.1f} {peak:>9}")
+    stages = dict(result["stages"])
+    stages["other"] = max(wall - sum(result["stages"].values()), 0.0)
+    breakdown = ", ".join(f"{name} {seconds:.2f}s ({seconds / wall:.0%})" for name, seconds in stages.items() if wall)
+    return f"{line}\n        {breakdown}"
+
+def parse_sizes(value):
+    """
+    Parse a comma separated list of activity counts; an empty string gives no sizes.
+    """
+    return [int(size) for size in value.replace("_", "").split(",") if size.strip()]
+
+def parse_args():
+    """
+    Parse command line options for the ingest benchmark.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark XER and PDF ingest on synthetic schedules: throughput, peak memory and per-stage time.")
+    parser.add_argument("--sizes", type=parse_sizes, default=parse_sizes(DEFAULT_SIZES),
+                        help="Comma separated activity counts of the synthetic XER files, e.g. 1000,10000,100000,1000000.")
+    parser.add_argument("--modes", default=",".join(XER_MODES),
+                        help="Comma separated XER import paths to benchmark: pandas, stream, bulk.")
+    parser.add_argument("--pdf-sizes", type=parse_sizes, default=parse_sizes(DEFAULT_PDF_SIZES),
+                        help="Comma separated activity counts of the synthetic PDF reports (empty to skip PDF).")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per executemany batch in stream mode.")
+    parser.add_argument("--export-format", choices=EXPORT_FORMATS, default="csv",
+                        help="Format of the per-table exports: csv, parquet or arrow.")
+    parser.add_argument("--work-dir", default=os.path.join(os.getcwd(), BENCHMARK_DIR_NAME),
+                        help="Directory for the generated inputs and the databases of each run.")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated inputs and outputs after the run.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in XER_MODES]
+    if unknown:
+        print(f"Error: unknown mode(s) {', '.join(unknown)}; choose from {', '.join(XER_MODES)}")
+        return
+
+    cases = [(mode, size, "xer") for size in args.sizes for mode in modes]
+    cases += [("pdf", size, "pdf") for size in args.pdf_sizes]
+    work_dir = os.path.abspath(args.work_dir)
+    input_dir = os.path.join(work_dir, "inputs")
+    runs_dir = os.path.join(work_dir, "runs")
+    os.makedirs(input_dir, exist_ok=True)
+
+    results = []
+    print(f"{'mode':<7} {'acts':>9} {'input MB':>9} {'wall s':>9} {'acts/s':>11} {'MB/s':>7} {'peak MB':>9}")
+    try:
+        for mode, size, kind in cases:
+            input_path = os.path.join(input_dir, f"synthetic_{size}.{kind}")
+            if not os.path.exists(input_path):
+                if kind == "xer":
+                    generate_xer(input_path, size)
+                else:
+                    generate_pdf(input_path, size)
+            input_mb = os.path.getsize(input_path) / (1024 * 1024)
+
+            run_dir = os.path.join(runs_dir, f"{mode}_{size}")
+            shutil.rmtree(run_dir, ignore_errors=True)
+            try:
+                measured = run_isolated(mode, input_path, run_dir, args.batch_size, args.export_format)
+            except Exception as e:
+                print(f"Error benchmarking {mode} with {size} activities: {e}")
+                continue
+            finally:
+                if not args.keep:
+                    shutil.rmtree(run_dir, ignore_errors=True)
+
+            if measured["rows"] != size:
+                print(f"Error: {mode} import of {size} activities stored {measured['rows']} rows")
+            wall = measured["wall_seconds"]
+            result = {
+                "mode": mode,
+                "activities": size,
+                "input_mb": input_mb,
+                "activities_per_second": size / wall if wall else 0.0,
+                "mb_per_second": input_mb / wall if wall else 0.0,
+                **measured,
+            }
+            results.append(result)
+            print(format_result(result))
+    finally:
+        if not args.keep:
+            shutil.rmtree(input_dir, ignore_errors=True)
+            shutil.rmtree(runs_dir, ignore_errors=True)
+            if not os.listdir(work_dir):
+                os.rmdir(work_dir)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote results to: {args.json}")
+
+if __name__ == "__main__":
+    main()
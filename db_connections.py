@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import pathlib
+import threading
+from work_calendar import register_calendar_functions
+
+# Read-only, read-mostly tuning applied to every query connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+)
+# Number of compiled statements each connection keeps for reuse
+STATEMENT_CACHE_SIZE = 256
+
+# Open connections keyed by (database path, thread id): (file identity, connection)
+_connections = {}
+_lock = threading.Lock()
+
+def get_file_identity(db_path):
+    """
+    Identify the database file on disk, so a file replaced by a new import is reopened.
+    """
+    stat = os.stat(db_path)
+    return (stat.st_dev, stat.st_ino)
+
+def open_read_only_connection(db_path):
+    """
+    Open a read-only connection to a database with the query PRAGMAs applied
+    and the calendar SQL functions registered.
+
+    Parameters:
+        db_path (str): Path to the SQLite database.
+
+    Returns:
+        sqlite3.Connection: The new connection.
+    """
+    uri = pathlib.Path(os.path.abspath(db_path)).as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    register_calendar_functions(conn)
+    return conn
+
+def get_connection(db_path):
+    """
+    Get the session's connection to a database, opening it on first use.
+
+    Connections are kept for the whole session (one per database and thread)
+    so repeated questions reuse the open file, page cache and compiled statements.
+
+    Parameters:
+        db_path (str): Path to the SQLite database.
+
+    Returns:
+        sqlite3.Connection: A read-only connection.
+    """
+    key = (os.path.abspath(db_path), threading.get_ident())
+    identity = get_file_identity(db_path)
+    with _lock:
+        cached = _connections.get(key)
+        if cached and cached[0] == identity:
+            return cached[1]
+        if cached:
+            cached[1].close()
+        conn = open_read_only_connection(db_path)
+        _connections[key] = (identity, conn)
+        return conn
+
+def release_connection(db_path):
+    """
+    Close the current thread's connection to a database, if it has one.
+
+    Used after one-off queries over many databases, so hundreds of files are
+    not all left open.
+    """
+    key = (os.path.abspath(db_path), threading.get_ident())
+    with _lock:
+        cached = _connections.pop(key, None)
+    if cached:
+        try:
+            cached[1].close()
+        except sqlite3.Error:
+            pass
+
+def close_connections():
+    """
+    Close every connection opened by get_connection.
+    """
+    with _lock:
+        for _, conn in _connections.values():
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _connections.clear()
@@ -0,0 +1,155 @@
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from sql_cache import normalize_question
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CHARS_PER_TOKEN = 4
+
+# Parts of the NL to SQL prompt built by query_with_llm.build_sql_messages
+QUESTION_PATTERN = re.compile(r'^User Question: (.*)$', re.MULTILINE)
+TABLE_PATTERN = re.compile(r'^Table: (\S+)$', re.MULTILINE)
+
+def get_stub_sql(prompt, answers):
+    """
+    Answer an NL to SQL prompt without a model.
+
+    A question listed in the answers file gets its SQL. Any other question
+    gets a row count of the first table in the prompt's schema, so every
+    reply is valid SQL for the database asked about.
+
+    Parameters:
+        prompt (str): Content of the user message.
+        answers (dict): SQL keyed by normalized question.
+
+    Returns:
+        str: The SQL reply.
+    """
+    question = QUESTION_PATTERN.search(prompt)
+    if question:
+        sql_query = answers.get(normalize_question(question.group(1)))
+        if sql_query:
+            return sql_query
+    table = TABLE_PATTERN.search(prompt)
+    return f'SELECT COUNT(*) AS "row_count" FROM "{table.group(1) if table else "sqlite_master"}"'
+
+def make_handler(answers, latency, error_rate):
+    """
+    Build the request handler class serving the chat completions endpoint.
+
+    Parameters:
+        answers (dict): SQL keyed by normalized question.
+        latency (float): Seconds each reply is delayed, to mimic the API's round trip.
+        error_rate (float): Share of requests answered with 429 or 503, to exercise retries.
+    """
+    counter = {"requests": 0}
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_json(404, {"error": {"message": f"Unknown path {self.path}",
+                                               "type": "invalid_request_error"}})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self.send_json(400, {"error": {"message": "Body is not JSON", "type": "invalid_request_error"}})
+                return
+            with lock:
+                counter["requests"] += 1
+                request_id = counter["requests"]
+
+            # Spread around the configured latency so concurrent replies do not arrive in lockstep
+            time.sleep(latency * random.uniform(0.5, 1.5))
+            if random.random() < error_rate:
+                status = random.choice((429, 503))
+                self.send_json(status, {"error": {"message": "Stub overloaded", "type": "rate_limit_error"}},
+                               {"Retry-After": "0"})
+                return
+
+            prompt = "\n".join(message.get("content", "") for message in request.get("messages", [])
+                               if message.get("role") == "user")
+            sql_query = get_stub_sql(prompt, answers)
+            prompt_tokens = len(prompt) // CHARS_PER_TOKEN + 1
+            completion_tokens = len(sql_query) // CHARS_PER_TOKEN + 1
+            self.send_json(200, {
+                "id": f"chatcmpl-stub-{request_id}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "stub"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": sql_query},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            })
+
+        def send_json(self, status, body, headers=None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            # One line per request would drown the batch output when run in the same terminal
+            pass
+
+    return StubHandler
+
+def load_answers(answers_path):
+    """
+    Load the canned SQL replies: a JSON object mapping questions to SQL.
+
+    Returns:
+        dict: SQL keyed by normalized question.
+    """
+    if not answers_path:
+        return {}
+    with open(answers_path, encoding="utf-8") as f:
+        return {normalize_question(question): sql_query for question, sql_query in json.load(f).items()}
+
+def parse_args():
+    """
+    Parse command line options for the stub server.
+    """
+    parser = argparse.ArgumentParser(
+        description="Serve an OpenAI compatible chat completions endpoint that answers NL to SQL prompts locally, "
+                    "for testing the query tools without the API.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on.")
+    parser.add_argument("--answers", help="JSON file mapping questions to the SQL to reply with.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Average seconds to wait before each reply.")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of requests (0 to 1) answered with a 429 or 503 error.")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    try:
+        answers = load_answers(args.answers)
+    except (OSError, ValueError) as e:
+        print(f"Error loading answers file: {e}")
+        return
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(answers, args.latency, args.error_rate))
+    print(f"Stub LLM server listening on http://{args.host}:{args.port}/v1 ({len(answers)} canned answers)")
+    print("Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping stub server.")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
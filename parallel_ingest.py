@@ -0,0 +1,103 @@
+import io
+import os
+import time
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pipeline_metrics import (configure_metrics, reset_stage_timings, get_metrics_config, get_metrics_snapshot,
+                              merge_metrics, close_metrics_file, timed_stage)
+
+def run_ingest_job(func, args, metrics_config=None, label=None):
+    """
+    Run one ingest function with its output captured.
+
+    The ingest functions report problems by printing lines that start with
+    "Error", so those lines are collected as the job's errors.
+
+    Parameters:
+        func (callable): Ingest function, e.g. parse_xer_to_sqlite_and_csv.
+        args (tuple): Positional arguments for the function.
+        metrics_config (tuple): Metrics settings of the parent (see get_metrics_config), if enabled.
+        label (str): Name of the job; its metrics spans are nested under it.
+
+    Returns:
+        dict: The function result, collected errors, captured log, elapsed
+        seconds and the job's metrics (None when disabled).
+    """
+    if metrics_config:
+        configure_metrics(*metrics_config)
+        reset_stage_timings()
+    output = io.StringIO()
+    start = time.perf_counter()
+    result = None
+    errors = []
+    with redirect_stdout(output):
+        try:
+            with timed_stage(label or func.__name__):
+                result = func(*args)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+    metrics = None
+    if metrics_config:
+        metrics = get_metrics_snapshot()
+        close_metrics_file()
+    log = output.getvalue()
+    errors = [line.strip() for line in log.splitlines() if line.lstrip().startswith("Error")] + errors
+    if result is False and not errors:
+        errors.append("Ingest function reported failure")
+    return {
+        "result": result,
+        "errors": errors,
+        "log": log,
+        "seconds": time.perf_counter() - start,
+        "metrics": metrics,
+    }
+
+def run_parallel_ingest(jobs, workers=None, verbose=False):
+    """
+    Run independent per-file ingest jobs across a process pool.
+
+    Parameters:
+        jobs (list of tuple): (label, func, args) for each file. ``func`` must be
+            a module-level function so it can be sent to worker processes.
+        workers (int): Number of worker processes (defaults to the CPU count).
+        verbose (bool): Print each job's captured output when it finishes.
+
+    Returns:
+        dict: Job outcome (see run_ingest_job) keyed by label.
+    """
+    workers = workers or os.cpu_count() or 1
+    outcomes = {}
+    total = len(jobs)
+    start = time.perf_counter()
+    print(f"Processing {total} files with {workers} worker processes...")
+
+    metrics_config = get_metrics_config()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_ingest_job, func, args, metrics_config, label): label
+                   for label, func, args in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            label = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                outcome = {"result": None, "errors": [f"{type(e).__name__}: {e}"], "log": "", "seconds": 0.0,
+                           "metrics": None}
+            outcomes[label] = outcome
+            if outcome["metrics"]:
+                merge_metrics(outcome["metrics"])
+
+            status = "ok" if not outcome["errors"] else f"FAILED ({len(outcome['errors'])} errors)"
+            print(f"[{done}/{total}] {label}: {status} in {outcome['seconds']:.1f}s")
+            if verbose and outcome["log"]:
+                print(outcome["log"])
+
+    failed = {label: outcome for label, outcome in outcomes.items() if outcome["errors"]}
+    print(f"\nProcessed {total} files in {time.perf_counter() - start:.1f}s: "
+          f"{total - len(failed)} succeeded, {len(failed)} failed.")
+    for label in sorted(failed):
+        print(f"\n{label}:")
+        for error in failed[label]["errors"]:
+            print(f"  - {error}")
+
+    return outcomes
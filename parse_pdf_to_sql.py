@@ -1,11 +1,19 @@
 #Run pip3 install -r requirements.txt
 
 import os
+import re
 import json
+import argparse
 import pandas as pd
 import sqlite3
 import pdfplumber
 from dotenv import load_dotenv
+from pipeline_metrics import (METRICS_MODES, DEFAULT_METRICS_FILE, add_count, configure_metrics, report_metrics,
+                              timed_stage)
+from concurrent.futures import ProcessPoolExecutor
+from parallel_ingest import run_parallel_ingest
+from pdf_cache import CACHE_DIR_NAME, DEFAULT_MAX_CACHE_MB, get_cache_key, load_cached_pages, save_cached_pages, evict_cache
+from table_export import EXPORT_FORMATS, export_sqlite_tables
 
 def convert_to_serializable(value):
     """
@@ -24,75 +32,219 @@ def convert_to_serializable(value):
     else:
         return value
 
-def extract_tables_from_pdf(pdf_file_path):
+# Settings passed to pdfplumber's extract_tables; part of the page cache key
+PDF_TABLE_SETTINGS = {}
+
+def extract_page_range_tables(pdf_file_path, page_numbers):
+    """
+    Extract the raw tables from a set of PDF pages.
+    
+    Parameters:
+        pdf_file_path (str): Path to the PDF file
+        page_numbers (list of int): Page numbers to extract (1-based)
+        
+    Returns:
+        list of tuple: (page number, list of tables) for each requested page
+    """
+    with pdfplumber.open(pdf_file_path) as pdf:
+        return [(page_num, pdf.pages[page_num - 1].extract_tables(PDF_TABLE_SETTINGS))
+                for page_num in page_numbers]
+
+def extract_page_tables(pdf_file_path, workers=1, cache_dir=None, max_cache_mb=DEFAULT_MAX_CACHE_MB):
+    """
+    Extract the raw tables of every page of a PDF in a single pass.
+    
+    With more than one worker the pages are split into contiguous ranges that
+    are extracted in separate processes and merged back in page order. With a
+    cache directory, pages already extracted with the same settings are read
+    from the cache and only the missing ones go through pdfplumber.
+    
+    Parameters:
+        pdf_file_path (str): Path to the PDF file
+        workers (int): Number of worker processes (0 uses every CPU)
+        cache_dir (str): Directory of the page table cache, or None to disable it
+        max_cache_mb (int): Size the cache is trimmed to after new pages are added
+        
+    Returns:
+        list of tuple: (page number, list of tables) for every page, in page order
+    """
+    page_count, cached_pages = None, {}
+    if cache_dir:
+        cache_key = get_cache_key(pdf_file_path, PDF_TABLE_SETTINGS, pdfplumber.__version__)
+        page_count, cached_pages = load_cached_pages(cache_dir, cache_key)
+    
+    if page_count is None:
+        with pdfplumber.open(pdf_file_path) as pdf:
+            page_count = len(pdf.pages)
+        print(f"Successfully opened PDF: {pdf_file_path} ({page_count} pages)")
+    
+    missing_pages = [page_num for page_num in range(1, page_count + 1) if page_num not in cached_pages]
+    if cached_pages:
+        print(f"Loaded {len(cached_pages)} of {page_count} pages from the table cache.")
+    
+    extracted = []
+    workers = min(workers or os.cpu_count() or 1, len(missing_pages))
+    if workers == 1:
+        extracted = extract_page_range_tables(pdf_file_path, missing_pages)
+    elif workers > 1:
+        # Split the pages into one contiguous range per worker
+        chunk_size = -(-len(missing_pages) // workers)
+        page_ranges = [missing_pages[i:i + chunk_size] for i in range(0, len(missing_pages), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(extract_page_range_tables, pdf_file_path, pages) for pages in page_ranges]
+            extracted = [page for future in futures for page in future.result()]
+    
+    if cache_dir and extracted:
+        save_cached_pages(cache_dir, cache_key, page_count, extracted)
+        freed = evict_cache(cache_dir, max_cache_mb * 1024 * 1024)
+        if freed:
+            print(f"Evicted {freed / (1024 * 1024):.1f} MB from the table cache.")
+    
+    cached_pages.update(extracted)
+    return [(page_num, cached_pages[page_num]) for page_num in range(1, page_count + 1)]
+
+STANDARD_COLUMNS = [
+    'Activity ID', 'Activity Name', 'Company', 'Original Duration',
+    'RD', 'Start Date', 'Finish Date', 'Total Float'
+]
+#TODO: Add standard columns for each PDF file https://docs.oracle.com/cd/F37125_01/p6help/en/helpmain.htm?toc.htm?47261.htm
+DURATION_COLUMNS = ('Original Duration', 'RD', 'Total Float')
+DATE_COLUMNS = ('Start Date', 'Finish Date')
+# Flag columns added when dates carry P6's actual marker, e.g. "16-Sep-13 A"
+ACTUAL_FLAG_COLUMNS = {'Start Date': 'Started', 'Finish Date': 'Finished'}
+# Date formats of P6 reports, tried in order, with the format they are stored in
+PDF_DATE_FORMATS = (
+    ('%d-%b-%y %H:%M', '%Y-%m-%d %H:%M'),
+    ('%d-%b-%Y %H:%M', '%Y-%m-%d %H:%M'),
+    ('%d-%b-%y', '%Y-%m-%d'),
+    ('%d-%b-%Y', '%Y-%m-%d'),
+)
+PDF_COLUMN_TYPES = {**{col: 'REAL' for col in DURATION_COLUMNS}, **{col: 'DATETIME' for col in DATE_COLUMNS}}
+# Durations and floats are in days, e.g. "5d", "-2.5d" or "1,200"
+DURATION_UNIT_PATTERN = r'\s*d$'
+DATE_MARKER_PATTERN = r'(\s+A)?\s*\*?$'
+REPEATED_CHARACTERS = re.compile(r'(.)\1+', re.DOTALL)
+
+# Header mappings keyed by the header row, shared by every table with the same headers
+_header_mapping_cache = {}
+
+def get_header_mapping(header_row):
+    """
+    Map the columns of a header row to the standard columns.
+    
+    The mapping is computed once per distinct header row; P6 repeats the
+    same headers on every page, so it is normally built once per report.
+    
+    Parameters:
+        header_row (tuple): Cells of the table's header row (row 1).
+        
+    Returns:
+        dict: Standard column name keyed by column index.
+    """
+    header_row = tuple(header_row)
+    header_mapping = _header_mapping_cache.get(header_row)
+    if header_mapping is None:
+        header_mapping = {}
+        for idx, header in enumerate(header_row):
+            if header and str(header).strip() != 'None':
+                header_lower = str(header).lower().strip().replace(' ', '')
+                for std_col in STANDARD_COLUMNS:
+                    std_col_lower = std_col.lower().replace(' ', '')
+                    if std_col_lower in header_lower or header_lower in std_col_lower:
+                        header_mapping[idx] = std_col
+                        break
+        _header_mapping_cache[header_row] = header_mapping
+    return header_mapping
+
+def clean_cells(values):
+    """
+    Strip a column of cells, turning empty cells and the text "None" into missing values.
+    """
+    # The string dtype strips and compares whole columns natively (Arrow backed where available)
+    text = values.astype('string').str.strip()
+    blank = text.isna() | (text == '') | (text.str.lower() == 'none')
+    return text.astype(object).where(~blank.astype(bool), None)
+
+def extract_tables_from_pdf(pdf_file_path, page_tables=None):
     """
     Extract and merge tables from PDF file.
+    
+    Data rows are grouped by their table's header row, so each group is
+    normalized with one set of column operations instead of cell by cell.
+    Rows keep their page order.
+    
+    Parameters:
+        pdf_file_path (str): Path to the PDF file
+        page_tables (list): Output of extract_page_tables, extracted here if not given
+        
+    Returns:
+        tuple: (project name, DataFrame of the standard columns found)
     """
-    all_rows = []
     project_name = None
-    standard_columns = [
-        'Activity ID', 'Activity Name', 'Company', 'Original Duration',
-        'RD', 'Start Date', 'Finish Date', 'Total Float'
-    ]
-    #TODO: Add standard columns for each PDF file https://docs.oracle.com/cd/F37125_01/p6help/en/helpmain.htm?toc.htm?47261.htm
     try:
-        with pdfplumber.open(pdf_file_path) as pdf:
-            print(f"Successfully opened PDF: {pdf_file_path}")
-            
-            for page_num, page in enumerate(pdf.pages, 1):
-                page_tables = page.extract_tables()
+        if page_tables is None:
+            page_tables = extract_page_tables(pdf_file_path)
+        
+        # Data rows and their position in the report, per distinct header row
+        rows_by_header = {}
+        positions_by_header = {}
+        row_count = 0
+        for page_num, tables in page_tables:
+            for table_data in tables:
+                if not table_data or len(table_data) < 2:  # Need at least 2 rows
+                    continue
                 
-                for table_data in page_tables:
-                    if not table_data or len(table_data) < 2:  # Need at least 2 rows
-                        continue
-                    
-                    # Get project name from first row, first column if not already set
-                    if not project_name and table_data[0][0]:
-                        project_name = str(table_data[0][0]).strip()
-                        print(f"Found project name: {project_name}")
-                    
-                    # Get all unique column names from second row (row 1)
-                    original_headers = [str(col).strip() for col in table_data[1] if col and str(col).strip() != 'None']
+                # Get project name from first row, first column if not already set
+                if not project_name and table_data[0][0]:
+                    project_name = str(table_data[0][0]).strip()
+                    print(f"Found project name: {project_name}")
+                
+                # Get all unique column names from second row (row 1)
+                header_row = tuple(table_data[1])
+                if header_row not in rows_by_header:
+                    rows_by_header[header_row] = []
+                    positions_by_header[header_row] = []
+                    original_headers = [str(col).strip() for col in header_row if col and str(col).strip() != 'None']
                     print("\nOriginal headers found:", original_headers)
-                    
-                    # Map original headers to standard headers
-                    header_mapping = {}
-                    for idx, header in enumerate(table_data[1]):
-                        if header and str(header).strip() != 'None':
-                            header_lower = str(header).lower().strip().replace(' ', '')
-                            for std_col in standard_columns:
-                                std_col_lower = std_col.lower().replace(' ', '')
-                                if std_col_lower in header_lower or header_lower in std_col_lower:
-                                    header_mapping[idx] = std_col
-                                    break
-                    
-                    print("Header mapping:", header_mapping)
-                    
-                    # Process data rows (starting from row 2)
-                    for row in table_data[2:]:
-                        if any(row):  # Skip empty rows
-                            row_dict = {}
-                            for idx, value in enumerate(row):
-                                if idx in header_mapping:  # Only include mapped columns
-                                    clean_value = str(value).strip() if value else None
-                                    if clean_value and clean_value.lower() != 'none':
-                                        row_dict[header_mapping[idx]] = clean_value
-                            
-                            if row_dict:  # Only add if we have valid data
-                                all_rows.append(row_dict)
+                    print("Header mapping:", get_header_mapping(header_row))
+                
+                # Process data rows (starting from row 2)
+                data_rows = table_data[2:]
+                rows_by_header[header_row].extend(data_rows)
+                positions_by_header[header_row].extend(range(row_count, row_count + len(data_rows)))
+                row_count += len(data_rows)
+        
+        frames = []
+        for header_row, rows in rows_by_header.items():
+            header_mapping = get_header_mapping(header_row)
+            if not rows or not header_mapping:
+                continue
+            raw = pd.DataFrame(rows, index=positions_by_header[header_row])
+            frame = pd.DataFrame(index=raw.index)
+            for idx, std_col in header_mapping.items():
+                if idx not in raw.columns:
+                    continue
+                values = clean_cells(raw[idx])
+                # When two headers map to the same column the later non-empty cell wins
+                frame[std_col] = values.combine_first(frame[std_col]) if std_col in frame.columns else values
+            # Skip rows without any mapped value
+            frames.append(frame.dropna(how='all'))
+        
+        merged = pd.concat(frames, sort=False).sort_index(kind='stable') if frames else pd.DataFrame()
+        merged = merged.reset_index(drop=True)
         
         print(f"\nProject Name: {project_name}")
-        print(f"Total rows extracted: {len(all_rows)}")
+        print(f"Total rows extracted: {len(merged)}")
         
-        if len(all_rows) == 0:
+        if len(merged) == 0:
             print("WARNING: No rows were extracted!")
             print("This might be because:")
             print("1. No matching columns were found")
             print("2. The table structure doesn't match expectations")
         else:
-            print("Columns found in data:", list(all_rows[0].keys()))
+            print("Columns found in data:", list(merged.columns))
         
-        return project_name, all_rows
+        return project_name, merged
     
     except Exception as e:
         print(f"\nError extracting tables from PDF file: {str(e)}")
@@ -100,7 +252,53 @@ def extract_tables_from_pdf(pdf_file_path):
         import traceback
         print("Full traceback:")
         print(traceback.format_exc())
-        return None, []
+        return None, pd.DataFrame()
+
+def normalize_pdf_columns(df):
+    """
+    Convert the duration, float and date columns of the merged data to typed values.
+    
+    Each column is converted with vectorized string and date operations.
+    Durations and floats become numbers of days and dates become
+    'YYYY-MM-DD' (with ' HH:MM' when the report shows times). When dates
+    carry P6's actual marker ("A"), a Started or Finished flag column is
+    added. Values that do not parse are kept as they are.
+    
+    Parameters:
+        df (pandas.DataFrame): Output of extract_tables_from_pdf.
+        
+    Returns:
+        pandas.DataFrame: The data with typed columns.
+    """
+    df = df.copy()
+    # Patterns avoid backreferences so the string dtype can run them natively (Arrow backed where available)
+    for col in DURATION_COLUMNS:
+        if col not in df.columns:
+            continue
+        text = df[col].astype('string')
+        numbers = pd.to_numeric(text.str.replace(DURATION_UNIT_PATTERN, '', regex=True).str.replace(',', '', regex=False),
+                                errors='coerce')
+        df[col] = numbers.astype(object).where(numbers.notna(), text.astype(object))
+    
+    for col in DATE_COLUMNS:
+        if col not in df.columns:
+            continue
+        text = df[col].astype('string')
+        actual = text.str.contains(r'\sA\s*\*?$', regex=True).fillna(False).astype(bool)
+        base = text.str.replace(DATE_MARKER_PATTERN, '', regex=True)
+        parsed = pd.Series(None, index=df.index, dtype=object)
+        for date_format, stored_format in PDF_DATE_FORMATS:
+            missing = parsed.isna() & base.notna()
+            if not missing.any():
+                break
+            dates = pd.to_datetime(base[missing], format=date_format, errors='coerce')
+            parsed[missing] = dates.dt.strftime(stored_format).astype(object)
+        df[col] = parsed.where(parsed.notna(), text.astype(object))
+        if actual.any():
+            flags = actual.map({True: 'Y', False: 'N'}).astype(object)
+            df[ACTUAL_FLAG_COLUMNS[col]] = flags.where(text.notna().astype(bool), None)
+    
+    return df.astype(object).where(df.notna(), None)
 
 def clean_text(text):
     """
@@ -114,65 +312,63 @@ def clean_text(text):
     """
     if not text or not isinstance(text, str):
         return text
-        
-    # Convert multiple consecutive same characters into single character
-    cleaned = ''
-    prev_char = ''
-    count = 0
-    max_repeats = 2  # Maximum number of allowed repeats
-    
-    for char in text:
-        if char == prev_char:
-            count += 1
-            if count < max_repeats:
-                cleaned += char
-        else:
-            count = 1
-            cleaned += char
-        prev_char = char
     
-    return cleaned.strip()
+    # Convert multiple consecutive same characters into single character
+    # A callable is cheaper than a template string for the many short cells
+    return REPEATED_CHARACTERS.sub(lambda match: match.group(1), text).strip()
 
-def save_original_tables(pdf_file_path, original_export_dir):
+def save_original_tables(pdf_file_path, original_export_dir, page_tables=None):
     """
     Save the original parsed tables from PDF without any transformations.
     
     Parameters:
         pdf_file_path (str): Path to the PDF file
         original_export_dir (str): Directory to save original CSV files
+        page_tables (list): Output of extract_page_tables, extracted here if not given
     """
     try:
-        with pdfplumber.open(pdf_file_path) as pdf:
-            print(f"\nSaving original tables from: {pdf_file_path}")
-            
-            for page_num, page in enumerate(pdf.pages, 1):
-                page_tables = page.extract_tables()
-                
-                for table_num, table_data in enumerate(page_tables, 1):
-                    if table_data:
-                        # Clean the table data
-                        cleaned_data = []
-                        for row in table_data:
-                            cleaned_row = [clean_text(cell) if cell else cell for cell in row]
-                            cleaned_data.append(cleaned_row)
-                        
-                        # Convert table data to DataFrame
-                        df = pd.DataFrame(cleaned_data)
-                        
-                        # Create filename for this table
-                        csv_filename = f"page_{page_num}_table_{table_num}.csv"
-                        csv_path = os.path.join(original_export_dir, csv_filename)
-                        
-                        # Save to CSV
-                        df.to_csv(csv_path, index=False, header=False)
-                        print(f"Saved original table to: {csv_path}")
+        if page_tables is None:
+            page_tables = extract_page_tables(pdf_file_path)
+        print(f"\nSaving original tables from: {pdf_file_path}")
+        
+        for page_num, tables in page_tables:
+            for table_num, table_data in enumerate(tables, 1):
+                if table_data:
+                    # Clean the table data
+                    cleaned_data = []
+                    for row in table_data:
+                        cleaned_row = [clean_text(cell) if cell else cell for cell in row]
+                        cleaned_data.append(cleaned_row)
+                    
+                    # Convert table data to DataFrame
+                    df = pd.DataFrame(cleaned_data)
+                    
+                    # Create filename for this table
+                    csv_filename = f"page_{page_num}_table_{table_num}.csv"
+                    csv_path = os.path.join(original_export_dir, csv_filename)
+                    
+                    # Save to CSV
+                    df.to_csv(csv_path, index=False, header=False)
+                    print(f"Saved original table to: {csv_path}")
 
     except Exception as e:
         print(f"Error saving original tables: {e}")
 
-def parse_pdf_to_sqlite_and_csv(pdf_file_path, sqlite_db_path, csv_export_dir):
+def parse_pdf_to_sqlite_and_csv(pdf_file_path, sqlite_db_path, csv_export_dir, page_workers=1,
+                                cache_dir=None, max_cache_mb=DEFAULT_MAX_CACHE_MB, export_format='csv'):
     """
     Parse the PDF file and store the data into a SQLite database and export as CSV files.
+    
+    Each page's tables are extracted once and shared by the original and processed outputs.
+    
+    Parameters:
+        pdf_file_path (str): Path to the PDF file
+        sqlite_db_path (str): Path to the SQLite database file
+        csv_export_dir (str): Directory path where CSV files will be saved
+        page_workers (int): Number of processes used to extract page ranges (0 uses every CPU)
+        cache_dir (str): Directory of the page table cache, or None to disable it
+        max_cache_mb (int): Maximum size of the page table cache in MB
+        export_format (str): Format of the PROJECT_DATA export: csv, parquet or arrow
     """
     # Ensure directories exist
     os.makedirs(csv_export_dir, exist_ok=True)
@@ -183,18 +379,30 @@ def parse_pdf_to_sqlite_and_csv(pdf_file_path, sqlite_db_path, csv_export_dir):
                                      os.path.splitext(os.path.basename(pdf_file_path))[0])
     os.makedirs(original_export_dir, exist_ok=True)
     
+    # Extract every page's tables in a single pass
+    try:
+        with timed_stage("extract"):
+            page_tables = extract_page_tables(pdf_file_path, page_workers, cache_dir, max_cache_mb)
+        add_count("pages", len(page_tables))
+    except Exception as e:
+        print(f"Error extracting tables from PDF file: {e}")
+        return
+    
     # Save original tables first
-    save_original_tables(pdf_file_path, original_export_dir)
+    with timed_stage("save_original"):
+        save_original_tables(pdf_file_path, original_export_dir, page_tables)
 
     # Extract tables from PDF
-    project_name, merged_data = extract_tables_from_pdf(pdf_file_path)
-    if not merged_data:
+    with timed_stage("merge"):
+        project_name, df = extract_tables_from_pdf(pdf_file_path, page_tables)
+    if df.empty:
         print("No valid data found in the PDF file.")
         return
     
     try:
-        # Create DataFrame with only the standard columns that exist in the data
-        df = pd.DataFrame(merged_data)
+        # Type the duration, float and date columns
+        with timed_stage("normalize"):
+            df = normalize_pdf_columns(df)
         
         # Connect to SQLite database
         conn = sqlite3.connect(sqlite_db_path)
@@ -205,11 +413,12 @@ def parse_pdf_to_sqlite_and_csv(pdf_file_path, sqlite_db_path, csv_export_dir):
         
         # Define table schema
         columns = df.columns.tolist()
-        column_definitions = ', '.join([f'"{col}" TEXT' for col in columns])
+        column_definitions = ', '.join([f'"{col}" {PDF_COLUMN_TYPES.get(col, "TEXT")}' for col in columns])
         
-        # Create table in SQLite
+        # Replace the table, so re-imports neither duplicate rows nor keep an older column layout
+        cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
         cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS "{table_name}" (
+            CREATE TABLE "{table_name}" (
                 {column_definitions}
             )
         ''')
@@ -220,24 +429,66 @@ def parse_pdf_to_sqlite_and_csv(pdf_file_path, sqlite_db_path, csv_export_dir):
         insert_query = f'INSERT INTO "{table_name}" ({formatted_columns}) VALUES ({placeholders})'
         
         # Insert data
-        cursor.executemany(insert_query, df.values.tolist())
+        with timed_stage("insert", table=table_name, rows=len(df)):
+            cursor.executemany(insert_query, df.values.tolist())
+        add_count("rows_inserted", len(df))
         print(f'Inserted {len(df)} records into table "{table_name}" in SQLite database.')
         
         # Export DataFrame to CSV
-        csv_file_path = os.path.join(csv_export_dir, f"{table_name}.csv")
-        df.to_csv(csv_file_path, index=False)
-        print(f'Exported merged data to CSV at: {csv_file_path}')
+        if export_format == 'csv':
+            csv_file_path = os.path.join(csv_export_dir, f"{table_name}.csv")
+            with timed_stage("csv"):
+                df.to_csv(csv_file_path, index=False)
+            print(f'Exported merged data to CSV at: {csv_file_path}')
+        
+        # Table statistics for the query planner and the query guardrails' row estimates
+        with timed_stage("analyze"):
+            cursor.execute("ANALYZE")
         
         # Commit and close connection
-        conn.commit()
+        with timed_stage("commit"):
+            conn.commit()
         conn.close()
         
+        # Columnar formats are written from the committed table
+        if export_format != 'csv':
+            with timed_stage("export"):
+                export_sqlite_tables(sqlite_db_path, csv_export_dir, export_format, [table_name])
+        
     except Exception as e:
         print(f"Error processing data: {e}")
         if 'conn' in locals():
             conn.close()
 
+def parse_args():
+    """
+    Parse command line options for the PDF import.
+    """
+    parser = argparse.ArgumentParser(description="Import P6 PDF exports into SQLite databases and CSV exports.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of files to import in parallel worker processes (0 uses every CPU).")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Print the full output of each file when importing in parallel.")
+    parser.add_argument("--export-format", choices=EXPORT_FORMATS, default="csv",
+                        help="Format of the PROJECT_DATA export: csv, compressed parquet, or arrow "
+                             "(IPC files that can be memory-mapped). parquet and arrow need pyarrow.")
+    parser.add_argument("--page-workers", type=int, default=1,
+                        help="Number of processes that extract page ranges of each PDF (0 uses every CPU).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Always run pdfplumber instead of reusing page tables cached in {CACHE_DIR_NAME}/.")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_MAX_CACHE_MB,
+                        help="Maximum size of the page table cache; least recently used pages are evicted.")
+    parser.add_argument("--metrics", choices=METRICS_MODES,
+                        help="Record per-stage time, peak memory growth and counters; print them as a summary "
+                             "table or append every span to a JSON lines file.")
+    parser.add_argument("--metrics-file", default=DEFAULT_METRICS_FILE,
+                        help="JSON lines file written with --metrics jsonl.")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    configure_metrics(args.metrics, args.metrics_file)
+    
     # Load environment variables from .env file
     load_dotenv()
     
@@ -254,10 +505,12 @@ def main():
         print("No PDF files found in PDF_Data directory.")
         return
     
-    # Process each PDF file
+    # Cache of extracted page tables shared by every run
+    cache_dir = None if args.no_cache else os.path.join(os.getcwd(), CACHE_DIR_NAME)
+    
+    # Build one independent job per PDF file
+    jobs = []
     for pdf_file in pdf_files:
-        print(f"\nProcessing {pdf_file}...")
-        
         # Full path to the PDF file
         pdf_file_path = os.path.join(pdf_data_dir, pdf_file)
         
@@ -269,7 +522,20 @@ def main():
         csv_export_dir = os.path.join(os.getcwd(), "CSV Exports", os.path.splitext(pdf_file)[0])
         
         # Parse PDF and store data in SQLite and export as CSV
-        parse_pdf_to_sqlite_and_csv(pdf_file_path, sqlite_db, csv_export_dir)
+        job_args = (pdf_file_path, sqlite_db, csv_export_dir, args.page_workers, cache_dir, args.cache_size_mb,
+                    args.export_format)
+        jobs.append((pdf_file, parse_pdf_to_sqlite_and_csv, job_args))
+    
+    # Process each PDF file, in worker processes if requested
+    if args.workers == 1:
+        for pdf_file, func, func_args in jobs:
+            print(f"\nProcessing {pdf_file}...")
+            with timed_stage(pdf_file):
+                func(*func_args)
+    else:
+        run_parallel_ingest(jobs, args.workers or None, args.verbose)
+    
+    report_metrics()
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,79 @@
 import os
+import csv
 import json
+import hashlib
+import argparse
+from datetime import datetime
 import pandas as pd
 from xerparser import Xer
 import sqlite3
 from dotenv import load_dotenv
+from pipeline_metrics import (METRICS_MODES, DEFAULT_METRICS_FILE, add_count, configure_metrics, report_metrics,
+                              timed_stage)
+from parallel_ingest import run_parallel_ingest
+from snapshot_store import update_snapshot_store
+from table_export import EXPORT_FORMATS, export_sqlite_tables
+from schedule_hierarchy import HIERARCHY_TABLES, build_hierarchy_tables
+from schedule_network import NETWORK_TABLES, build_network_tables
+from schedule_rollups import ROLLUP_TABLES, build_rollup_tables
+from work_calendar import CALENDAR_WORKTIME_TABLE, build_calendar_tables
+from xer_schema import (create_table_sql, create_index_sqls, get_column_types, get_primary_key, get_rowid_key_index,
+                        coerce_row, insert_sql, upsert_sql)
+
+# Tables computed from the imported ones rather than read from the XER file
+DERIVED_TABLES = NETWORK_TABLES + HIERARCHY_TABLES + ROLLUP_TABLES + (CALENDAR_WORKTIME_TABLE,)
+
+def build_derived_tables(conn):
+    """
+    Rebuild the tables computed from the imported XER tables.
+    
+    Calendars are compiled into working-time bitmaps, the critical path is
+    precomputed, the WBS and OBS trees are indexed and WBS, resource and
+    activity code totals are rolled up, so calendar, path, subtree and
+    dashboard questions become lookups.
+    
+    Every derived table is dropped first. The builders skip tables whose
+    sources are missing, so without this a table such as CPM_RELATIONSHIP
+    would keep describing an earlier import whose TASKPRED is gone.
+    
+    Parameters:
+        conn (sqlite3.Connection): Connection to the imported database. The caller commits.
+    """
+    for table_name in DERIVED_TABLES:
+        conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+    build_calendar_tables(conn)
+    build_network_tables(conn)
+    build_hierarchy_tables(conn)
+    build_rollup_tables(conn)
+
+def drop_missing_tables(cursor, imported_tables):
+    """
+    Drop the tables of an earlier import that are not in the file just imported.
+    
+    Derived tables are left to build_derived_tables, which drops and rebuilds them.
+    
+    Parameters:
+        cursor (sqlite3.Cursor): Cursor on the database being imported into.
+        imported_tables (iterable of str): Tables read from the new file.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+    for (existing_table,) in cursor.fetchall():
+        if existing_table not in imported_tables and existing_table not in DERIVED_TABLES:
+            cursor.execute(f'DROP TABLE "{existing_table}"')
+            print(f'Dropped table "{existing_table}", which is not in the new export.')
+
+def warn_skipped_rows(table_name, columns, key_index, count):
+    """
+    Report the rows left out of a table because their integer key was blank or not a number.
+
+    Parameters:
+        table_name (str): XER table name.
+        columns (list of str): Columns of the table.
+        key_index (int): Index of the key from get_rowid_key_index.
+        count (int): Number of rows skipped.
+    """
+    if count:
+        print(f'Warning: skipped {count} rows of "{table_name}" with a blank or non-numeric {columns[key_index]}.')
 
 def convert_to_serializable(value):
     """
@@ -22,14 +92,18 @@ def convert_to_serializable(value):
     else:
         return value
 
-def parse_xer_to_sqlite_and_csv(xer_file_path, sqlite_db_path, csv_export_dir):
+def parse_xer_to_sqlite_and_csv(xer_file_path, sqlite_db_path, csv_export_dir, export_format='csv'):
     """
     Parse the XER file and store the data into a SQLite database and export as CSV files.
     
+    Importing into an existing database replaces its tables, so re-running an
+    import leaves the database as if the file were imported once.
+    
     Parameters:
         xer_file_path (str): Path to the .xer file.
         sqlite_db_path (str): Path to the SQLite database file.
         csv_export_dir (str): Directory path where CSV files will be saved.
+        export_format (str): Format of the per-table exports: csv, parquet or arrow.
     """
     # Ensure the CSV export directory exists
     os.makedirs(csv_export_dir, exist_ok=True)
@@ -39,7 +113,8 @@ def parse_xer_to_sqlite_and_csv(xer_file_path, sqlite_db_path, csv_export_dir):
 
     # Parse the XER file
     try:
-        xer = Xer.reader(xer_file_path)
+        with timed_stage("parse"):
+            xer = Xer.reader(xer_file_path)
         print(f"Successfully parsed XER file: {xer_file_path}")
     except Exception as e:
         print(f"Error parsing XER file: {e}")
@@ -55,40 +130,40 @@ def parse_xer_to_sqlite_and_csv(xer_file_path, sqlite_db_path, csv_export_dir):
         return
     
     # Iterate through each table in the XER file
+    imported_tables = []
     for table_name, table_data in xer.tables.items():
         if table_data:
             try:
                 # Serialize data
-                serialized_data = []
-                for item in table_data:
-                    if isinstance(item, dict):
-                        # If item is a dictionary, use it directly
-                        item_dict = {k: convert_to_serializable(v) for k, v in item.items()}
-                    elif hasattr(item, '__dict__'):
-                        # If item has a __dict__ attribute, convert it to a dictionary
-                        item_dict = {k: convert_to_serializable(v) for k, v in vars(item).items()}
-                    elif isinstance(item, str):
-                        # If item is a string, assign it to a default key
-                        item_dict = {'value': convert_to_serializable(item)}
-                    else:
-                        # For other data types, handle them as needed
-                        item_dict = {'value': convert_to_serializable(str(item))}
-                    
-                    serialized_data.append(item_dict)
+                with timed_stage("serialize"):
+                    serialized_data = []
+                    for item in table_data:
+                        if isinstance(item, dict):
+                            # If item is a dictionary, use it directly
+                            item_dict = {k: convert_to_serializable(v) for k, v in item.items()}
+                        elif hasattr(item, '__dict__'):
+                            # If item has a __dict__ attribute, convert it to a dictionary
+                            item_dict = {k: convert_to_serializable(v) for k, v in vars(item).items()}
+                        elif isinstance(item, str):
+                            # If item is a string, assign it to a default key
+                            item_dict = {'value': convert_to_serializable(item)}
+                        else:
+                            # For other data types, handle them as needed
+                            item_dict = {'value': convert_to_serializable(str(item))}
+                        
+                        serialized_data.append(item_dict)
                 
                 # Create DataFrame
-                df = pd.DataFrame(serialized_data)
+                with timed_stage("dataframe"):
+                    df = pd.DataFrame(serialized_data)
                 
-                # Define table schema
+                # Define typed table schema
                 columns = df.columns.tolist()
-                column_definitions = ', '.join([f'"{col}" TEXT' for col in columns])
+                column_types = get_column_types(columns)
                 
-                # Create table in SQLite
-                cursor.execute(f'''
-                    CREATE TABLE IF NOT EXISTS "{table_name}" (
-                        {column_definitions}
-                    )
-                ''')
+                # Create table in SQLite, replacing the one from an earlier import
+                cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+                cursor.execute(create_table_sql(table_name, columns, if_not_exists=False))
                 print(f'Table "{table_name}" is ready in SQLite database.')
                 
                 # Prepare column names for the INSERT statement
@@ -99,32 +174,611 @@ def parse_xer_to_sqlite_and_csv(xer_file_path, sqlite_db_path, csv_export_dir):
                 insert_query = f'INSERT INTO "{table_name}" ({formatted_columns}) VALUES ({placeholders})'
                 
                 # Prepare data for insertion
-                data_to_insert = df.values.tolist()
+                with timed_stage("coerce"):
+                    data_to_insert = [coerce_row(row, column_types) for row in df.values.tolist()]
+                
+                # Rows without a usable key would be given one made up by SQLite
+                key_index = get_rowid_key_index(table_name, columns)
+                if key_index is not None:
+                    keep = [row[key_index] is not None for row in data_to_insert]
+                    warn_skipped_rows(table_name, columns, key_index, keep.count(False))
+                    data_to_insert = [row for row, kept in zip(data_to_insert, keep) if kept]
+                    df = df[keep]
                 
-                # Insert data into table
-                cursor.executemany(insert_query, data_to_insert)
+                # Insert data into table and index its foreign keys
+                with timed_stage("insert", table=table_name, rows=len(data_to_insert)):
+                    cursor.executemany(insert_query, data_to_insert)
+                    for index_sql in create_index_sqls(table_name, columns):
+                        cursor.execute(index_sql)
+                add_count("rows_inserted", len(data_to_insert))
+                add_count("tables_imported")
                 print(f'Inserted {len(data_to_insert)} records into table "{table_name}" in SQLite database.')
+                imported_tables.append(table_name)
                 
-                # Export DataFrame to CSV
-                csv_file_path = os.path.join(csv_export_dir, f"{table_name}.csv")
-                df.to_csv(csv_file_path, index=False)
-                print(f'Exported table "{table_name}" to CSV at: {csv_file_path}\n')
+                # Export DataFrame to CSV (columnar formats are written from the database after commit)
+                if export_format == 'csv':
+                    csv_file_path = os.path.join(csv_export_dir, f"{table_name}.csv")
+                    with timed_stage("csv"):
+                        df.to_csv(csv_file_path, index=False)
+                    print(f'Exported table "{table_name}" to CSV at: {csv_file_path}\n')
             
             except Exception as e:
                 print(f"Error processing table '{table_name}': {e}\n")
                 continue
     
+    try:
+        drop_missing_tables(cursor, imported_tables)
+    except sqlite3.Error as e:
+        print(f"Error dropping tables missing from the export: {e}")
+    
+    # Precompute calendars and the critical path
+    try:
+        with timed_stage("derived"):
+            build_derived_tables(conn)
+    except sqlite3.Error as e:
+        print(f"Error building derived tables: {e}")
+    # Table statistics for the query planner and the query guardrails' row estimates
+    try:
+        with timed_stage("analyze"):
+            conn.execute("ANALYZE")
+    except sqlite3.Error as e:
+        print(f"Error analyzing SQLite database: {e}")
+    
     # Commit changes and close SQLite connection
     try:
-        conn.commit()
+        with timed_stage("commit"):
+            conn.commit()
         print(f"All data committed to SQLite database at: {sqlite_db_path}")
     except sqlite3.Error as e:
         print(f"Error committing changes to SQLite database: {e}")
     finally:
         conn.close()
         print("SQLite connection closed.")
+    
+    if export_format != 'csv':
+        with timed_stage("export"):
+            export_sqlite_tables(sqlite_db_path, csv_export_dir, export_format, imported_tables)
+
+XER_ENCODING = "cp1252"
+STREAM_BATCH_SIZE = 5000
+MANIFEST_FILE_NAME = "import_manifest.json"
+
+def iter_xer_records(xer_file_path):
+    """
+    Read an XER file line by line and yield its records without loading the whole file.
+    
+    Parameters:
+        xer_file_path (str): Path to the .xer file.
+        
+    Yields:
+        tuple: ``('table', table_name, columns)`` when a %T/%F block starts and
+        ``('row', table_name, values)`` for every %R line. The ERMHDR header line
+        is yielded as a single-column ``value`` table to match the pandas path.
+    """
+    table_name = None
+    with open(xer_file_path, encoding=XER_ENCODING, errors="ignore", newline="") as xer_file:
+        for line in xer_file:
+            fields = line.rstrip("\r\n").split("\t")
+            marker = fields[0]
+            if marker == "%R" and table_name:
+                yield ("row", table_name, fields[1:])
+            elif marker == "%T":
+                table_name = fields[1].strip() if len(fields) > 1 else None
+            elif marker == "%F" and table_name:
+                yield ("table", table_name, fields[1:])
+            elif marker == "ERMHDR":
+                yield ("table", "ERMHDR", ["value"])
+                for value in fields[1:]:
+                    yield ("row", "ERMHDR", [value])
+            elif marker == "%E":
+                break
+
+def get_existing_columns(cursor, table_name):
+    """
+    Get the column names and primary key of a table that already exists in the database.
+    
+    Returns:
+        tuple: (list of column names, tuple of primary key columns), or (None, None) if missing.
+    """
+    cursor.execute(f'PRAGMA table_info("{table_name}")')
+    info = cursor.fetchall()
+    if not info:
+        return None, None
+    primary_key = tuple(col[1] for col in sorted(info, key=lambda col: col[5]) if col[5])
+    return [col[1] for col in info], primary_key
+
+def prepare_upsert_table(cursor, table_name, columns):
+    """
+    Make sure an existing table can take upserts for the given %F header.
+    
+    Tables whose columns or primary key differ from the header (for example
+    databases built before the typed schema) are dropped and recreated.
+    
+    Returns:
+        bool: True if rows can be upserted, False if the table must be reloaded in full.
+    """
+    existing_columns, existing_key = get_existing_columns(cursor, table_name)
+    primary_key = get_primary_key(table_name, columns)
+    if existing_columns is not None and (existing_columns != columns or existing_key != primary_key):
+        print(f'Schema of table "{table_name}" changed, rebuilding it.')
+        cursor.execute(f'DROP TABLE "{table_name}"')
+    cursor.execute(create_table_sql(table_name, columns))
+    if not primary_key:
+        cursor.execute(f'DELETE FROM "{table_name}"')
+        return False
+    
+    # Rows with a NULL in their key cannot be matched to the file, so they are reloaded
+    key_has_null = ' OR '.join([f'"{col}" IS NULL' for col in primary_key])
+    cursor.execute(f'DELETE FROM "{table_name}" WHERE {key_has_null}')
+    key_columns = ', '.join([f'"{col}"' for col in primary_key])
+    cursor.execute('DROP TABLE IF EXISTS temp."_seen_keys"')
+    cursor.execute(f'CREATE TEMP TABLE "_seen_keys" AS SELECT {key_columns} FROM main."{table_name}" WHERE 0')
+    return True
+
+def delete_stale_rows(cursor, table_name, columns):
+    """
+    Delete rows whose primary key was not seen in the latest import of the table.
+    
+    NOT EXISTS is used rather than NOT IN, which deletes nothing once a seen
+    key holds a NULL. Rows with a NULL in their key were cleared by
+    prepare_upsert_table, so those left were loaded by this import and are kept.
+    
+    Returns:
+        int: Number of rows deleted.
+    """
+    primary_key = get_primary_key(table_name, columns)
+    key_columns = ', '.join([f'"{col}"' for col in primary_key])
+    key_complete = ' AND '.join([f'main."{table_name}"."{col}" IS NOT NULL' for col in primary_key])
+    key_matches = ' AND '.join([f'seen."{col}" = main."{table_name}"."{col}"' for col in primary_key])
+    cursor.execute(f'CREATE INDEX temp."_seen_keys_index" ON "_seen_keys" ({key_columns})')
+    cursor.execute(
+        f'DELETE FROM main."{table_name}" WHERE {key_complete} AND NOT EXISTS '
+        f'(SELECT 1 FROM temp."_seen_keys" seen WHERE {key_matches})'
+    )
+    deleted = cursor.rowcount
+    cursor.execute('DROP TABLE temp."_seen_keys"')
+    return deleted
+
+def stream_xer_to_sqlite_and_csv(xer_file_path, sqlite_db_path, csv_export_dir, batch_size=STREAM_BATCH_SIZE, upsert=False,
+                                 export_format='csv'):
+    """
+    Stream the XER file into a SQLite database and CSV files without building DataFrames.
+    
+    Rows are inserted in batches of ``batch_size`` with ``executemany`` and written
+    to CSV batch by batch, so memory use stays flat regardless of file size.
+    
+    With ``upsert`` the database is updated in place: rows are only written when
+    their primary key is new or their content changed, rows missing from the file
+    are deleted, and tables without a primary key are reloaded.
+    
+    CSV files are written while streaming; Parquet and Arrow files are
+    written from the typed tables once the database is committed.
+    
+    Parameters:
+        xer_file_path (str): Path to the .xer file.
+        sqlite_db_path (str): Path to the SQLite database file.
+        csv_export_dir (str): Directory path where CSV files will be saved.
+        batch_size (int): Number of rows sent to each ``executemany`` call.
+        upsert (bool): Update an existing database in place instead of replacing its tables.
+        export_format (str): Format of the per-table exports: csv, parquet or arrow.
+    
+    Returns:
+        bool: True if the whole file was committed, False otherwise.
+    """
+    os.makedirs(csv_export_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(sqlite_db_path), exist_ok=True)
+    
+    try:
+        conn = sqlite3.connect(sqlite_db_path)
+        cursor = conn.cursor()
+        print(f"Connected to SQLite database at: {sqlite_db_path}")
+    except sqlite3.Error as e:
+        print(f"Error connecting to SQLite database: {e}")
+        return False
+    
+    table_name = None
+    columns = []
+    column_types = []
+    insert_query = None
+    track_keys = False
+    key_positions = []
+    rowid_key_index = None
+    skipped_count = 0
+    seen_keys_query = None
+    batch = []
+    row_count = 0
+    changes_before = 0
+    imported_tables = set()
+    csv_file = None
+    csv_writer = None
+    csv_batch = []
+    
+    def flush():
+        if batch:
+            with timed_stage("insert", table=table_name, rows=len(batch)):
+                cursor.executemany(insert_query, batch)
+                if track_keys:
+                    cursor.executemany(seen_keys_query, [[row[i] for i in key_positions] for row in batch])
+            add_count("rows_inserted", len(batch))
+            add_count("insert_batches")
+            batch.clear()
+        if csv_batch:
+            with timed_stage("csv"):
+                csv_writer.writerows(csv_batch)
+            csv_batch.clear()
+    
+    def finish_table():
+        nonlocal csv_file
+        if table_name is None:
+            return
+        flush()
+        warn_skipped_rows(table_name, columns, rowid_key_index, skipped_count)
+        if upsert:
+            changed = conn.total_changes - changes_before - (row_count if track_keys else 0)
+            deleted = delete_stale_rows(cursor, table_name, columns) if track_keys else 0
+            print(f'Upserted table "{table_name}": {changed} rows inserted or changed, {deleted} removed.')
+        with timed_stage("insert"):
+            for index_sql in create_index_sqls(table_name, columns):
+                cursor.execute(index_sql)
+        if csv_file:
+            csv_file.close()
+            csv_file = None
+            print(f'Exported table "{table_name}" to CSV at: {os.path.join(csv_export_dir, f"{table_name}.csv")}')
+        print(f'Inserted {row_count} records into table "{table_name}" in SQLite database.\n')
+    
+    try:
+        for kind, name, values in iter_xer_records(xer_file_path):
+            if kind == "table":
+                finish_table()
+                table_name, columns, row_count, skipped_count = name, values, 0, 0
+                column_types = get_column_types(columns)
+                rowid_key_index = get_rowid_key_index(table_name, columns)
+                imported_tables.add(table_name)
+                add_count("tables_imported")
+                if upsert:
+                    track_keys = prepare_upsert_table(cursor, table_name, columns)
+                    insert_query = upsert_sql(table_name, columns)
+                    key_positions = [columns.index(col) for col in get_primary_key(table_name, columns)]
+                    seen_keys_query = f'INSERT INTO temp."_seen_keys" VALUES ({", ".join(["?"] * len(key_positions))})'
+                    changes_before = conn.total_changes
+                else:
+                    cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+                    cursor.execute(create_table_sql(table_name, columns, if_not_exists=False))
+                    insert_query = insert_sql(table_name, columns)
+                print(f'Table "{table_name}" is ready in SQLite database.')
+                
+                if export_format == 'csv':
+                    csv_file = open(os.path.join(csv_export_dir, f"{table_name}.csv"), "w", newline="", encoding="utf-8")
+                    csv_writer = csv.writer(csv_file, lineterminator="\n")
+                    csv_writer.writerow(columns)
+                continue
+            
+            # Pad or trim rows so they always match the %F header
+            if len(values) != len(columns):
+                values = (values + [''] * len(columns))[:len(columns)]
+            row = coerce_row(values, column_types)
+            # Rows without a usable key would be given one made up by SQLite
+            if rowid_key_index is not None and row[rowid_key_index] is None:
+                skipped_count += 1
+                continue
+            batch.append(row)
+            if csv_file:
+                csv_batch.append(values)
+            row_count += 1
+            if len(batch) >= batch_size:
+                flush()
+        finish_table()
+        if upsert:
+            # Tables that disappeared from the export no longer hold current data
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+            for (existing_table,) in cursor.fetchall():
+                if existing_table not in imported_tables and existing_table not in DERIVED_TABLES:
+                    cursor.execute(f'DELETE FROM "{existing_table}"')
+                    print(f'Cleared table "{existing_table}", which is not in the new export.')
+        else:
+            drop_missing_tables(cursor, imported_tables)
+        # Precompute calendars and the critical path
+        with timed_stage("derived"):
+            build_derived_tables(conn)
+        with timed_stage("analyze"):
+            cursor.execute("ANALYZE")
+        with timed_stage("commit"):
+            conn.commit()
+        print(f"All data committed to SQLite database at: {sqlite_db_path}")
+        if export_format != 'csv':
+            with timed_stage("export"):
+                export_sqlite_tables(sqlite_db_path, csv_export_dir, export_format, sorted(imported_tables))
+        return True
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error streaming XER file '{xer_file_path}': {e}")
+        return False
+    finally:
+        if csv_file:
+            csv_file.close()
+        conn.close()
+        print("SQLite connection closed.")
+
+BULK_BATCH_SIZE = 50000
+BULK_TEMP_SUFFIX = ".loading"
+# The temporary database is thrown away if anything fails, so it needs no journal or fsync
+BULK_LOAD_PRAGMAS = (
+    "PRAGMA journal_mode=OFF",
+    "PRAGMA synchronous=OFF",
+    "PRAGMA locking_mode=EXCLUSIVE",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",  # 256 MB
+)
+
+def remove_database_files(db_path):
+    """
+    Delete a SQLite database file and any journal files next to it.
+    """
+    for path in (db_path, f"{db_path}-journal", f"{db_path}-wal", f"{db_path}-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def replace_database_file(temp_path, sqlite_db_path):
+    """
+    Atomically move a finished database over the target path.
+
+    Journal files left by the old database are removed first, so they can
+    never be replayed into the new file.
+    """
+    for suffix in ("-journal", "-wal", "-shm"):
+        if os.path.exists(f"{sqlite_db_path}{suffix}"):
+            os.remove(f"{sqlite_db_path}{suffix}")
+    os.replace(temp_path, sqlite_db_path)
+
+def bulk_load_xer_to_sqlite_and_csv(xer_file_path, sqlite_db_path, csv_export_dir, batch_size=BULK_BATCH_SIZE,
+                                    export_format='csv'):
+    """
+    Load the XER file into a new database as fast as possible and swap it into place.
+
+    Rows are streamed into a temporary database next to the target, with
+    journaling and fsync turned off, in one transaction and large batches.
+    Foreign key indexes are created once all rows are in, ANALYZE gathers
+    statistics for the query planner, and the file is renamed over the target.
+    If anything fails the temporary file is deleted and the existing database
+    is left untouched, so readers only ever see a complete import.
+
+    Parameters:
+        xer_file_path (str): Path to the .xer file.
+        sqlite_db_path (str): Path to the SQLite database file, replaced on success.
+        csv_export_dir (str): Directory path where CSV files will be saved.
+        batch_size (int): Number of rows sent to each ``executemany`` call.
+        export_format (str): Format of the per-table exports: csv, parquet or arrow.
+
+    Returns:
+        bool: True if the new database was swapped into place, False otherwise.
+    """
+    os.makedirs(csv_export_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(sqlite_db_path), exist_ok=True)
+    temp_path = f"{sqlite_db_path}{BULK_TEMP_SUFFIX}"
+
+    try:
+        # Left over from an interrupted load
+        remove_database_files(temp_path)
+        # Transactions are managed explicitly so the whole load is one transaction
+        conn = sqlite3.connect(temp_path, isolation_level=None)
+        print(f"Bulk loading into temporary database: {temp_path}")
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error creating temporary database: {e}")
+        return False
+
+    cursor = conn.cursor()
+    table_columns = {}
+    table_name = None
+    insert_query = None
+    column_types = []
+    rowid_key_index = None
+    skipped_counts = {}
+    batch = []
+    csv_batch = []
+    csv_file = None
+    csv_writer = None
+
+    def flush():
+        if batch:
+            with timed_stage("insert", table=table_name, rows=len(batch)):
+                cursor.executemany(insert_query, batch)
+            add_count("rows_inserted", len(batch))
+            add_count("insert_batches")
+            batch.clear()
+        if csv_batch:
+            with timed_stage("csv"):
+                csv_writer.writerows(csv_batch)
+            csv_batch.clear()
+
+    try:
+        for pragma in BULK_LOAD_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.execute("BEGIN")
+
+        for kind, name, values in iter_xer_records(xer_file_path):
+            if kind == "table":
+                flush()
+                if csv_file:
+                    csv_file.close()
+                    csv_file = None
+                table_name, columns = name, values
+                table_columns[table_name] = columns
+                column_types = get_column_types(columns)
+                rowid_key_index = get_rowid_key_index(table_name, columns)
+                cursor.execute(create_table_sql(table_name, columns))
+                insert_query = insert_sql(table_name, columns)
+                add_count("tables_imported")
+                if export_format == 'csv':
+                    csv_file = open(os.path.join(csv_export_dir, f"{table_name}.csv"), "w", newline="", encoding="utf-8")
+                    csv_writer = csv.writer(csv_file, lineterminator="\n")
+                    csv_writer.writerow(columns)
+                continue
+
+            # Pad or trim rows so they always match the %F header
+            columns = table_columns[table_name]
+            if len(values) != len(columns):
+                values = (values + [''] * len(columns))[:len(columns)]
+            row = coerce_row(values, column_types)
+            # Rows without a usable key would be given one made up by SQLite
+            if rowid_key_index is not None and row[rowid_key_index] is None:
+                skipped_counts[table_name] = skipped_counts.get(table_name, 0) + 1
+                continue
+            batch.append(row)
+            if csv_file:
+                csv_batch.append(values)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        if csv_file:
+            csv_file.close()
+            csv_file = None
+
+        # Indexes are built once over the loaded rows instead of maintained per insert
+        with timed_stage("index"):
+            for name, columns in table_columns.items():
+                for index_sql in create_index_sqls(name, columns):
+                    cursor.execute(index_sql)
+        with timed_stage("derived"):
+            build_derived_tables(conn)
+        with timed_stage("commit"):
+            cursor.execute("COMMIT")
+        with timed_stage("analyze"):
+            cursor.execute("ANALYZE")
+        conn.close()
+
+        with timed_stage("swap"):
+            replace_database_file(temp_path, sqlite_db_path)
+        for name, columns in table_columns.items():
+            warn_skipped_rows(name, columns, get_rowid_key_index(name, columns), skipped_counts.get(name, 0))
+            print(f'Loaded table "{name}".')
+        print(f"All data committed to SQLite database at: {sqlite_db_path}")
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error bulk loading XER file '{xer_file_path}': {e}")
+        if csv_file:
+            csv_file.close()
+        conn.close()
+        try:
+            remove_database_files(temp_path)
+        except OSError:
+            pass
+        return False
+
+    if export_format != 'csv':
+        with timed_stage("export"):
+            export_sqlite_tables(sqlite_db_path, csv_export_dir, export_format, list(table_columns))
+    return True
+
+def get_file_hash(file_path):
+    """
+    Compute the SHA-256 hash of a file in chunks.
+    
+    Parameters:
+        file_path (str): Path to the file.
+    
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def load_import_manifest(manifest_path):
+    """
+    Load the import manifest that records the hash of every imported XER file.
+    
+    Returns:
+        dict: Manifest entries keyed by XER file name.
+    """
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading import manifest, starting a new one: {e}")
+        return {}
+
+def save_import_manifest(manifest_path, manifest):
+    """
+    Write the import manifest atomically.
+    """
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+def import_xer_incrementally(xer_file_path, sqlite_db_path, csv_export_dir, manifest_entry=None, batch_size=STREAM_BATCH_SIZE,
+                             export_format='csv'):
+    """
+    Import an XER file only if it changed since the last run, upserting changed rows.
+    
+    Parameters:
+        xer_file_path (str): Path to the .xer file.
+        sqlite_db_path (str): Path to the SQLite database file.
+        csv_export_dir (str): Directory path where CSV files will be saved.
+        manifest_entry (dict): The file's entry from the previous import manifest, if any.
+        batch_size (int): Number of rows sent to each ``executemany`` call.
+        export_format (str): Format of the per-table exports: csv, parquet or arrow.
+    
+    Returns:
+        dict: The new manifest entry if the file was imported, None if it was
+        unchanged, or False if the import failed.
+    """
+    xer_file = os.path.basename(xer_file_path)
+    file_hash = get_file_hash(xer_file_path)
+    if manifest_entry and manifest_entry.get("sha256") == file_hash and os.path.exists(sqlite_db_path):
+        print(f"Skipping {xer_file}: unchanged since {manifest_entry.get('imported_at')}.")
+        return None
+    
+    if not stream_xer_to_sqlite_and_csv(xer_file_path, sqlite_db_path, csv_export_dir, batch_size, upsert=True,
+                                        export_format=export_format):
+        return False
+    return {
+        "sha256": file_hash,
+        "database": os.path.basename(sqlite_db_path),
+        "imported_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+def parse_args():
+    """
+    Parse command line options for the XER import.
+    """
+    parser = argparse.ArgumentParser(description="Import P6 XER files into SQLite databases and CSV exports.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read XER files line by line and insert in batches instead of building DataFrames.")
+    parser.add_argument("--bulk-load", action="store_true",
+                        help="Load each file into a temporary database with journaling off and indexes built after "
+                             "the data, then atomically replace the existing database.")
+    parser.add_argument("--batch-size", type=int,
+                        help=f"Rows per executemany batch in streaming mode (default {STREAM_BATCH_SIZE}, "
+                             f"or {BULK_BATCH_SIZE} with --bulk-load).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip files whose hash is unchanged and upsert only changed rows of the others.")
+    parser.add_argument("--export-format", choices=EXPORT_FORMATS, default="csv",
+                        help="Format of the per-table exports: csv, typed and compressed parquet, "
+                             "or arrow (IPC files that can be memory-mapped). parquet and arrow need pyarrow.")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="Add the imported databases to the snapshot store for comparing updates.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of files to import in parallel worker processes (0 uses every CPU).")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Print the full output of each file when importing in parallel.")
+    parser.add_argument("--metrics", choices=METRICS_MODES,
+                        help="Record per-stage time, peak memory growth and counters; print them as a summary "
+                             "table or append every span to a JSON lines file.")
+    parser.add_argument("--metrics-file", default=DEFAULT_METRICS_FILE,
+                        help="JSON lines file written with --metrics jsonl.")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    if args.bulk_load and args.incremental:
+        print("Error: --bulk-load replaces whole databases and cannot be combined with --incremental.")
+        return
+    batch_size = args.batch_size or (BULK_BATCH_SIZE if args.bulk_load else STREAM_BATCH_SIZE)
+    configure_metrics(args.metrics, args.metrics_file)
+    
     # Load environment variables from .env file
     load_dotenv()
     
@@ -141,10 +795,13 @@ def main():
         print("No XER files found in XER_Data directory.")
         return
     
-    # Process each XER file
+    # Load the manifest of previous imports
+    manifest_path = os.path.join(os.getcwd(), "Database", MANIFEST_FILE_NAME)
+    manifest = load_import_manifest(manifest_path) if args.incremental else {}
+    
+    # Build one independent job per XER file
+    jobs = []
     for xer_file in xer_files:
-        print(f"\nProcessing {xer_file}...")
-        
         # Full path to the XER file
         xer_file_path = os.path.join(xer_data_dir, xer_file)
         
@@ -156,7 +813,44 @@ def main():
         csv_export_dir = os.path.join(os.getcwd(), "CSV Exports", os.path.splitext(xer_file)[0])
         
         # Parse XER and store data in SQLite and export as CSV
-        parse_xer_to_sqlite_and_csv(xer_file_path, sqlite_db, csv_export_dir)
+        if args.incremental:
+            jobs.append((xer_file, import_xer_incrementally,
+                         (xer_file_path, sqlite_db, csv_export_dir, manifest.get(xer_file), batch_size,
+                          args.export_format)))
+        elif args.bulk_load:
+            jobs.append((xer_file, bulk_load_xer_to_sqlite_and_csv,
+                         (xer_file_path, sqlite_db, csv_export_dir, batch_size, args.export_format)))
+        elif args.stream:
+            jobs.append((xer_file, stream_xer_to_sqlite_and_csv,
+                         (xer_file_path, sqlite_db, csv_export_dir, batch_size, False, args.export_format)))
+        else:
+            jobs.append((xer_file, parse_xer_to_sqlite_and_csv,
+                         (xer_file_path, sqlite_db, csv_export_dir, args.export_format)))
+    
+    # Process each XER file, in worker processes if requested
+    if args.workers == 1:
+        results = {}
+        for xer_file, func, func_args in jobs:
+            print(f"\nProcessing {xer_file}...")
+            with timed_stage(xer_file):
+                results[xer_file] = func(*func_args)
+    else:
+        outcomes = run_parallel_ingest(jobs, args.workers or None, args.verbose)
+        results = {xer_file: outcome["result"] for xer_file, outcome in outcomes.items()}
+    
+    # Record the files that were imported incrementally
+    if args.incremental:
+        new_entries = {xer_file: entry for xer_file, entry in results.items() if entry}
+        if new_entries:
+            manifest.update(new_entries)
+            save_import_manifest(manifest_path, manifest)
+    
+    # Add new weekly updates to the snapshot store, oldest first
+    if args.snapshot:
+        with timed_stage("snapshot"):
+            update_snapshot_store(os.path.join(os.getcwd(), "Database"))
+    
+    report_metrics()
 
 if __name__ == "__main__":
     main()
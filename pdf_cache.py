@@ -0,0 +1,119 @@
+import os
+import gzip
+import json
+import hashlib
+
+CACHE_DIR_NAME = "PDF_Cache"
+DEFAULT_MAX_CACHE_MB = 512
+INDEX_FILE_NAME = "index.json"
+
+def get_cache_key(pdf_file_path, table_settings, extractor_version=""):
+    """
+    Build the cache key for a PDF and the table extraction settings used on it.
+
+    Parameters:
+        pdf_file_path (str): Path to the PDF file.
+        table_settings (dict): Settings passed to pdfplumber's extract_tables.
+        extractor_version (str): pdfplumber version, so upgrades invalidate the cache.
+
+    Returns:
+        str: Relative cache directory "<pdf sha256>/<settings hash>".
+    """
+    sha256 = hashlib.sha256()
+    with open(pdf_file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    settings = json.dumps({"settings": table_settings, "version": extractor_version}, sort_keys=True, default=str)
+    settings_hash = hashlib.sha256(settings.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(sha256.hexdigest(), settings_hash)
+
+def get_page_path(cache_dir, cache_key, page_num):
+    """
+    Get the path of the compressed JSON file that holds one page's tables.
+    """
+    return os.path.join(cache_dir, cache_key, f"page_{page_num}.json.gz")
+
+def load_cached_pages(cache_dir, cache_key):
+    """
+    Load every cached page of a PDF.
+
+    Parameters:
+        cache_dir (str): Root cache directory.
+        cache_key (str): Key from get_cache_key.
+
+    Returns:
+        tuple: (page count or None if the PDF was never cached, dict of tables keyed by page number)
+    """
+    index_path = os.path.join(cache_dir, cache_key, INDEX_FILE_NAME)
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            page_count = json.load(f)["page_count"]
+    except (OSError, ValueError, KeyError):
+        return None, {}
+
+    pages = {}
+    for page_num in range(1, page_count + 1):
+        page_path = get_page_path(cache_dir, cache_key, page_num)
+        try:
+            with gzip.open(page_path, "rt", encoding="utf-8") as f:
+                pages[page_num] = json.load(f)
+            # Reading a page refreshes it for least-recently-used eviction
+            os.utime(page_path)
+        except (OSError, ValueError):
+            continue
+    return page_count, pages
+
+def save_cached_pages(cache_dir, cache_key, page_count, page_tables):
+    """
+    Save extracted page tables to the cache.
+
+    Parameters:
+        cache_dir (str): Root cache directory.
+        cache_key (str): Key from get_cache_key.
+        page_count (int): Total number of pages in the PDF.
+        page_tables (list of tuple): (page number, list of tables) to store.
+    """
+    key_dir = os.path.join(cache_dir, cache_key)
+    os.makedirs(key_dir, exist_ok=True)
+    for page_num, tables in page_tables:
+        page_path = get_page_path(cache_dir, cache_key, page_num)
+        temp_path = f"{page_path}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(tables, f, separators=(",", ":"))
+        os.replace(temp_path, page_path)
+    with open(os.path.join(key_dir, INDEX_FILE_NAME), "w", encoding="utf-8") as f:
+        json.dump({"page_count": page_count}, f)
+
+def evict_cache(cache_dir, max_bytes):
+    """
+    Delete the least recently used cached pages until the cache fits in max_bytes.
+
+    Parameters:
+        cache_dir (str): Root cache directory.
+        max_bytes (int): Maximum total size of the cached pages.
+
+    Returns:
+        int: Number of bytes freed.
+    """
+    entries = []
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if name.endswith(".json.gz"):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            freed += size
+        except OSError:
+            continue
+    return freed
@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+METRICS_MODES = ("summary", "jsonl")
+DEFAULT_METRICS_FILE = "metrics.jsonl"
+
+# Seconds spent in each named stage since the last reset, when timing is enabled
+_stage_timings = {}
+# Count, seconds and peak memory growth per nested span path, e.g. "question/llm"
+_span_summary = {}
+_counters = {}
+# Open spans of each thread, so spans of concurrent threads nest independently
+_local = threading.local()
+_lock = threading.Lock()
+_enabled = False
+_metrics_mode = None
+_metrics_path = None
+_metrics_file = None
+
+def get_peak_rss_mb():
+    """
+    Get the peak resident memory of the current process in MB, or None where it cannot be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def get_current_rss_mb():
+    """
+    Get the current resident memory of the process in MB, or None where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError, IndexError):
+        return None
+
+def enable_stage_timing(enabled=True):
+    """
+    Turn collection of stage timings and counters on or off for this process.
+    """
+    global _enabled
+    _enabled = enabled
+
+def reset_stage_timings():
+    """
+    Forget the stage timings, spans and counters collected so far.
+    """
+    _stage_timings.clear()
+    _span_summary.clear()
+    _counters.clear()
+
+def get_stage_timings():
+    """
+    Get the seconds spent in each stage since the last reset.
+
+    Nested stages are also counted in the stage that contains them.
+
+    Returns:
+        dict: Seconds keyed by stage name, in the order the stages first ran.
+    """
+    return dict(_stage_timings)
+
+def get_counters():
+    """
+    Get the counters added since the last reset.
+    """
+    return dict(_counters)
+
+def add_count(name, value=1):
+    """
+    Add to a named counter, e.g. rows inserted or LLM tokens. Does nothing unless metrics are enabled.
+    """
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + value
+
+def write_metrics_record(record):
+    """
+    Append one record to the JSON lines metrics file, if one is open.
+    """
+    if _metrics_file:
+        with _lock:
+            _metrics_file.write(json.dumps(record, default=str) + "\n")
+            # Flushed per record so forked workers never inherit buffered lines
+            _metrics_file.flush()
+
+def get_span_stack():
+    """
+    Get the names of the spans open in the current thread, outermost first.
+    """
+    if not hasattr(_local, "span_stack"):
+        _local.span_stack = []
+    return _local.span_stack
+
+@contextmanager
+def timed_stage(name, **attributes):
+    """
+    Record the block as a span: its duration, nesting and the growth of peak memory.
+
+    Stages can be entered many times (e.g. once per table or batch); their
+    times add up. In jsonl mode every span is also written as a record with
+    the given attributes. Spans of different threads nest independently.
+    Does nothing unless metrics are enabled.
+
+    Parameters:
+        name (str): Stage name, e.g. "insert" or "llm".
+        **attributes: Extra fields for the JSON lines record, e.g. table="TASK".
+    """
+    if not _enabled:
+        yield
+        return
+    span_stack = get_span_stack()
+    span_stack.append(name)
+    path = "/".join(span_stack)
+    # Registered on entry so the summary lists parents before their children
+    with _lock:
+        summary = _span_summary.setdefault(path, {"count": 0, "seconds": 0.0, "peak_growth_mb": None})
+    peak_before = get_peak_rss_mb()
+    started_at = time.time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        span_stack.pop()
+        peak_after = get_peak_rss_mb()
+        peak_growth = peak_after - peak_before if peak_after is not None else None
+
+        with _lock:
+            _stage_timings[name] = _stage_timings.get(name, 0.0) + seconds
+            summary["count"] += 1
+            summary["seconds"] += seconds
+            if peak_growth is not None:
+                summary["peak_growth_mb"] = (summary["peak_growth_mb"] or 0.0) + peak_growth
+        if _metrics_file:
+            write_metrics_record({
+                "type": "span", "name": name, "path": path, "pid": os.getpid(), "start": started_at,
+                "seconds": seconds, "peak_rss_mb": peak_after, "peak_growth_mb": peak_growth,
+                "rss_mb": get_current_rss_mb(), **attributes,
+            })
+
+def configure_metrics(mode, metrics_path=None):
+    """
+    Turn on metrics for this process.
+
+    Parameters:
+        mode (str): "summary" to print a table at the end, or "jsonl" to also
+            append every span to metrics_path as it finishes. None turns metrics off.
+        metrics_path (str): JSON lines file, DEFAULT_METRICS_FILE when not given.
+    """
+    global _metrics_mode, _metrics_path, _metrics_file
+    close_metrics_file()
+    _metrics_mode = mode
+    _metrics_path = None
+    enable_stage_timing(mode is not None)
+    if mode == "jsonl":
+        _metrics_path = os.path.abspath(metrics_path or DEFAULT_METRICS_FILE)
+        _metrics_file = open(_metrics_path, "a", encoding="utf-8")
+
+def get_metrics_config():
+    """
+    Get the metrics settings of this process, to pass on to worker processes.
+
+    Returns:
+        tuple: (mode, metrics_path), or None if metrics are off.
+    """
+    return (_metrics_mode, _metrics_path) if _metrics_mode else None
+
+def close_metrics_file():
+    """
+    Close the JSON lines metrics file, if one is open.
+    """
+    global _metrics_file
+    if _metrics_file:
+        _metrics_file.close()
+        _metrics_file = None
+
+def get_metrics_snapshot():
+    """
+    Get this process's spans and counters, e.g. to return them from a worker.
+    """
+    return {"spans": {path: dict(summary) for path, summary in _span_summary.items()}, "counters": get_counters()}
+
+def merge_metrics(snapshot):
+    """
+    Add the spans and counters of another process (see get_metrics_snapshot) to this one.
+    """
+    for path, summary in snapshot["spans"].items():
+        merged = _span_summary.setdefault(path, {"count": 0, "seconds": 0.0, "peak_growth_mb": None})
+        merged["count"] += summary["count"]
+        merged["seconds"] += summary["seconds"]
+        if summary["peak_growth_mb"] is not None:
+            merged["peak_growth_mb"] = (merged["peak_growth_mb"] or 0.0) + summary["peak_growth_mb"]
+    for name, value in snapshot["counters"].items():
+        _counters[name] = _counters.get(name, 0) + value
+
+def format_metrics_summary():
+    """
+    Format the spans and counters collected so far as a table.
+    """
+    lines = [f"{'stage':<40} {'calls':>7} {'total s':>9} {'mean ms':>9} {'peak +MB':>9}"]
+    for path, summary in _span_summary.items():
+        depth = path.count("/")
+        label = "  " * depth + path.rsplit("/", 1)[-1]
+        growth = f"{summary['peak_growth_mb']:.1f}" if summary["peak_growth_mb"] is not None else "n/a"
+        lines.append(f"{label:<40} {summary['count']:>7} {summary['seconds']:>9.3f} "
+                     f"{summary['seconds'] / summary['count'] * 1000:>9.1f} {growth:>9}")
+    for name, value in _counters.items():
+        lines.append(f"{name}: {value:g}" if isinstance(value, float) else f"{name}: {value}")
+    peak = get_peak_rss_mb()
+    if peak is not None:
+        lines.append(f"Peak RSS: {peak:.0f} MB")
+    return "\n".join(lines)
+
+def report_metrics():
+    """
+    Finish the metrics of this run: print the summary table, or write the
+    counters to the JSON lines file and close it.
+    """
+    if _metrics_mode == "summary":
+        print("\nMetrics:")
+        print(format_metrics_summary())
+    elif _metrics_mode == "jsonl":
+        write_metrics_record({"type": "counters", "pid": os.getpid(), "time": time.time(),
+                              "peak_rss_mb": get_peak_rss_mb(), **get_counters()})
+        close_metrics_file()
+        print(f"Metrics written to: {_metrics_path}")
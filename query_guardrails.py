@@ -0,0 +1,264 @@
+import os
+import re
+import time
+import sqlite3
+
+# Rows returned by a query that has no LIMIT of its own (0 disables the default LIMIT)
+DEFAULT_ROW_LIMIT = int(os.getenv("DEFAULT_ROW_LIMIT", "10000"))
+# Wall-clock seconds a query may spend executing before it is interrupted
+QUERY_TIMEOUT_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "30"))
+# Queries whose nested full scans would visit more row combinations than this are rejected
+MAX_SCAN_COMBINATIONS = int(os.getenv("MAX_SCAN_COMBINATIONS", "10000000"))
+# Number of SQLite virtual machine steps between timeout checks
+PROGRESS_CHECK_STEPS = 10000
+
+SQL_KEYWORDS = {
+    'where', 'on', 'join', 'inner', 'left', 'right', 'full', 'cross', 'natural', 'outer', 'group',
+    'order', 'limit', 'having', 'using', 'union', 'except', 'intersect', 'window', 'as',
+}
+# A table name with an optional alias, as written after FROM, JOIN or a comma in a FROM list
+TABLE_ITEM = r'"?(\w+)"?(?:\s+(?:AS\s+)?"?(\w+)"?)?'
+TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN)\s+' + TABLE_ITEM, re.IGNORECASE)
+# Keywords that end a FROM clause, for splitting comma-separated table lists
+FROM_CLAUSE_END = re.compile(r'\b(?:WHERE|GROUP|ORDER|LIMIT|HAVING|WINDOW|UNION|EXCEPT|INTERSECT)\b', re.IGNORECASE)
+FROM_KEYWORD = re.compile(r'\bFROM\b', re.IGNORECASE)
+FROM_LIST_ITEM = re.compile(r'\s*' + TABLE_ITEM, re.IGNORECASE)
+TRAILING_LIMIT = re.compile(r'\bLIMIT\s+\d+(\s*(,|OFFSET)\s*\d+)?\s*$', re.IGNORECASE)
+ORDER_BY_KEYWORD = re.compile(r'\bORDER\s+BY\b', re.IGNORECASE)
+LIMIT_KEYWORD = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+
+def get_from_list_items(sql_query):
+    """
+    Split every FROM clause of a query at its top-level commas.
+
+    Brackets are skipped over, so commas inside ON conditions and subqueries
+    do not split a clause, and a closing bracket ends a subquery's clause.
+
+    Returns:
+        list of str: The text of each item after the first in each FROM list.
+    """
+    items = []
+    for match in FROM_KEYWORD.finditer(sql_query):
+        depth = 0
+        clause_items = []
+        item_start = position = match.end()
+        while position < len(sql_query):
+            char = sql_query[position]
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                if depth == 0:
+                    break
+                depth -= 1
+            elif depth == 0 and (char == ';' or FROM_CLAUSE_END.match(sql_query, position)):
+                break
+            elif depth == 0 and char == ',':
+                clause_items.append(sql_query[item_start:position])
+                item_start = position + 1
+            position += 1
+        clause_items.append(sql_query[item_start:position])
+        items.extend(clause_items[1:])
+    return items
+
+def get_final_order_and_limit(sql_query):
+    """
+    Find the ORDER BY and LIMIT clauses that apply to a query's whole result.
+
+    Only clauses outside brackets count, so the ORDER BY of a window function
+    or subquery is ignored. String literals and quoted names are skipped.
+
+    Returns:
+        tuple: (text of the ORDER BY terms, text of the LIMIT clause), each None when missing.
+    """
+    sql_query = sql_query.strip().rstrip(';').rstrip()
+    depth = 0
+    order_start = limit_start = None
+    position = 0
+    while position < len(sql_query):
+        char = sql_query[position]
+        if char in ('"', "'"):
+            closing = sql_query.find(char, position + 1)
+            position = len(sql_query) if closing < 0 else closing + 1
+            continue
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0 and ORDER_BY_KEYWORD.match(sql_query, position):
+            order_start, limit_start = ORDER_BY_KEYWORD.match(sql_query, position).end(), None
+        elif depth == 0 and LIMIT_KEYWORD.match(sql_query, position):
+            limit_start = position
+        position += 1
+
+    limit = sql_query[limit_start:].strip() if limit_start is not None else None
+    order_by = None
+    if order_start is not None:
+        order_by = sql_query[order_start:limit_start].strip()
+    return order_by, limit
+
+def get_table_aliases(sql_query):
+    """
+    Map the aliases used in a query's FROM and JOIN clauses to table names,
+    including comma-separated FROM lists such as "FROM TASK t, TASKPRED p".
+
+    Parameters:
+        sql_query (str): The SQL query.
+
+    Returns:
+        dict: Table name keyed by alias (each table also maps to itself).
+    """
+    references = TABLE_REFERENCE.findall(sql_query)
+    for item in get_from_list_items(sql_query):
+        match = FROM_LIST_ITEM.match(item)
+        if match:
+            references.append(match.groups())
+
+    aliases = {}
+    for table_name, alias in references:
+        aliases[table_name] = table_name
+        if alias and alias.lower() not in SQL_KEYWORDS:
+            aliases[alias] = table_name
+    return aliases
+
+def estimate_table_rows(conn, table_name, cache):
+    """
+    Estimate the number of rows in a table.
+
+    Uses sqlite_stat1, which every import fills by running ANALYZE, and
+    counts the rows of tables it does not cover. MAX(rowid) is no substitute:
+    with an INTEGER PRIMARY KEY it is the largest key, not the row count.
+
+    Returns:
+        int: Estimated row count, or 0 if the table is unknown.
+    """
+    if table_name in cache:
+        return cache[table_name]
+    rows = 0
+    try:
+        stat = conn.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table_name,)).fetchone()
+        if stat:
+            rows = int(stat[0].split()[0])
+    except sqlite3.Error:
+        pass
+    if not rows:
+        try:
+            rows = conn.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+        except sqlite3.Error:
+            rows = 0
+    cache[table_name] = rows
+    return rows
+
+def check_query_plan(conn, sql_query, max_combinations=MAX_SCAN_COMBINATIONS):
+    """
+    Inspect EXPLAIN QUERY PLAN for nested full table scans, the signature of a cartesian join.
+
+    Tables in the same join are listed as sibling steps of the plan. A step
+    that SCANs a table visits every row for each row of the steps before it,
+    while a SEARCH uses an index. Two or more scans in one join produce a
+    warning, and the query is rejected when the product of their row counts
+    exceeds max_combinations.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to the queried database.
+        sql_query (str): The SQL query.
+        max_combinations (int): Largest number of scanned row combinations allowed.
+
+    Returns:
+        list of str: Warnings about the plan.
+
+    Raises:
+        RuntimeError: If the query would scan too many row combinations.
+    """
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql_query}").fetchall()
+    aliases = get_table_aliases(sql_query)
+    row_cache = {}
+
+    scans_by_parent = {}
+    for _, parent, _, detail in plan:
+        match = re.match(r'SCAN (\w+)', detail)
+        if match and 'CONSTANT ROW' not in detail:
+            table_name = aliases.get(match.group(1), match.group(1))
+            scans_by_parent.setdefault(parent, []).append(table_name)
+
+    warnings = []
+    for scanned_tables in scans_by_parent.values():
+        if len(scanned_tables) < 2:
+            continue
+        combinations = 1
+        for table_name in scanned_tables:
+            combinations *= max(estimate_table_rows(conn, table_name, row_cache), 1)
+        description = " x ".join(scanned_tables)
+        if combinations > max_combinations:
+            raise RuntimeError(
+                f"Query rejected: nested full scans of {description} would visit about "
+                f"{combinations:,} row combinations. Join the tables on their key columns."
+            )
+        warnings.append(f"Query plan scans {description} in nested loops (about {combinations:,} row combinations).")
+    return warnings
+
+def apply_default_limit(sql_query, row_limit=DEFAULT_ROW_LIMIT):
+    """
+    Add a LIMIT to a SELECT that does not end with one.
+
+    Parameters:
+        sql_query (str): The SQL query.
+        row_limit (int): Maximum number of rows; 0 or None leaves the query unchanged.
+
+    Returns:
+        str: The query with a LIMIT clause.
+    """
+    sql_query = sql_query.strip().rstrip(';').rstrip()
+    if not row_limit or not re.match(r'(SELECT|WITH)\b', sql_query, re.IGNORECASE):
+        return sql_query
+    if TRAILING_LIMIT.search(sql_query):
+        return sql_query
+    return f"{sql_query}\nLIMIT {int(row_limit)}"
+
+def start_query_timer(conn, timeout=QUERY_TIMEOUT_SECONDS):
+    """
+    Interrupt queries on a connection once they have executed for longer than timeout.
+
+    Only time spent inside SQLite counts, so a paged result that waits for the
+    user between fetches is not interrupted. Call resume_query_timer before and
+    pause_query_timer after each stretch of execution.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to guard.
+        timeout (float): Execution budget in seconds; 0 or None disables the timer.
+
+    Returns:
+        dict: Timer state for resume_query_timer, pause_query_timer and stop_query_timer.
+    """
+    timer = {"remaining": timeout, "deadline": None}
+    if not timeout:
+        return timer
+
+    def check_deadline():
+        # A non-zero return value makes SQLite abort the statement
+        deadline = timer["deadline"]
+        return 1 if deadline is not None and time.monotonic() > deadline else 0
+
+    conn.set_progress_handler(check_deadline, PROGRESS_CHECK_STEPS)
+    return timer
+
+def resume_query_timer(timer):
+    """
+    Start counting execution time against the timer's remaining budget.
+    """
+    if timer["remaining"]:
+        timer["deadline"] = time.monotonic() + timer["remaining"]
+
+def pause_query_timer(timer):
+    """
+    Stop counting execution time, keeping what is left of the budget.
+    """
+    if timer["deadline"] is not None:
+        timer["remaining"] = max(timer["deadline"] - time.monotonic(), 0.001)
+        timer["deadline"] = None
+
+def stop_query_timer(conn, timer):
+    """
+    Remove the timeout from a connection.
+    """
+    timer["deadline"] = None
+    conn.set_progress_handler(None, 0)
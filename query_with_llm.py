@@ -1,7 +1,125 @@
 import os
+import re
+import csv
 import sqlite3
+import argparse
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
 from dotenv import load_dotenv
+from schema_retrieval import rank_schema
+from db_connections import get_connection, release_connection, close_connections
+from snapshot_store import STORE_FILE_NAME
+from work_calendar import CALENDAR_WORKTIME_TABLE
+from schedule_network import NETWORK_TABLES
+from schedule_hierarchy import HIERARCHY_TABLES
+from schedule_rollups import ROLLUP_TABLES
+from pipeline_metrics import (METRICS_MODES, DEFAULT_METRICS_FILE, add_count, configure_metrics, report_metrics,
+                              timed_stage)
+from query_guardrails import (DEFAULT_ROW_LIMIT, QUERY_TIMEOUT_SECONDS, check_query_plan, apply_default_limit,
+                              get_final_order_and_limit,
+                              start_query_timer, resume_query_timer, pause_query_timer, stop_query_timer)
+from sql_templates import match_sql_template, is_valid_sql
+from sql_cache import (CACHE_DIR_NAME, CACHE_FILE_NAME, get_schema_fingerprint, open_sql_cache, get_cache_key,
+                       lookup_sql, store_sql, invalidate_sql, get_cache_stats)
+
+OPENAI_MODEL = "gpt-4o"
+
+# Approximate size of the schema section of the prompt, in tokens
+SCHEMA_TOKEN_BUDGET = int(os.getenv("SCHEMA_TOKEN_BUDGET", "6000"))
+# Sample values longer than this (e.g. HTML descriptions) are cut short
+MAX_SAMPLE_VALUE_CHARS = 60
+CHARS_PER_TOKEN = 4
+# Number of tables picked for a question before foreign-key expansion (0 sends every table)
+SCHEMA_TOP_K = int(os.getenv("SCHEMA_TOP_K", "6"))
+
+# Rows shown per page of results, and rows fetched from SQLite at a time
+RESULT_PAGE_SIZE = int(os.getenv("RESULT_PAGE_SIZE", "50"))
+FETCH_BATCH_SIZE = 1000
+
+# Threads running a federated query, one database at a time each
+FEDERATED_WORKERS = int(os.getenv("FEDERATED_WORKERS", "8"))
+# Column added to federated results naming the database each row came from
+SOURCE_COLUMN = "source_project"
+# Told to the model in federated mode, where one SQL query runs on every project database
+FEDERATED_PROMPT = f"""
+    Federated mode: the query runs separately on each project's database and the result rows are merged, with a
+    {SOURCE_COLUMN} column added in front. Write the query for a single project and do not select {SOURCE_COLUMN}.
+    Aggregates are computed per project. ORDER BY and LIMIT are re-applied to the merged rows only when every ORDER
+    BY term is a selected column, so select the columns you order by.
+    """
+# Prompt notes on the tables derived at import and in the snapshot store, each sent only
+# when schema retrieval picks one of its tables
+SCHEMA_TABLE_LINE = re.compile(r'^Table: (\S+)$', re.MULTILINE)
+DERIVED_TABLE_NOTES = (
+    (('TASK',) + NETWORK_TABLES, """
+    Float and criticality come from P6: use TASK."total_float_hr_cnt" and TASK."free_float_hr_cnt" (hours;
+    critical means total_float_hr_cnt <= 0) and TASK."driving_path_flag". Do not take float from the CPM tables.
+    """),
+    (NETWORK_TABLES, """
+    - CPM_TASK: A logic-only network pass over TASKPRED and remaining durations, in working hours from the data
+      date. It ignores constraints, actual dates and calendars, so its float can differ from P6. Use it for network
+      structure: topo_level, pred_count and succ_count (open ends), driving_pred_task_id; join on task_id
+    - CPM_RELATIONSHIP: TASKPRED with relationship free float and driving_flag under that logic-only pass
+    - CPM_CRITICAL_PATH: The longest chain of logic in schedule order (path_seq)
+    Prefer the CPM tables over recursive queries on TASKPRED for predecessor chain and driving logic questions.
+    To turn CPM_TASK hours into dates use add_work_hours("TASK"."clndr_id", "PROJECT"."last_recalc_date", hours).
+    """),
+    (HIERARCHY_TABLES, """
+    WBS and OBS hierarchy indexes (use them instead of recursive queries on parent_wbs_id or parent_obs_id):
+    - WBS_CLOSURE: (ancestor_wbs_id, wbs_id, depth) for every WBS node and each of its ancestors, itself at depth 0;
+      "under WBS X" is JOIN "WBS_CLOSURE" c ON c."wbs_id" = "TASK"."wbs_id" WHERE c."ancestor_wbs_id" = X
+    - WBS_TREE: wbs_id, parent_wbs_id, depth (0 at the project node), lft, rgt and wbs_path (short names joined
+      by '.'); the nodes under X, X included, are those with "lft" BETWEEN X."lft" AND X."rgt"
+    - OBS_CLOSURE and OBS_TREE: the same for the OBS (ancestor_obs_id, obs_id; obs_path joins obs_name by ' / ');
+      PROJWBS."obs_id" is the responsible manager of a WBS node
+    """),
+    (ROLLUP_TABLES, """
+    Precomputed rollups (units are resource units, usually hours; costs include expenses from PROJCOST):
+    - WBS_ROLLUP: per WBS node including everything below it: task_count, complete/active/not_started_task_count,
+      target_drtn_hr_cnt, remain_drtn_hr_cnt, min_total_float_hr_cnt, start_date, end_date,
+      target_qty, act_qty, remain_qty, target_cost, act_cost, remain_cost
+    - ACTVCODE_ROLLUP: the same measures per activity code value (actv_code_id), e.g. per responsible company
+    - RSRC_ROLLUP: per resource: assignment_count, task_count, start_date, end_date, quantities and costs
+    - RSRC_HISTOGRAM: per resource and period (period_type 'week' or 'month', period_start_date) the planned
+      (target_qty) and remaining (remain_qty) units spread evenly over the assignment dates
+    Prefer these over GROUP BY on TASK, TASKRSRC and PROJCOST.
+    """),
+    (('CALENDAR',), """
+    Calendar functions (clndr_id from TASK, PROJECT or RSRC; dates as 'YYYY-MM-DD HH:MM'):
+    - work_hours_between(clndr_id, start, finish), work_days_between(clndr_id, start, finish)
+    - add_work_hours(clndr_id, start, hours), add_work_days(clndr_id, start, days)
+    - is_work_day(clndr_id, date) returns 1 or 0
+    Use them for working-time questions instead of julianday() arithmetic.
+    """),
+    (('SNAPSHOT', 'ACTIVITY_DELTA'), """
+    In the snapshot store (snapshot_store.db):
+    - SNAPSHOT: One row per weekly update, in data_date order
+    - ACTIVITY_DELTA: Activities added, removed or changed since the previous snapshot, with start/end
+      slip in days and float change in hours; use it for slippage and "since last update" questions
+    - Other tables hold row versions; a row belongs to snapshot S when
+      "first_snapshot_id" <= S AND "last_snapshot_id" >= S
+    """),
+)
+# Trailing LIMIT of a query, as count, "offset, count" or "count OFFSET offset"
+LIMIT_CLAUSE = re.compile(r'LIMIT\s+(\d+)(?:\s*(,|OFFSET)\s*(\d+))?$', re.IGNORECASE)
+ORDER_TERM = re.compile(r'^(.+?)(?:\s+COLLATE\s+\w+)?(?:\s+(ASC|DESC))?(?:\s+NULLS\s+(FIRST|LAST))?$',
+                        re.IGNORECASE | re.DOTALL)
+
+# Generated SQL is reused for repeated questions (SQL_CACHE_MAX_ENTRIES=0 disables the cache)
+SQL_CACHE_TTL_DAYS = float(os.getenv("SQL_CACHE_TTL_DAYS", "30"))
+SQL_CACHE_MAX_ENTRIES = int(os.getenv("SQL_CACHE_MAX_ENTRIES", "5000"))
+
+# Common questions are answered from SQL templates without the LLM (SQL_TEMPLATES=0 always asks the LLM)
+SQL_TEMPLATES_ENABLED = os.getenv("SQL_TEMPLATES", "1") != "0"
+
+# Sampling options of every NL to SQL request
+LLM_REQUEST_OPTIONS = {"temperature": 0.1, "max_tokens": 300, "top_p": 0.95}
+
+# Table metadata and formatted contexts per database path, invalidated by modification time
+_schema_cache = {}
+# Connection to the persistent SQL cache, opened on first use
+_sql_cache_conn = None
 
 def load_api_key():
     """
@@ -13,12 +131,91 @@ def load_api_key():
         raise ValueError("OPENAI_API_KEY not found in .env file.")
     return api_key
 
-def get_sql_query(client, user_prompt, db_path):
+def get_sql_cache():
     """
-    Use OpenAI's GPT model to convert a natural language prompt into an SQL query.
+    Get the connection to the persistent SQL cache, or None if it is disabled.
+    """
+    global _sql_cache_conn
+    if SQL_CACHE_MAX_ENTRIES <= 0:
+        return None
+    if _sql_cache_conn is None:
+        _sql_cache_conn = open_sql_cache(os.path.join(os.getcwd(), CACHE_DIR_NAME, CACHE_FILE_NAME))
+    return _sql_cache_conn
+
+def get_sql_cache_key(user_prompt, db_path, federated=False):
     """
-    # Get schema with sample data for better context
-    schema_context = get_database_schema_with_samples(db_path)
+    Get the SQL cache key of a question for the current schema of a database.
+    
+    Federated SQL is generated with a different prompt, so it is cached apart.
+    """
+    model = f"{OPENAI_MODEL} federated" if federated else OPENAI_MODEL
+    return get_cache_key(user_prompt, get_cached_schema_entry(db_path)["fingerprint"], model)
+
+def forget_cached_sql(user_prompt, db_path, federated=False):
+    """
+    Drop the cached SQL of a question, e.g. after it failed to execute.
+    """
+    sql_cache = get_sql_cache()
+    if sql_cache:
+        invalidate_sql(sql_cache, get_sql_cache_key(user_prompt, db_path, federated))
+
+def get_template_sql(user_prompt, db_path):
+    """
+    Answer a common question from the SQL templates, without the LLM.
+    
+    Returns:
+        str: The SQL, or None when no template answers the question or templates are disabled.
+    """
+    if not SQL_TEMPLATES_ENABLED:
+        return None
+    with timed_stage("sql_template"):
+        matched = match_sql_template(user_prompt, get_connection(db_path))
+    if not matched:
+        return None
+    add_count("sql_template_hits")
+    print(f"Answered from the '{matched[0]}' SQL template.")
+    return matched[1]
+
+def lookup_cached_sql(user_prompt, db_path, federated=False):
+    """
+    Get the cached SQL of a question against the current schema of a database.
+    
+    Returns:
+        str: The cached SQL, or None when it is not cached or the cache is disabled.
+    """
+    sql_cache = get_sql_cache()
+    if not sql_cache:
+        return None
+    with timed_stage("sql_cache"):
+        cached_sql = lookup_sql(sql_cache, get_sql_cache_key(user_prompt, db_path, federated), SQL_CACHE_TTL_DAYS)
+    add_count("sql_cache_hits" if cached_sql else "sql_cache_misses")
+    if cached_sql:
+        print("Using cached SQL for this question.")
+    return cached_sql
+
+def cache_generated_sql(user_prompt, db_path, sql_query, federated=False):
+    """
+    Store newly generated SQL in the SQL cache, if it is enabled.
+    """
+    sql_cache = get_sql_cache()
+    if sql_cache:
+        store_sql(sql_cache, get_sql_cache_key(user_prompt, db_path, federated), user_prompt, sql_query, SQL_CACHE_MAX_ENTRIES)
+
+def build_sql_messages(user_prompt, db_path, federated=False):
+    """
+    Build the chat messages asking the model to turn a question into SQL.
+    
+    Parameters:
+        user_prompt (str): The user's question.
+        db_path (str): Path to the SQLite database the question is about.
+        federated (bool): The SQL will run on every project database (see FEDERATED_PROMPT).
+        
+    Returns:
+        list of dict: System and user messages for the chat completions API.
+    """
+    # Get the schema relevant to the question, with sample data for better context
+    with timed_stage("schema"):
+        schema_context = get_cached_schema_context(db_path, question=user_prompt)
     
     system_prompt = """You are an expert SQL query generator specialized in Primavera P6 XER databases.
     Your task is to convert natural language questions into accurate SQL queries.
@@ -30,6 +227,7 @@ def get_sql_query(client, user_prompt, db_path):
     4. Never use MySQL-specific or other database-specific functions
     5. Ensure all quotes are straight quotes, not smart quotes
     6. Do not include any natural language text in the response
+    7. DATETIME columns hold 'YYYY-MM-DD HH:MM' text; compare them with literals in that format
     
     Common tables and their relationships:
     - TASK: Contains task/activity information
@@ -37,6 +235,13 @@ def get_sql_query(client, user_prompt, db_path):
     - ACTVCODE: Activity codes
     - TASKPRED: Task predecessors/relationships
     """
+    # Notes on the derived tables, only for the tables that made it into the schema
+    schema_tables = set(SCHEMA_TABLE_LINE.findall(schema_context))
+    for tables, note in DERIVED_TABLE_NOTES:
+        if schema_tables.intersection(tables):
+            system_prompt += note
+    if federated:
+        system_prompt += FEDERATED_PROMPT
 
     user_prompt_template = f"""Database Schema and Sample Data:
 {schema_context}
@@ -48,25 +253,51 @@ Example valid queries:
 User Question: {user_prompt}
 
 Return only the SQL query without any other text:"""
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt_template}
+    ]
 
+def read_sql_response(response):
+    """
+    Take the SQL out of a chat completion, counting the tokens it used.
+    
+    Raises:
+        ValueError: If the reply is not a SELECT query.
+    """
+    add_count("llm_calls")
+    if getattr(response, "usage", None):
+        add_count("llm_prompt_tokens", response.usage.prompt_tokens)
+        add_count("llm_completion_tokens", response.usage.completion_tokens)
+    
+    sql_query = response.choices[0].message.content.strip()
+    
+    # Basic validation
+    if not sql_query.upper().startswith('SELECT'):
+        raise ValueError("Generated query must start with SELECT")
+    return sql_query
+
+def get_sql_query(client, user_prompt, db_path, federated=False):
+    """
+    Use OpenAI's GPT model to convert a natural language prompt into an SQL query.
+    
+    Common questions are answered from the SQL templates and questions already
+    answered against the same schema are served from the SQL cache; only the
+    rest need the model. Without a client (no API key) only those can be answered.
+    With federated, the model is told the SQL runs on every project database.
+    """
+    sql_query = get_template_sql(user_prompt, db_path) or lookup_cached_sql(user_prompt, db_path, federated)
+    if sql_query:
+        return sql_query
+    if client is None:
+        raise RuntimeError("No SQL template matches this question and no OPENAI_API_KEY is set to ask the model.")
+    
+    messages = build_sql_messages(user_prompt, db_path, federated)
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",  # Fixed model name
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt_template}
-            ],
-            temperature=0.1,
-            max_tokens=300,
-            top_p=0.95
-        )
-        
-        sql_query = response.choices[0].message.content.strip()
-        
-        # Basic validation
-        if not sql_query.upper().startswith('SELECT'):
-            raise ValueError("Generated query must start with SELECT")
-            
+        with timed_stage("llm", model=OPENAI_MODEL):
+            response = client.chat.completions.create(model=OPENAI_MODEL, messages=messages, **LLM_REQUEST_OPTIONS)
+        sql_query = read_sql_response(response)
+        cache_generated_sql(user_prompt, db_path, sql_query, federated)
         return sql_query
         
     except Exception as e:
@@ -121,10 +352,9 @@ def get_database_schema(db_path):
     Returns:
         str: The database schema as a string.
     """
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    cursor = get_connection(db_path).cursor()
     
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
     tables = cursor.fetchall()
     
     schema = ""
@@ -139,38 +369,119 @@ def get_database_schema(db_path):
         schema += "\n"
     
     cursor.close()
-    conn.close()
     return schema
 
-def execute_sql_query(sql_query, db_path):
+def describe_sqlite_error(e, sql_query, timeout):
     """
-    Execute the given SQL query against the SQLite database and return the results.
+    Turn a SQLite error into the RuntimeError shown to the user.
     """
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    if isinstance(e, sqlite3.OperationalError) and 'interrupted' in str(e):
+        return RuntimeError(f"Query exceeded the {timeout:g} second time limit and was interrupted.\nQuery: {sql_query}")
+    return RuntimeError(f"SQLite error: {e}\nQuery: {sql_query}")
+
+def iter_query_rows(conn, cursor, sql_query, timer, batch_size=FETCH_BATCH_SIZE):
+    """
+    Yield the rows of an executed query, fetching them from the cursor in batches.
     
+    Only the time spent fetching counts against the query's time limit. The
+    cursor is closed and the limit removed when the rows are exhausted or the
+    generator is closed.
+    """
     try:
-        # Print the exact query for debugging
-        print("Executing SQL Query:", sql_query)
+        while True:
+            resume_query_timer(timer)
+            with timed_stage("sql_fetch"):
+                rows = cursor.fetchmany(batch_size)
+            pause_query_timer(timer)
+            if not rows:
+                break
+            add_count("rows_fetched", len(rows))
+            yield from rows
+    except sqlite3.Error as e:
+        raise describe_sqlite_error(e, sql_query, QUERY_TIMEOUT_SECONDS)
+    finally:
+        stop_query_timer(conn, timer)
+        cursor.close()
+
+def stream_sql_query(sql_query, db_path, batch_size=FETCH_BATCH_SIZE, row_limit=DEFAULT_ROW_LIMIT,
+                     timeout=QUERY_TIMEOUT_SECONDS, echo=True):
+    """
+    Execute the given SQL query and return its rows as a generator instead of a list.
+    
+    The session's read-only connection is reused, so write statements are rejected.
+    Before running, the query plan is checked for cartesian full-scan joins and a
+    LIMIT is added if the query has none; execution is interrupted after timeout.
+    
+    Parameters:
+        sql_query (str): The SQL query to run.
+        db_path (str): Path to the SQLite database.
+        batch_size (int): Number of rows fetched from SQLite at a time.
+        row_limit (int): LIMIT added to queries without one (0 or None for no limit).
+        timeout (float): Seconds the query may execute (0 or None for no limit).
+        echo (bool): Print the query before running it.
         
+    Returns:
+        tuple: (list of column names, generator of result rows)
+    """
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+    timer = None
+    
+    try:
         # Remove any smart quotes or special characters
         sql_query = sql_query.replace('"', '"').replace('"', '"').replace("'", "'")
         
-        cursor.execute(sql_query)
-        try:
-            results = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            return columns, results
-        except sqlite3.ProgrammingError:
-            conn.commit()
-            return [], []
+        # Reject runaway joins and cap the number of rows
+        with timed_stage("sql_plan"):
+            for warning in check_query_plan(conn, sql_query):
+                print(f"Warning: {warning}")
+            sql_query = apply_default_limit(sql_query, row_limit)
+        
+        # Print the exact query for debugging
+        if echo:
+            print("Executing SQL Query:", sql_query)
+        
+        timer = start_query_timer(conn, timeout)
+        resume_query_timer(timer)
+        with timed_stage("sql_execute"):
+            cursor.execute(sql_query)
+        pause_query_timer(timer)
     except sqlite3.Error as e:
+        if timer is not None:
+            stop_query_timer(conn, timer)
+        cursor.close()
         # More detailed error message
         print(f"Original query that caused error: {sql_query}")
-        raise RuntimeError(f"SQLite error: {e}\nQuery: {sql_query}")
-    finally:
+        raise describe_sqlite_error(e, sql_query, timeout)
+    except RuntimeError:
+        cursor.close()
+        raise
+    
+    if cursor.description is None:
+        stop_query_timer(conn, timer)
         cursor.close()
-        conn.close()
+        return [], iter(())
+    columns = [description[0] for description in cursor.description]
+    return columns, iter_query_rows(conn, cursor, sql_query, timer, batch_size)
+
+def execute_sql_query(sql_query, db_path):
+    """
+    Execute the given SQL query against the SQLite database and return the results.
+    """
+    columns, rows = stream_sql_query(sql_query, db_path)
+    return columns, list(rows)
+
+def format_rows(rows):
+    """
+    Format result rows as lines of the results table.
+    """
+    return "\n".join([" | ".join([str(item) for item in row]) for row in rows])
+
+def format_header(columns):
+    """
+    Format the column names and separator line of the results table.
+    """
+    return " | ".join(columns) + "\n" + "-+-".join(['---'] * len(columns))
 
 def format_results(columns, results):
     """
@@ -187,31 +498,486 @@ def format_results(columns, results):
         return "No results found or the query did not return any data."
     
     # Create a simple table format
-    formatted = ""
-    # Header
-    formatted += " | ".join(columns) + "\n"
-    formatted += "-+-".join(['---'] * len(columns)) + "\n"
-    # Rows
-    for row in results:
-        formatted += " | ".join([str(item) for item in row]) + "\n"
+    return format_header(columns) + "\n" + format_rows(results) + "\n"
+
+def export_query_results(sql_query, db_path, output_path, batch_size=FETCH_BATCH_SIZE):
+    """
+    Stream the full result of a query to a CSV or Parquet file without holding it in memory.
     
-    return formatted
+    Parameters:
+        sql_query (str): The SQL query to run.
+        db_path (str): Path to the SQLite database.
+        output_path (str): Destination file; ``.parquet`` writes Parquet, anything else CSV.
+        batch_size (int): Number of rows written at a time.
+        
+    Returns:
+        int: Number of rows written.
+    """
+    # Exports are meant to hold the full result, so no default LIMIT is added
+    columns, rows = stream_sql_query(sql_query, db_path, batch_size, row_limit=None)
+    return write_result_file(columns, rows, output_path, batch_size)
 
-def get_database_schema_with_samples(db_path):
+def write_result_file(columns, rows, output_path, batch_size=FETCH_BATCH_SIZE):
     """
-    Get database schema with sample data for better context.
+    Write result rows to a CSV or Parquet file as they are read.
+    
+    Parameters:
+        columns (list of str): The column names.
+        rows (generator): Result rows; closed when done.
+        output_path (str): Destination file; ``.parquet`` writes Parquet, anything else CSV.
+        batch_size (int): Number of rows written at a time.
+        
+    Returns:
+        int: Number of rows written.
     """
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    row_count = 0
+    if output_path.lower().endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            rows.close()
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow).")
+        
+        writer = None
+        try:
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                data = {col: [row[i] for row in batch] for i, col in enumerate(columns)}
+                if writer is None:
+                    table = pa.Table.from_pydict(data)
+                    # Columns that are all NULL in the first batch are written as text
+                    schema = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                                        for f in table.schema])
+                    writer = pq.ParquetWriter(output_path, schema)
+                writer.write_table(pa.Table.from_pydict(data, schema=schema))
+                row_count += len(batch)
+            if writer is None:
+                pq.write_table(pa.table({col: pa.array([], pa.string()) for col in columns}), output_path)
+        finally:
+            rows.close()
+            if writer is not None:
+                writer.close()
+    else:
+        with open(output_path, 'w', newline='', encoding='utf-8') as f:
+            csv_writer = csv.writer(f)
+            csv_writer.writerow(columns)
+            for row in rows:
+                csv_writer.writerow(row)
+                row_count += 1
     
-    schema = []
+    print(f"Exported {row_count} rows to: {output_path}")
+    return row_count
+
+def display_results_paged(columns, rows, sql_query, db_path, page_size=RESULT_PAGE_SIZE, export_results=None):
+    """
+    Print query results one page at a time, asking before showing more.
     
-    # Get all tables
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = cursor.fetchall()
+    At the prompt, Enter shows the next page, 'q' stops, and a file path
+    ending in .csv or .parquet exports the full result to that file.
     
-    for table in tables:
-        table_name = table[0]
+    Parameters:
+        columns (list of str): The column names.
+        rows (iterator): Result rows, e.g. from stream_sql_query.
+        sql_query (str): The query, re-run when exporting.
+        db_path (str): Path to the SQLite database.
+        page_size (int): Number of rows per page.
+        export_results (callable): Writes the full result to the given path; by default
+            the query is re-run on db_path with export_query_results.
+    """
+    try:
+        page = list(islice(rows, page_size))
+        if not page:
+            print("Query Results:\nNo results found or the query did not return any data.\n")
+            return
+        
+        print(f"Query Results:\n{format_header(columns)}")
+        shown = 0
+        while page:
+            print(format_rows(page))
+            shown += len(page)
+            page = list(islice(rows, page_size))
+            if not page:
+                break
+            answer = input(f"-- {shown} rows shown. Enter for more, 'q' to stop, "
+                           f"or a .csv/.parquet path to save the full result: ").strip()
+            if answer.lower() in ('q', 'quit'):
+                break
+            if answer.lower().endswith(('.csv', '.parquet')):
+                if export_results:
+                    export_results(answer)
+                else:
+                    export_query_results(sql_query, db_path, answer)
+                break
+        print()
+    finally:
+        rows.close()
+
+def get_source_project(db_path):
+    """
+    Name the project a database holds, from its file name (e.g. project1_database.db → project1).
+    """
+    name = os.path.basename(db_path)
+    return name[:-len("_database.db")] if name.endswith("_database.db") else os.path.splitext(name)[0]
+
+def get_federated_databases():
+    """
+    Get every database in the Database directory for a federated query.
+    
+    The snapshot store is left out, since it holds copies of the imported databases.
+    
+    Returns:
+        list of str: Full paths to the databases, sorted by name.
+    """
+    return [os.path.join(os.getcwd(), "Database", name) for name in sorted(get_available_databases())
+            if name != STORE_FILE_NAME]
+
+def pick_schema_database(db_paths):
+    """
+    Pick the database whose schema the SQL of a federated question is generated against.
+    
+    The database with the most tables is used, so XER imports win over PDF imports.
+    """
+    def count_tables(db_path):
+        try:
+            conn = get_connection(db_path)
+            return conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'").fetchone()[0]
+        except sqlite3.Error:
+            return -1
+        finally:
+            release_connection(db_path)
+    return max(db_paths, key=count_tables)
+
+def query_one_database(sql_query, db_path, row_limit=DEFAULT_ROW_LIMIT):
+    """
+    Run a federated query on one database, in a worker thread.
+    
+    The connection is closed afterwards so a query over hundreds of
+    databases does not keep them all open.
+    
+    Returns:
+        tuple: (list of column names, list of rows), or None when the SQL does
+        not compile against the database (e.g. a PDF import without TASKPRED).
+    """
+    try:
+        if not is_valid_sql(get_connection(db_path), sql_query):
+            return None
+        columns, rows = stream_sql_query(sql_query, db_path, row_limit=row_limit, echo=False)
+        try:
+            return columns, list(rows)
+        finally:
+            rows.close()
+    finally:
+        release_connection(db_path)
+
+def run_federated_query(sql_query, db_paths, row_limit=DEFAULT_ROW_LIMIT, workers=FEDERATED_WORKERS):
+    """
+    Run the same SQL on many databases at once and merge the results.
+    
+    The query is fanned out to a pool of threads, each with its own
+    read-only connection per database, rather than ATTACHed. SQLite attaches
+    at most 10 databases per connection by default, and attached tables
+    would need rewritten, schema-qualified SQL. The guardrails of
+    stream_sql_query (plan check, default LIMIT, time limit) apply to each
+    database.
+    
+    Parameters:
+        sql_query (str): The SQL query to run.
+        db_paths (list of str): Paths to the databases.
+        row_limit (int): LIMIT added per database to queries without one.
+        workers (int): Number of databases queried at the same time.
+        
+    Returns:
+        tuple: (column names starting with SOURCE_COLUMN, merged rows in database order,
+        dict of error messages keyed by project, list of projects the SQL does not apply to)
+    """
+    def run(db_path):
+        try:
+            return query_one_database(sql_query, db_path, row_limit), None
+        except (RuntimeError, sqlite3.Error) as e:
+            return None, str(e)
+    
+    columns = None
+    merged = []
+    errors = {}
+    skipped = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for db_path, (outcome, error) in zip(db_paths, executor.map(run, db_paths)):
+            source = get_source_project(db_path)
+            if error:
+                errors[source] = error
+            elif outcome is None:
+                skipped.append(source)
+            elif columns is not None and outcome[0] != columns:
+                errors[source] = "Result columns differ from the other databases: " + ", ".join(outcome[0])
+            else:
+                columns = outcome[0]
+                merged.extend((source,) + tuple(row) for row in outcome[1])
+    return ([SOURCE_COLUMN] + columns if columns else []), merged, errors, skipped
+
+def split_top_level_commas(text):
+    """
+    Split a list of SQL expressions at the commas outside brackets and quotes.
+    """
+    items = []
+    depth = 0
+    quote = None
+    item_start = 0
+    for position, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            items.append(text[item_start:position].strip())
+            item_start = position + 1
+    items.append(text[item_start:].strip())
+    return items
+
+def get_result_column_index(expression, columns):
+    """
+    Find the result column an ORDER BY term refers to, by position, name or alias.
+    
+    Returns:
+        int: Index into columns, or None when the term is not a selected column.
+    """
+    if expression.isdigit():
+        index = int(expression) - 1
+        return index if 0 <= index < len(columns) else None
+    names = [expression.lower()]
+    column_reference = re.match(r'^(?:"?\w+"?\.)?"?(\w+)"?$', expression)
+    if column_reference:
+        names.append(column_reference.group(1).lower())
+    lowered = [column.lower() for column in columns]
+    for name in names:
+        if name in lowered:
+            return lowered.index(name)
+    return None
+
+def get_federated_ordering(sql_query, columns):
+    """
+    Work out how to re-apply a query's ORDER BY and LIMIT to the merged rows of a federated query.
+    
+    Each database sorts and limits its own rows, so the first N rows of every
+    project hold the first N rows of the whole portfolio. Sorting the merged
+    rows again and cutting them to N gives the portfolio-wide answer, as long
+    as every ORDER BY term is a selected column and there is no OFFSET.
+    
+    Parameters:
+        sql_query (str): The federated SQL query.
+        columns (list of str): Result columns, without SOURCE_COLUMN.
+        
+    Returns:
+        tuple: (list of (row index, descending, nulls last) sort terms, row count or None),
+        or None when the ORDER BY and LIMIT only hold within each project.
+    """
+    order_by, limit = get_final_order_and_limit(sql_query)
+    terms = []
+    for term in split_top_level_commas(order_by) if order_by else []:
+        match = ORDER_TERM.match(term)
+        index = get_result_column_index(match.group(1).strip(), columns) if match else None
+        if index is None:
+            return None
+        descending = (match.group(2) or '').upper() == 'DESC'
+        # SQLite sorts NULL first in ascending and last in descending order
+        nulls_last = match.group(3).upper() == 'LAST' if match.group(3) else descending
+        # Merged rows start with the SOURCE_COLUMN value
+        terms.append((index + 1, descending, nulls_last))
+    
+    count = None
+    if limit:
+        match = LIMIT_CLAUSE.match(limit)
+        if not match:
+            return None
+        if match.group(2) == ',':
+            offset, count = int(match.group(1)), int(match.group(3))
+        else:
+            offset, count = int(match.group(3) or 0), int(match.group(1))
+        if offset:
+            return None
+    return terms, count
+
+def get_sort_value(value, null_rank):
+    """
+    Get the sort key of a value in SQLite's order: NULL, numbers, text, then blobs.
+    """
+    if value is None:
+        return (null_rank, 0, 0)
+    type_rank = 0 if isinstance(value, (int, float)) else 1 if isinstance(value, str) else 2
+    return (1, type_rank, value)
+
+def order_federated_rows(rows, ordering):
+    """
+    Sort and limit merged federated rows as ordered by get_federated_ordering.
+    
+    Parameters:
+        rows (iterable): Merged rows, each starting with the SOURCE_COLUMN value.
+        ordering (tuple): Sort terms and row count from get_federated_ordering.
+        
+    Returns:
+        generator: The rows in portfolio order, cut to the query's LIMIT.
+    """
+    terms, count = ordering
+    ordered = rows
+    try:
+        if terms:
+            ordered = list(rows)
+            # One stable sort per term, last term first
+            for index, descending, nulls_last in reversed(terms):
+                # reverse=True flips the NULL rank too
+                null_rank = 0 if nulls_last == descending else 2
+                ordered.sort(key=lambda row: get_sort_value(row[index], null_rank), reverse=descending)
+        yield from (ordered if count is None else islice(ordered, count))
+    finally:
+        # Release the connection of a streamed export cut short by the LIMIT
+        if hasattr(rows, "close"):
+            rows.close()
+
+def iter_federated_rows(sql_query, db_paths, columns, batch_size=FETCH_BATCH_SIZE):
+    """
+    Yield the full result of a federated query database by database, for exports.
+    
+    Databases the SQL does not apply to or whose columns differ are skipped.
+    """
+    for db_path in db_paths:
+        try:
+            if not is_valid_sql(get_connection(db_path), sql_query):
+                continue
+            db_columns, rows = stream_sql_query(sql_query, db_path, batch_size, row_limit=None, echo=False)
+            try:
+                if [SOURCE_COLUMN] + db_columns != columns:
+                    continue
+                source = get_source_project(db_path)
+                for row in rows:
+                    yield (source,) + tuple(row)
+            finally:
+                rows.close()
+        finally:
+            release_connection(db_path)
+
+def export_federated_results(sql_query, db_paths, columns, output_path, batch_size=FETCH_BATCH_SIZE):
+    """
+    Stream the full result of a federated query to a CSV or Parquet file.
+    
+    The query's ORDER BY and LIMIT are re-applied across projects where
+    get_federated_ordering allows it, which holds the rows in memory to sort them.
+    """
+    rows = iter_federated_rows(sql_query, db_paths, columns, batch_size)
+    ordering = get_federated_ordering(sql_query, columns[1:])
+    if ordering:
+        rows = order_federated_rows(rows, ordering)
+    return write_result_file(columns, rows, output_path, batch_size)
+
+def estimate_tokens(text):
+    """
+    Roughly estimate the number of tokens in a text.
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def truncate_sample_value(value):
+    """
+    Shorten long sample values so they do not dominate the prompt.
+    """
+    if isinstance(value, str):
+        value = " ".join("".join(ch for ch in value if ch.isprintable() or ch.isspace()).split())
+        if len(value) > MAX_SAMPLE_VALUE_CHARS:
+            return value[:MAX_SAMPLE_VALUE_CHARS] + "..."
+    return value
+
+def format_table_schema(table_name, columns, samples, shown_columns=None):
+    """
+    Format one table's columns and sample rows for the prompt.
+    
+    Parameters:
+        table_name (str): Table name.
+        columns (list of tuple): Rows of PRAGMA table_info.
+        samples (list of tuple): Sample rows to include.
+        shown_columns (list of str): Columns to describe in full; the others are
+            only listed by name. All columns are shown when None.
+        
+    Returns:
+        str: The formatted table block.
+    """
+    positions = [i for i, col in enumerate(columns) if shown_columns is None or col[1] in shown_columns]
+    schema = [f"Table: {table_name}", "Columns:"]
+    for i in positions:
+        col = columns[i]
+        key_note = ", primary key" if col[5] else ""
+        schema.append(f"  - {col[1]} ({col[2]}{key_note})")
+    if len(positions) < len(columns):
+        other_columns = [col[1] for i, col in enumerate(columns) if i not in positions]
+        schema.append(f"  Other columns: {', '.join(other_columns)}")
+    
+    if samples:
+        schema.append("Sample Data:")
+        column_names = [columns[i][1] for i in positions]
+        for sample in samples:
+            schema.append(f"  {dict(zip(column_names, [truncate_sample_value(sample[i]) for i in positions]))}")
+    schema.append("\n")
+    return "\n".join(schema)
+
+def build_schema_context(tables, token_budget=None, shown_columns=None):
+    """
+    Format table metadata into the schema context for the prompt.
+    
+    When a token budget is given, sample rows are reduced (3, then 1, then
+    none) and finally trailing tables are left out until the schema fits.
+    
+    Parameters:
+        tables (list of tuple): (table name, PRAGMA table_info rows, sample rows).
+        token_budget (int): Approximate maximum size of the schema in tokens
+        shown_columns (dict): Columns to describe in full, keyed by table name
+        
+    Returns:
+        str: The schema context for the prompt.
+    """
+    shown_columns = shown_columns or {}
+    for sample_count in (3, 1, 0):
+        blocks = [format_table_schema(name, columns, samples[:sample_count], shown_columns.get(name))
+                  for name, columns, samples in tables]
+        schema = "\n".join(blocks)
+        if token_budget is None or estimate_tokens(schema) <= token_budget:
+            return schema
+    
+    # Even without samples the schema is too large: keep as many tables as fit
+    kept = []
+    used = 0
+    for block in blocks:
+        used += estimate_tokens(block)
+        if used > token_budget:
+            break
+        kept.append(block)
+    kept.append(f"({len(blocks) - len(kept)} more tables omitted to fit the prompt)")
+    return "\n".join(kept)
+
+def get_table_metadata(db_path):
+    """
+    Read the columns and first 3 rows of every table in the database.
+    
+    Parameters:
+        db_path (str): Path to the SQLite database
+        
+    Returns:
+        list of tuple: (table name, PRAGMA table_info rows, sample rows) per table.
+    """
+    cursor = get_connection(db_path).cursor()
+    
+    tables = []
+    
+    # Get all tables (sqlite_stat1 and other internal tables are left out)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%';")
+    for (table_name,) in cursor.fetchall():
+        # Compiled calendars are only used through the calendar SQL functions
+        if table_name == CALENDAR_WORKTIME_TABLE:
+            continue
+        
         # Get column info
         cursor.execute(f"PRAGMA table_info('{table_name}');")
         columns = cursor.fetchall()
@@ -222,59 +988,193 @@ def get_database_schema_with_samples(db_path):
             samples = cursor.fetchall()
         except sqlite3.Error:
             samples = []
-            
-        # Format table information
-        schema.append(f"Table: {table_name}")
-        schema.append("Columns:")
-        for col in columns:
-            schema.append(f"  - {col[1]} ({col[2]})")
-            
-        if samples:
-            schema.append("Sample Data:")
-            for sample in samples:
-                schema.append(f"  {dict(zip([c[1] for c in columns], sample))}")
-        schema.append("\n")
+        tables.append((table_name, columns, samples))
     
     cursor.close()
-    conn.close()
+    return tables
+
+def get_database_schema_with_samples(db_path, token_budget=None):
+    """
+    Get database schema with sample data for better context.
     
-    return "\n".join(schema)
+    Parameters:
+        db_path (str): Path to the SQLite database
+        token_budget (int): Approximate maximum size of the schema in tokens
+        
+    Returns:
+        str: The schema context for the prompt.
+    """
+    return build_schema_context(get_table_metadata(db_path), token_budget)
+
+def get_cached_schema_entry(db_path):
+    """
+    Get the cached metadata of a database, reading it again only when the file changes.
+    
+    Returns:
+        dict: ``tables`` (see get_table_metadata), the schema ``fingerprint`` and
+        ``contexts``, the full schema contexts already built, keyed by token budget.
+    """
+    mtime = os.path.getmtime(db_path)
+    cached = _schema_cache.get(db_path)
+    if not cached or cached["mtime"] != mtime:
+        cached = {
+            "mtime": mtime,
+            "tables": get_table_metadata(db_path),
+            "fingerprint": get_schema_fingerprint(get_connection(db_path)),
+            "contexts": {},
+        }
+        _schema_cache[db_path] = cached
+    return cached
+
+def get_cached_schema_context(db_path, token_budget=SCHEMA_TOKEN_BUDGET, question=None, top_k=SCHEMA_TOP_K):
+    """
+    Get the schema context for a database, rebuilding it only when the file changes.
+    
+    With a question, only the tables and columns ranked relevant to it are
+    included (see schema_retrieval.rank_schema). The full schema is used when
+    nothing in the question matches.
+    
+    Parameters:
+        db_path (str): Path to the SQLite database
+        token_budget (int): Approximate maximum size of the schema in tokens
+        question (str): The user's question, used to prune the schema
+        top_k (int): Number of relevant tables to keep, 0 to disable pruning
+        
+    Returns:
+        str: The schema context for the prompt.
+    """
+    entry = get_cached_schema_entry(db_path)
+    
+    if question and top_k:
+        column_names = {name: [col[1] for col in columns] for name, columns, _ in entry["tables"]}
+        ranked = rank_schema(question, column_names, top_k)
+        if ranked:
+            tables_by_name = {table[0]: table for table in entry["tables"]}
+            return build_schema_context([tables_by_name[name] for name, _ in ranked], token_budget, dict(ranked))
+    
+    if token_budget not in entry["contexts"]:
+        entry["contexts"][token_budget] = build_schema_context(entry["tables"], token_budget)
+    return entry["contexts"][token_budget]
+
+def parse_args():
+    """
+    Parse command line options for the query assistant.
+    """
+    parser = argparse.ArgumentParser(description="Ask questions about the imported schedules in natural language.")
+    parser.add_argument("--metrics", choices=METRICS_MODES,
+                        help="Record the time spent on the SQL cache, schema, LLM call and SQL execution of each "
+                             "question; print them as a summary table on exit or append every span to a "
+                             "JSON lines file.")
+    parser.add_argument("--metrics-file", default=DEFAULT_METRICS_FILE,
+                        help="JSON lines file written with --metrics jsonl.")
+    parser.add_argument("--federated", action="store_true",
+                        help="Ask every question across all databases in the Database directory at once; results "
+                             f"are merged with a {SOURCE_COLUMN} column.")
+    parser.add_argument("--workers", type=int, default=FEDERATED_WORKERS,
+                        help="Databases queried at the same time in federated mode.")
+    return parser.parse_args()
+
+def display_federated_results(sql_query, db_paths, workers=FEDERATED_WORKERS, on_rejected=None):
+    """
+    Run a federated query and show the merged results a page at a time.
+    
+    Parameters:
+        sql_query (str): The SQL query to run.
+        db_paths (list of str): Paths to the databases.
+        workers (int): Number of databases queried at the same time.
+        on_rejected (callable): Called before any results are shown when at
+            least one database rejected the query, e.g. to drop it from the SQL cache.
+    
+    Raises:
+        RuntimeError: If the query failed on every database it applies to.
+    """
+    columns, rows, errors, skipped = run_federated_query(sql_query, db_paths, workers=workers)
+    answered = len(db_paths) - len(errors) - len(skipped)
+    print(f"Queried {len(db_paths)} databases: {answered} answered, {len(skipped)} without the tables used, "
+          f"{len(errors)} failed.")
+    for source, error in errors.items():
+        print(f"  - {source}: {error}")
+    if errors and on_rejected:
+        on_rejected()
+    if not answered and errors:
+        raise RuntimeError(next(iter(errors.values())))
+    
+    ordering = get_federated_ordering(sql_query, columns[1:])
+    if ordering:
+        rows = order_federated_rows(rows, ordering)
+    if columns:
+        scope = "across all projects" if ordering else "within each project, in database order"
+        print(f"Each row is computed within one project; ORDER BY and LIMIT apply {scope}.")
+    display_results_paged(columns, (row for row in rows), sql_query, None,
+                          export_results=lambda output_path: export_federated_results(sql_query, db_paths, columns,
+                                                                                      output_path))
 
 def main():
-    api_key = load_api_key()
-    client = OpenAI(api_key=api_key)
+    args = parse_args()
+    configure_metrics(args.metrics, args.metrics_file)
+    try:
+        client = OpenAI(api_key=load_api_key())
+    except ValueError as e:
+        # Template questions still work offline
+        print(f"Warning: {e} Only questions matching a SQL template can be answered.")
+        client = None
     
     print("Welcome to the XER Database Query Assistant!")
     
     try:
-        # Let user select a database
-        selected_db = select_database()
-        print(f"\nUsing database: {os.path.basename(selected_db)}")
+        if args.federated:
+            # SQL is generated once, against the richest schema, and run on every database
+            db_paths = get_federated_databases()
+            if not db_paths:
+                raise ValueError("No databases found in the Database directory.")
+            selected_db = pick_schema_database(db_paths)
+            print(f"\nFederated mode: {len(db_paths)} databases, schema from {os.path.basename(selected_db)}")
+        else:
+            # Let user select a database
+            selected_db = select_database()
+            print(f"\nUsing database: {os.path.basename(selected_db)}")
         
         print("\nType 'exit' to quit.")
         while True:
             user_input = input("\nEnter your question: ")
             if user_input.strip().lower() in ['exit', 'quit']:
+                sql_cache = get_sql_cache()
+                if sql_cache:
+                    stats = get_cache_stats(sql_cache)
+                    print(f"SQL cache: {stats['hits']} hits, {stats['misses']} misses, "
+                          f"{stats['entries']} cached queries.")
                 print("Goodbye!")
                 break
             
+            add_count("questions")
             try:
                 # Get SQL query from OpenAI
-                sql_query = get_sql_query(client, user_input, selected_db)
+                sql_query = get_sql_query(client, user_input, selected_db, args.federated)
                 print(f"\nGenerated SQL Query:\n{sql_query}\n")
                 
-                # Execute SQL query
-                columns, results = execute_sql_query(sql_query, selected_db)
+                # Execute SQL query, dropping SQL that does not run from the cache
+                if args.federated:
+                    # SQL rejected by any one database is dropped, not only SQL that fails everywhere
+                    display_federated_results(sql_query, db_paths, args.workers,
+                                              on_rejected=lambda: forget_cached_sql(user_input, selected_db, True))
+                    continue
+                try:
+                    columns, rows = stream_sql_query(sql_query, selected_db)
+                except RuntimeError:
+                    forget_cached_sql(user_input, selected_db)
+                    raise
                 
-                # Format and display results
-                formatted_results = format_results(columns, results)
-                print(f"Query Results:\n{formatted_results}\n")
+                # Display results a page at a time
+                display_results_paged(columns, rows, sql_query, selected_db)
             except Exception as e:
                 print(f"An error occurred: {e}\n")
     
     except ValueError as e:
         print(f"Error: {e}")
         return
+    finally:
+        close_connections()
+        report_metrics()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,151 @@
+from xer_schema import create_derived_table
+
+# Hierarchy index tables derived from PROJWBS and OBS at import time
+WBS_CLOSURE_TABLE = "WBS_CLOSURE"
+WBS_TREE_TABLE = "WBS_TREE"
+OBS_CLOSURE_TABLE = "OBS_CLOSURE"
+OBS_TREE_TABLE = "OBS_TREE"
+HIERARCHY_TABLES = (WBS_CLOSURE_TABLE, WBS_TREE_TABLE, OBS_CLOSURE_TABLE, OBS_TREE_TABLE)
+
+# (closure table, tree table, source table, id column, parent column, name column, path separator)
+HIERARCHIES = (
+    (WBS_CLOSURE_TABLE, WBS_TREE_TABLE, 'PROJWBS', 'wbs_id', 'parent_wbs_id', 'wbs_short_name', '.'),
+    (OBS_CLOSURE_TABLE, OBS_TREE_TABLE, 'OBS', 'obs_id', 'parent_obs_id', 'obs_name', ' / '),
+)
+
+def get_closure_columns(id_column):
+    """
+    Get the columns of a closure table, e.g. ancestor_wbs_id, wbs_id and depth.
+    """
+    return [f'ancestor_{id_column}', id_column, 'depth']
+
+def get_tree_columns(id_column, parent_column):
+    """
+    Get the columns of a nested-set table, e.g. wbs_id, parent_wbs_id, depth, lft, rgt and wbs_path.
+    """
+    return [id_column, parent_column, 'depth', 'lft', 'rgt', f"{id_column[:-len('_id')]}_path"]
+
+def load_hierarchy(conn, source_table, id_column, parent_column, name_column):
+    """
+    Read the nodes of a tree stored as parent links.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to an imported XER database.
+        source_table (str): Table holding the tree, e.g. PROJWBS.
+        id_column (str): Node id column.
+        parent_column (str): Parent node id column.
+        name_column (str): Column used to build each node's path.
+
+    Returns:
+        tuple: (parent id keyed by node id, sort key keyed by node id, name keyed by node id).
+    """
+    rows = conn.execute(
+        f'SELECT "{id_column}", "{parent_column}", "seq_num", "{name_column}" FROM "{source_table}" '
+        f'WHERE "{id_column}" IS NOT NULL'
+    ).fetchall()
+    parents = {row[0]: row[1] for row in rows}
+    # Siblings in P6 display order, with unnumbered nodes last
+    sort_keys = {row[0]: (row[2] is None, row[2] or 0, row[0]) for row in rows}
+    names = {row[0]: '' if row[3] is None else str(row[3]) for row in rows}
+    return parents, sort_keys, names
+
+def get_closure_rows(parents):
+    """
+    List every (ancestor, descendant, depth) pair of a tree.
+
+    Each node is its own ancestor at depth 0. A parent outside the tree (e.g.
+    the EPS node above a project's WBS) ends the walk, and so does a loop.
+
+    Parameters:
+        parents (dict): Parent id keyed by node id.
+
+    Returns:
+        list of list: Rows for the closure table.
+    """
+    rows = []
+    for node in parents:
+        ancestor, depth, seen = node, 0, set()
+        while ancestor in parents and ancestor not in seen:
+            rows.append([ancestor, node, depth])
+            seen.add(ancestor)
+            ancestor = parents[ancestor]
+            depth += 1
+    return rows
+
+def get_nested_set_rows(parents, sort_keys, names, separator):
+    """
+    Number a tree in depth-first order so each subtree is one interval.
+
+    Nodes are numbered 1, 2, ... in pre-order across all root nodes. A node's
+    lft is its own number and its rgt the number of its last descendant, so
+    the subtree of X is every node with lft BETWEEN X.lft AND X.rgt.
+
+    Parameters:
+        parents (dict): Parent id keyed by node id.
+        sort_keys (dict): Sibling order keyed by node id.
+        names (dict): Name keyed by node id, joined from the root into each node's path.
+        separator (str): Text between the names in a path.
+
+    Returns:
+        tuple: (rows of node, parent, depth, lft, rgt, path in pre-order,
+        number of nodes left out because they are on a loop).
+    """
+    children = {node: [] for node in parents}
+    roots = []
+    for node, parent in parents.items():
+        if parent in parents and parent != node:
+            children[parent].append(node)
+        else:
+            roots.append(node)
+
+    rows = []
+    row_positions = {}
+    stack = [(root, 0, names[root]) for root in sorted(roots, key=sort_keys.get, reverse=True)]
+    while stack:
+        node, depth, path = stack.pop()
+        row_positions[node] = len(rows)
+        rows.append([node, parents[node], depth, len(rows) + 1, None, path])
+        for child in sorted(children[node], key=sort_keys.get, reverse=True):
+            stack.append((child, depth + 1, path + separator + names[child]))
+
+    # The last descendant of a node is the last node of its last child's subtree
+    for row in reversed(rows):
+        last_child = max((row_positions[child] for child in children[row[0]]), default=None)
+        row[4] = row[3] if last_child is None else rows[last_child][4]
+    return rows, len(parents) - len(rows)
+
+def build_hierarchy_tables(conn):
+    """
+    Index the WBS and OBS trees as closure tables and nested-set intervals.
+
+    WBS_CLOSURE and OBS_CLOSURE pair every node with each of its ancestors,
+    so "everything under X" is an equality join. WBS_TREE and OBS_TREE give
+    each node its depth, a lft/rgt interval holding exactly its subtree and
+    its path from the root, so subtree filters are range lookups. Trees whose
+    source table is missing are skipped; existing tables are replaced. The
+    caller commits.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to an imported XER database.
+
+    Returns:
+        bool: True if any table was built, False if PROJWBS and OBS are both missing.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    cursor = conn.cursor()
+    built = []
+    for closure_table, tree_table, source_table, id_column, parent_column, name_column, separator in HIERARCHIES:
+        if source_table not in existing:
+            continue
+        parents, sort_keys, names = load_hierarchy(conn, source_table, id_column, parent_column, name_column)
+        closure_rows = get_closure_rows(parents)
+        tree_rows, looped = get_nested_set_rows(parents, sort_keys, names, separator)
+        create_derived_table(cursor, closure_table, get_closure_columns(id_column), closure_rows)
+        create_derived_table(cursor, tree_table, get_tree_columns(id_column, parent_column), tree_rows)
+        built.append(f"{source_table} ({len(tree_rows)} nodes, {len(closure_rows)} ancestor pairs)")
+        if looped:
+            print(f"Warning: {looped} {source_table} nodes are on a parent loop and are left out of {tree_table}.")
+
+    if built:
+        print(f"Built hierarchy tables: {', '.join(built)}.")
+    return bool(built)
@@ -0,0 +1,298 @@
+import sqlite3
+import numpy as np
+from xer_schema import create_derived_table
+
+# Tables derived from TASK and TASKPRED at import time
+CPM_TASK_TABLE = "CPM_TASK"
+CPM_RELATIONSHIP_TABLE = "CPM_RELATIONSHIP"
+CPM_CRITICAL_PATH_TABLE = "CPM_CRITICAL_PATH"
+NETWORK_TABLES = (CPM_TASK_TABLE, CPM_RELATIONSHIP_TABLE, CPM_CRITICAL_PATH_TABLE)
+
+CPM_TASK_COLUMNS = [
+    'task_id', 'topo_level', 'pred_count', 'succ_count', 'remain_drtn_hr_cnt',
+    'early_start_hr_cnt', 'early_end_hr_cnt', 'late_start_hr_cnt', 'late_end_hr_cnt',
+    'total_float_hr_cnt', 'free_float_hr_cnt', 'driving_pred_task_id', 'critical_flag',
+]
+CPM_RELATIONSHIP_COLUMNS = [
+    'task_pred_id', 'task_id', 'pred_task_id', 'pred_type', 'lag_hr_cnt',
+    'rel_free_float_hr_cnt', 'driving_flag', 'critical_flag',
+]
+CPM_CRITICAL_PATH_COLUMNS = ['path_seq', 'task_id', 'early_start_hr_cnt', 'early_end_hr_cnt']
+
+# Relationship types, as (predecessor end, successor end) that the lag links
+RELATIONSHIP_ENDS = {
+    'PR_FS': ('finish', 'start'),
+    'PR_SS': ('start', 'start'),
+    'PR_FF': ('finish', 'finish'),
+    'PR_SF': ('start', 'finish'),
+}
+# Floats within this many hours of zero count as zero
+FLOAT_TOLERANCE_HR = 1e-6
+
+def load_network_data(conn):
+    """
+    Read the activities and relationships needed for the network from the database.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to an imported XER database.
+
+    Returns:
+        dict: task_ids and remaining durations (one entry per activity), and for
+        each relationship its task_pred_id, predecessor and successor positions,
+        pred_type and lag. Relationships to activities outside TASK are dropped.
+    """
+    tasks = conn.execute(
+        'SELECT task_id, COALESCE(remain_drtn_hr_cnt, target_drtn_hr_cnt, 0) FROM "TASK" ORDER BY task_id'
+    ).fetchall()
+    task_ids = np.array([row[0] for row in tasks], dtype=np.int64)
+    durations = np.array([row[1] or 0 for row in tasks], dtype=np.float64)
+
+    links = conn.execute(
+        'SELECT task_pred_id, pred_task_id, task_id, pred_type, COALESCE(lag_hr_cnt, 0) FROM "TASKPRED" '
+        'WHERE task_id IN (SELECT task_id FROM "TASK") AND pred_task_id IN (SELECT task_id FROM "TASK") '
+        'ORDER BY task_pred_id'
+    ).fetchall()
+    return {
+        'task_ids': task_ids,
+        'durations': np.maximum(durations, 0),
+        'link_ids': np.array([row[0] for row in links], dtype=np.int64),
+        'pred_index': np.searchsorted(task_ids, np.array([row[1] for row in links], dtype=np.int64)),
+        'succ_index': np.searchsorted(task_ids, np.array([row[2] for row in links], dtype=np.int64)),
+        'pred_types': [row[3] if row[3] in RELATIONSHIP_ENDS else 'PR_FS' for row in links],
+        'lags': np.array([row[4] or 0 for row in links], dtype=np.float64),
+    }
+
+def build_csr(node_count, sources, targets):
+    """
+    Build a compressed sparse row adjacency list.
+
+    Parameters:
+        node_count (int): Number of nodes.
+        sources (numpy.ndarray): Source node of each edge.
+        targets (numpy.ndarray): Target node of each edge.
+
+    Returns:
+        tuple: (offsets, targets, edge ids). The edges leaving node n are
+        targets[offsets[n]:offsets[n + 1]], and edge ids map them back to the
+        input order.
+    """
+    order = np.argsort(sources, kind='stable')
+    offsets = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=node_count), out=offsets[1:])
+    return offsets, targets[order], order
+
+def gather_edges(offsets, nodes):
+    """
+    Get the CSR positions of every edge leaving a set of nodes, without a Python loop.
+    """
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    # Position within each node's slice, added to the slice start
+    run_starts = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + np.arange(total) - run_starts
+
+def get_topological_levels(node_count, offsets, targets):
+    """
+    Assign each node the length of the longest chain of edges leading to it.
+
+    The network is peeled one level at a time (Kahn's algorithm on whole
+    frontiers), so every node's predecessors sit on lower levels.
+
+    Returns:
+        numpy.ndarray: Level of each node, or -1 for nodes on or behind a loop.
+    """
+    indegree = np.bincount(targets, minlength=node_count)
+    levels = np.full(node_count, -1, dtype=np.int64)
+    frontier = np.flatnonzero(indegree == 0)
+    level = 0
+    while frontier.size:
+        levels[frontier] = level
+        reached = targets[gather_edges(offsets, frontier)]
+        np.subtract.at(indegree, reached, 1)
+        reached = np.unique(reached)
+        frontier = reached[indegree[reached] == 0]
+        level += 1
+    return levels
+
+def get_end(starts, finishes, end_names):
+    """
+    Pick the start or finish of each edge's node according to the relationship type.
+    """
+    return np.where(end_names == 'start', starts, finishes)
+
+def compute_cpm(network):
+    """
+    Run the critical path method forward and backward passes over the network.
+
+    Times are working hours from the data date. Each pass walks the
+    topological levels in order and handles every relationship into (or out
+    of) a level at once with numpy.
+
+    Parameters:
+        network (dict): Network data from load_network_data.
+
+    Returns:
+        dict: Per-activity levels, counts, early/late starts and finishes, total
+        and free float and driving predecessor position; per-relationship free
+        float. Activities on a loop have NaN dates.
+    """
+    node_count = len(network['task_ids'])
+    durations = network['durations']
+    pred_index, succ_index, lags = network['pred_index'], network['succ_index'], network['lags']
+    pred_ends = np.array([RELATIONSHIP_ENDS[t][0] for t in network['pred_types']], dtype=object)
+    succ_ends = np.array([RELATIONSHIP_ENDS[t][1] for t in network['pred_types']], dtype=object)
+
+    offsets, succ_targets, _ = build_csr(node_count, pred_index, succ_index)
+    levels = get_topological_levels(node_count, offsets, succ_targets)
+    valid = levels >= 0
+    valid_links = valid[pred_index] & valid[succ_index]
+    max_level = int(levels.max()) if node_count else -1
+    node_order = np.argsort(levels, kind='stable')
+    level_bounds = np.searchsorted(levels[node_order], np.arange(max_level + 2))
+
+    # Forward pass: constrain each successor by its already scheduled predecessors
+    early_start = np.where(valid, 0.0, np.nan)
+    early_finish = early_start + durations
+    link_order = np.argsort(levels[succ_index], kind='stable')
+    link_order = link_order[valid_links[link_order]]
+    link_levels = levels[succ_index][link_order]
+    for level in range(1, max_level + 1):
+        batch = link_order[np.searchsorted(link_levels, level):np.searchsorted(link_levels, level, 'right')]
+        if batch.size:
+            pred_time = get_end(early_start[pred_index[batch]], early_finish[pred_index[batch]], pred_ends[batch])
+            # A finish constraint on the successor moves its start back by its duration
+            candidate = pred_time + lags[batch] - np.where(succ_ends[batch] == 'finish', durations[succ_index[batch]], 0)
+            np.maximum.at(early_start, succ_index[batch], candidate)
+        nodes = node_order[level_bounds[level]:level_bounds[level + 1]]
+        early_finish[nodes] = early_start[nodes] + durations[nodes]
+
+    # Backward pass: constrain each predecessor by its already scheduled successors
+    project_finish = np.nanmax(early_finish) if valid.any() else 0.0
+    late_finish = np.where(valid, project_finish, np.nan)
+    late_start = late_finish - durations
+    link_order = np.argsort(-levels[pred_index], kind='stable')
+    link_order = link_order[valid_links[link_order]]
+    link_levels = -levels[pred_index][link_order]
+    for level in range(max_level, -1, -1):
+        batch = link_order[np.searchsorted(link_levels, -level):np.searchsorted(link_levels, -level, 'right')]
+        if batch.size:
+            succ_time = get_end(late_start[succ_index[batch]], late_finish[succ_index[batch]], succ_ends[batch])
+            candidate = succ_time - lags[batch] + np.where(pred_ends[batch] == 'start', durations[pred_index[batch]], 0)
+            np.minimum.at(late_finish, pred_index[batch], candidate)
+        nodes = node_order[level_bounds[level]:level_bounds[level + 1]]
+        late_start[nodes] = late_finish[nodes] - durations[nodes]
+
+    # Relationship free float: how far the predecessor can slip before it moves the successor
+    pred_time = get_end(early_start[pred_index], early_finish[pred_index], pred_ends)
+    succ_time = get_end(early_start[succ_index], early_finish[succ_index], succ_ends)
+    link_float = succ_time - (pred_time + lags)
+    link_float[~valid_links] = np.nan
+
+    # Free float is the smallest relationship float, or the float to project finish without successors
+    free_float = np.full(node_count, np.inf)
+    if valid_links.any():
+        np.minimum.at(free_float, pred_index[valid_links], link_float[valid_links])
+    free_float = np.where(np.isinf(free_float), project_finish - early_finish, free_float)
+
+    # The driving predecessor is the first one with no relationship free float
+    driving_pred = np.full(node_count, -1, dtype=np.int64)
+    driving = valid_links & (np.abs(link_float) <= FLOAT_TOLERANCE_HR)
+    for link in np.flatnonzero(driving)[::-1]:
+        driving_pred[succ_index[link]] = pred_index[link]
+
+    return {
+        'levels': levels,
+        'pred_counts': np.bincount(succ_index, minlength=node_count),
+        'succ_counts': np.diff(offsets),
+        'early_start': early_start,
+        'early_finish': early_finish,
+        'late_start': late_start,
+        'late_finish': late_finish,
+        'total_float': late_finish - early_finish,
+        'free_float': free_float,
+        'driving_pred': driving_pred,
+        'link_float': link_float,
+    }
+
+def to_sql_value(value):
+    """
+    Convert a numpy number to a Python value for SQLite, with NaN as NULL.
+    """
+    value = value.item()
+    if isinstance(value, float):
+        return None if np.isnan(value) else round(value, 4)
+    return value
+
+def build_network_tables(conn):
+    """
+    Compute the critical path from TASK and TASKPRED and store it as CPM tables.
+
+    CPM_TASK holds early/late dates (as working hours from the data date),
+    float and the driving predecessor of each activity, CPM_RELATIONSHIP the
+    free float of each relationship and CPM_CRITICAL_PATH the critical
+    activities in schedule order. The pass is logic only: every activity may
+    start at the data date, and constraints, actual dates and calendars are
+    ignored, so P6's TASK.total_float_hr_cnt stays the float of record.
+    Existing CPM tables are replaced. The caller commits.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to an imported XER database.
+
+    Returns:
+        bool: True if the tables were built, False if TASK or TASKPRED is missing.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    if not {'TASK', 'TASKPRED'} <= existing:
+        return False
+
+    network = load_network_data(conn)
+    cpm = compute_cpm(network)
+    task_ids = network['task_ids']
+    critical = cpm['total_float'] <= FLOAT_TOLERANCE_HR
+
+    task_rows = []
+    for i, task_id in enumerate(task_ids.tolist()):
+        level = int(cpm['levels'][i])
+        driving_pred = int(cpm['driving_pred'][i])
+        task_rows.append([
+            task_id, level if level >= 0 else None, int(cpm['pred_counts'][i]), int(cpm['succ_counts'][i]),
+            to_sql_value(network['durations'][i]),
+            to_sql_value(cpm['early_start'][i]), to_sql_value(cpm['early_finish'][i]),
+            to_sql_value(cpm['late_start'][i]), to_sql_value(cpm['late_finish'][i]),
+            to_sql_value(cpm['total_float'][i]), to_sql_value(cpm['free_float'][i]),
+            int(task_ids[driving_pred]) if driving_pred >= 0 else None,
+            'Y' if critical[i] else 'N',
+        ])
+
+    link_rows = []
+    for i, link_id in enumerate(network['link_ids'].tolist()):
+        pred, succ = network['pred_index'][i], network['succ_index'][i]
+        link_float = cpm['link_float'][i]
+        is_driving = not np.isnan(link_float) and abs(link_float) <= FLOAT_TOLERANCE_HR
+        link_rows.append([
+            link_id, int(task_ids[succ]), int(task_ids[pred]), network['pred_types'][i],
+            to_sql_value(network['lags'][i]), to_sql_value(link_float),
+            'Y' if is_driving else 'N', 'Y' if is_driving and critical[pred] and critical[succ] else 'N',
+        ])
+
+    critical_nodes = np.flatnonzero(critical)
+    critical_nodes = critical_nodes[np.lexsort((cpm['early_finish'][critical_nodes], cpm['early_start'][critical_nodes]))]
+    path_rows = [
+        [seq, int(task_ids[i]), to_sql_value(cpm['early_start'][i]), to_sql_value(cpm['early_finish'][i])]
+        for seq, i in enumerate(critical_nodes.tolist(), start=1)
+    ]
+
+    cursor = conn.cursor()
+    create_derived_table(cursor, CPM_TASK_TABLE, CPM_TASK_COLUMNS, task_rows)
+    create_derived_table(cursor, CPM_RELATIONSHIP_TABLE, CPM_RELATIONSHIP_COLUMNS, link_rows)
+    create_derived_table(cursor, CPM_CRITICAL_PATH_TABLE, CPM_CRITICAL_PATH_COLUMNS, path_rows)
+
+    looped = int((cpm['levels'] < 0).sum())
+    print(f"Built schedule network: {len(task_rows)} activities, {len(link_rows)} relationships, "
+          f"{len(path_rows)} critical activities.")
+    if looped:
+        print(f"Warning: {looped} activities are on or behind a relationship loop and have no CPM dates.")
+    return True
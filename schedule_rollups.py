@@ -0,0 +1,272 @@
+import numpy as np
+from schedule_hierarchy import WBS_CLOSURE_TABLE
+from xer_schema import create_table_sql, create_index_sqls, create_derived_table
+
+# Summary tables derived from TASK, TASKRSRC, PROJCOST and TASKACTV at import time
+WBS_ROLLUP_TABLE = "WBS_ROLLUP"
+RSRC_ROLLUP_TABLE = "RSRC_ROLLUP"
+RSRC_HISTOGRAM_TABLE = "RSRC_HISTOGRAM"
+ACTVCODE_ROLLUP_TABLE = "ACTVCODE_ROLLUP"
+ROLLUP_TABLES = (WBS_ROLLUP_TABLE, RSRC_ROLLUP_TABLE, RSRC_HISTOGRAM_TABLE, ACTVCODE_ROLLUP_TABLE)
+
+# Activity measures shared by the WBS and activity code rollups, after their key columns
+TASK_MEASURE_COLUMNS = [
+    'task_count', 'complete_task_count', 'active_task_count', 'not_started_task_count',
+    'target_drtn_hr_cnt', 'remain_drtn_hr_cnt', 'min_total_float_hr_cnt', 'start_date', 'end_date',
+    'target_qty', 'act_qty', 'remain_qty', 'target_cost', 'act_cost', 'remain_cost',
+]
+WBS_ROLLUP_COLUMNS = ['wbs_id', 'proj_id'] + TASK_MEASURE_COLUMNS
+ACTVCODE_ROLLUP_COLUMNS = ['actv_code_id', 'actv_code_type_id'] + TASK_MEASURE_COLUMNS
+RSRC_ROLLUP_COLUMNS = [
+    'rsrc_id', 'assignment_count', 'task_count', 'start_date', 'end_date',
+    'target_qty', 'act_qty', 'remain_qty', 'target_cost', 'act_cost', 'remain_cost',
+]
+RSRC_HISTOGRAM_COLUMNS = ['rsrc_id', 'period_type', 'period_start_date', 'target_qty', 'remain_qty']
+
+# SQL computing TASK_MEASURE_COLUMNS over activities "t" joined to per-activity totals "m"
+TASK_MEASURE_SQL = """
+    COUNT(t.task_id),
+    COUNT(CASE WHEN t.status_code = 'TK_Complete' THEN 1 END),
+    COUNT(CASE WHEN t.status_code = 'TK_Active' THEN 1 END),
+    COUNT(CASE WHEN t.status_code = 'TK_NotStart' THEN 1 END),
+    ROUND(TOTAL(t.target_drtn_hr_cnt), 4),
+    ROUND(TOTAL(t.remain_drtn_hr_cnt), 4),
+    MIN(CASE WHEN t.status_code <> 'TK_Complete' THEN t.total_float_hr_cnt END),
+    MIN(COALESCE(t.act_start_date, t.early_start_date, t.target_start_date)),
+    MAX(COALESCE(t.act_end_date, t.early_end_date, t.target_end_date)),
+    ROUND(TOTAL(m.target_qty), 4), ROUND(TOTAL(m.act_qty), 4), ROUND(TOTAL(m.remain_qty), 4),
+    ROUND(TOTAL(m.target_cost), 4), ROUND(TOTAL(m.act_cost), 4), ROUND(TOTAL(m.remain_cost), 4)
+"""
+# Temporary per-activity totals of resource assignments and expenses
+TASK_TOTALS_TABLE = "temp_task_totals"
+TASKRSRC_TOTALS_SQL = """
+    SELECT task_id, target_qty, COALESCE(act_reg_qty, 0) + COALESCE(act_ot_qty, 0) AS act_qty, remain_qty,
+           target_cost, COALESCE(act_reg_cost, 0) + COALESCE(act_ot_cost, 0) AS act_cost, remain_cost
+    FROM "TASKRSRC"
+"""
+# Expense quantities are in the expense's own units, so only their costs are added
+PROJCOST_TOTALS_SQL = """
+    SELECT task_id, NULL AS target_qty, NULL AS act_qty, NULL AS remain_qty, target_cost, act_cost, remain_cost
+    FROM "PROJCOST"
+"""
+
+# Histogram periods: weeks start on Monday, months on the 1st
+HISTOGRAM_PERIODS = ('week', 'month')
+# Assignments shorter than this (in days) are spread over it, so same-day work still lands in a period
+MIN_SPREAD_DAYS = 1 / 24
+# julianday() of 1970-01-01, the numpy datetime64 epoch
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+# Weekday of 1970-01-01, with Monday as 0
+EPOCH_WEEKDAY = 3
+# Period quantities within this of zero are not stored
+QUANTITY_TOLERANCE = 1e-6
+
+def get_existing_tables(conn):
+    """
+    Get the names of the tables in the database.
+    """
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+def create_rollup_table(cursor, table_name, columns, select_sql):
+    """
+    Replace a derived table with the rows of a SELECT and index its key columns.
+    """
+    formatted_columns = ', '.join([f'"{col}"' for col in columns])
+    cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+    cursor.execute(create_table_sql(table_name, columns, if_not_exists=False))
+    cursor.execute(f'INSERT INTO "{table_name}" ({formatted_columns}) {select_sql}')
+    for index_sql in create_index_sqls(table_name, columns):
+        cursor.execute(index_sql)
+
+def create_task_totals(cursor, existing):
+    """
+    Sum the resource assignments and expenses of each activity into a temporary table.
+    """
+    sources = []
+    if 'TASKRSRC' in existing:
+        sources.append(TASKRSRC_TOTALS_SQL)
+    if 'PROJCOST' in existing:
+        sources.append(PROJCOST_TOTALS_SQL)
+    if not sources:
+        sources.append('SELECT NULL AS task_id, NULL AS target_qty, NULL AS act_qty, NULL AS remain_qty, '
+                       'NULL AS target_cost, NULL AS act_cost, NULL AS remain_cost WHERE 0')
+    cursor.execute(f'DROP TABLE IF EXISTS temp."{TASK_TOTALS_TABLE}"')
+    cursor.execute(f"""
+        CREATE TEMP TABLE "{TASK_TOTALS_TABLE}" AS
+        SELECT task_id, TOTAL(target_qty) AS target_qty, TOTAL(act_qty) AS act_qty, TOTAL(remain_qty) AS remain_qty,
+               TOTAL(target_cost) AS target_cost, TOTAL(act_cost) AS act_cost, TOTAL(remain_cost) AS remain_cost
+        FROM ({' UNION ALL '.join(sources)})
+        WHERE task_id IS NOT NULL
+        GROUP BY task_id
+    """)
+    cursor.execute(f'CREATE UNIQUE INDEX temp."idx_{TASK_TOTALS_TABLE}_task_id" ON "{TASK_TOTALS_TABLE}" (task_id)')
+
+def get_period_starts(first_day, last_day, period_type):
+    """
+    Get the start of every histogram period from the one holding first_day to the one after last_day.
+
+    Parameters:
+        first_day (float): Earliest time, in days since 1970-01-01.
+        last_day (float): Latest time, in days since 1970-01-01.
+        period_type (str): "week" or "month".
+
+    Returns:
+        numpy.ndarray: Period starts in days since 1970-01-01, ascending.
+    """
+    first = np.datetime64(int(np.floor(first_day)), 'D')
+    last = np.datetime64(int(np.floor(last_day)), 'D')
+    if period_type == 'week':
+        first -= (first.astype(np.int64) + EPOCH_WEEKDAY) % 7
+        return np.arange(first, last + 8, 7).astype(np.int64)
+    months = np.arange(first.astype('datetime64[M]'), last.astype('datetime64[M]') + 2)
+    return months.astype('datetime64[D]').astype(np.int64)
+
+def get_cumulative_quantities(starts, finishes, quantities, boundaries):
+    """
+    Get how much of the assignments' quantity falls before each boundary.
+
+    Each quantity is spread evenly from its start to its finish, so the total
+    before a boundary b is the sum of rate * (clip(b, start, finish) - start).
+    That sum is split into the part from assignments started by b minus the
+    part from assignments finished by b, each read off sorted prefix sums.
+
+    Parameters:
+        starts (numpy.ndarray): Assignment starts, in days.
+        finishes (numpy.ndarray): Assignment finishes, in days.
+        quantities (numpy.ndarray): Quantity of each assignment.
+        boundaries (numpy.ndarray): Times to measure at, in days.
+
+    Returns:
+        numpy.ndarray: Cumulative quantity at each boundary.
+    """
+    finishes = np.maximum(finishes, starts + MIN_SPREAD_DAYS)
+    rates = quantities / (finishes - starts)
+    total = np.zeros(len(boundaries))
+    for times, sign in ((starts, 1), (finishes, -1)):
+        order = np.argsort(times, kind='stable')
+        rate_sums = np.concatenate(([0.0], np.cumsum(rates[order])))
+        weighted_sums = np.concatenate(([0.0], np.cumsum(rates[order] * times[order])))
+        reached = np.searchsorted(times[order], boundaries, 'right')
+        total += sign * (boundaries * rate_sums[reached] - weighted_sums[reached])
+    return total
+
+def get_histogram_rows(conn):
+    """
+    Spread each resource's planned and remaining units over weeks and months.
+
+    Planned units run from the assignment's planned start to planned finish,
+    remaining units from its remaining start to remaining finish, evenly over
+    elapsed time.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to a database with TASKRSRC.
+
+    Returns:
+        list of list: Rows for RSRC_HISTOGRAM with a non-zero quantity.
+    """
+    assignments = conn.execute(f"""
+        SELECT rsrc_id,
+               julianday(target_start_date) - {UNIX_EPOCH_JULIAN_DAY},
+               julianday(target_end_date) - {UNIX_EPOCH_JULIAN_DAY},
+               COALESCE(target_qty, 0),
+               julianday(COALESCE(restart_date, target_start_date)) - {UNIX_EPOCH_JULIAN_DAY},
+               julianday(COALESCE(reend_date, target_end_date)) - {UNIX_EPOCH_JULIAN_DAY},
+               COALESCE(remain_qty, 0)
+        FROM "TASKRSRC"
+        WHERE rsrc_id IS NOT NULL
+        ORDER BY rsrc_id
+    """).fetchall()
+    if not assignments:
+        return []
+    rsrc_ids = np.array([row[0] for row in assignments], dtype=np.int64)
+    values = np.array([row[1:] for row in assignments], dtype=np.float64)
+    measures = [values[:, 0:3], values[:, 3:6]]
+    # Only assignments with dates and a quantity to spread
+    measures = [(m, ~np.isnan(m).any(axis=1) & (m[:, 2] != 0)) for m in measures]
+    dated = np.concatenate([m[valid, :2].ravel() for m, valid in measures])
+    if not dated.size:
+        return []
+
+    rows = []
+    group_bounds = np.flatnonzero(np.diff(rsrc_ids)) + 1
+    for period_type in HISTOGRAM_PERIODS:
+        boundaries = get_period_starts(dated.min(), dated.max() + MIN_SPREAD_DAYS, period_type).astype(np.float64)
+        period_labels = [f"{day} 00:00" for day in boundaries[:-1].astype('datetime64[D]').astype(str)]
+        for group in np.split(np.arange(len(rsrc_ids)), group_bounds):
+            period_quantities = []
+            for m, valid in measures:
+                chosen = group[valid[group]]
+                cumulative = get_cumulative_quantities(m[chosen, 0], m[chosen, 1], m[chosen, 2], boundaries)
+                period_quantities.append(np.diff(cumulative))
+            target, remain = period_quantities
+            rsrc_id = int(rsrc_ids[group[0]])
+            for i in np.flatnonzero((np.abs(target) > QUANTITY_TOLERANCE) | (np.abs(remain) > QUANTITY_TOLERANCE)):
+                rows.append([rsrc_id, period_type, period_labels[i], round(float(target[i]), 4),
+                             round(float(remain[i]), 4)])
+    return rows
+
+def build_rollup_tables(conn):
+    """
+    Precompute the summary tables that dashboard questions would otherwise aggregate from scratch.
+
+    WBS_ROLLUP and ACTVCODE_ROLLUP hold activity counts, durations, float, dates, units
+    and costs for each WBS node (including everything below it) and each
+    activity code value. RSRC_ROLLUP sums each resource's assignments and
+    RSRC_HISTOGRAM spreads its units over weeks and months. Tables whose
+    sources are missing are skipped; existing ones are replaced. The caller
+    commits.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to an imported XER database, with
+            WBS_CLOSURE already built by schedule_hierarchy.build_hierarchy_tables.
+
+    Returns:
+        bool: True if any table was built, False if TASK is missing.
+    """
+    existing = get_existing_tables(conn)
+    if 'TASK' not in existing:
+        return False
+
+    cursor = conn.cursor()
+    create_task_totals(cursor, existing)
+    built = []
+    if {'PROJWBS', WBS_CLOSURE_TABLE} <= existing:
+        create_rollup_table(cursor, WBS_ROLLUP_TABLE, WBS_ROLLUP_COLUMNS, f"""
+            SELECT c.ancestor_wbs_id, w.proj_id, {TASK_MEASURE_SQL}
+            FROM "{WBS_CLOSURE_TABLE}" c
+            JOIN "PROJWBS" w ON w.wbs_id = c.ancestor_wbs_id
+            LEFT JOIN "TASK" t ON t.wbs_id = c.wbs_id
+            LEFT JOIN "{TASK_TOTALS_TABLE}" m ON m.task_id = t.task_id
+            GROUP BY c.ancestor_wbs_id
+        """)
+        built.append(WBS_ROLLUP_TABLE)
+    if 'TASKACTV' in existing:
+        create_rollup_table(cursor, ACTVCODE_ROLLUP_TABLE, ACTVCODE_ROLLUP_COLUMNS, f"""
+            SELECT a.actv_code_id, MIN(a.actv_code_type_id), {TASK_MEASURE_SQL}
+            FROM "TASKACTV" a
+            JOIN "TASK" t ON t.task_id = a.task_id
+            LEFT JOIN "{TASK_TOTALS_TABLE}" m ON m.task_id = t.task_id
+            WHERE a.actv_code_id IS NOT NULL
+            GROUP BY a.actv_code_id
+        """)
+        built.append(ACTVCODE_ROLLUP_TABLE)
+    if 'TASKRSRC' in existing:
+        create_rollup_table(cursor, RSRC_ROLLUP_TABLE, RSRC_ROLLUP_COLUMNS, """
+            SELECT rsrc_id, COUNT(*), COUNT(DISTINCT task_id),
+                   MIN(COALESCE(act_start_date, restart_date, target_start_date)),
+                   MAX(COALESCE(act_end_date, reend_date, target_end_date)),
+                   ROUND(TOTAL(target_qty), 4), ROUND(TOTAL(COALESCE(act_reg_qty, 0) + COALESCE(act_ot_qty, 0)), 4),
+                   ROUND(TOTAL(remain_qty), 4), ROUND(TOTAL(target_cost), 4),
+                   ROUND(TOTAL(COALESCE(act_reg_cost, 0) + COALESCE(act_ot_cost, 0)), 4), ROUND(TOTAL(remain_cost), 4)
+            FROM "TASKRSRC"
+            WHERE rsrc_id IS NOT NULL
+            GROUP BY rsrc_id
+        """)
+        create_derived_table(cursor, RSRC_HISTOGRAM_TABLE, RSRC_HISTOGRAM_COLUMNS, get_histogram_rows(conn))
+        built += [RSRC_ROLLUP_TABLE, RSRC_HISTOGRAM_TABLE]
+    cursor.execute(f'DROP TABLE temp."{TASK_TOTALS_TABLE}"')
+
+    if built:
+        counts = [(table, conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]) for table in built]
+        print("Built rollup tables: " + ", ".join(f"{table} ({count} rows)" for table, count in counts) + ".")
+    return bool(built)
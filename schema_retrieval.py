@@ -0,0 +1,245 @@
+import re
+from xer_schema import PRIMARY_KEYS, FOREIGN_KEYS
+
+# Words planners use for P6 tables
+TABLE_SYNONYMS = {
+    'activity': ('TASK',),
+    'task': ('TASK',),
+    'milestone': ('TASK',),
+    'critical': ('TASK', 'CPM_CRITICAL_PATH', 'CPM_TASK'),
+    'float': ('TASK',),
+    'slack': ('TASK',),
+    'duration': ('TASK',),
+    'progress': ('TASK',),
+    'status': ('TASK',),
+    'predecessor': ('TASKPRED', 'TASK'),
+    'successor': ('TASKPRED', 'TASK'),
+    'relationship': ('TASKPRED',),
+    'logic': ('TASKPRED',),
+    'lag': ('TASKPRED',),
+    'driving': ('CPM_RELATIONSHIP', 'CPM_TASK'),
+    'path': ('CPM_CRITICAL_PATH', 'CPM_RELATIONSHIP'),
+    'longest': ('CPM_CRITICAL_PATH',),
+    'wbs': ('PROJWBS', 'WBS_ROLLUP', 'WBS_CLOSURE', 'WBS_TREE'),
+    'phase': ('PROJWBS', 'WBS_ROLLUP'),
+    'area': ('PROJWBS', 'WBS_ROLLUP'),
+    'resource': ('RSRC', 'TASKRSRC', 'RSRC_ROLLUP'),
+    'assignment': ('TASKRSRC',),
+    'labor': ('TASKRSRC', 'RSRC'),
+    'equipment': ('RSRC', 'TASKRSRC'),
+    'manpower': ('TASKRSRC', 'RSRC'),
+    'hour': ('TASKRSRC', 'RSRC_HISTOGRAM'),
+    'rate': ('RSRCRATE',),
+    'cost': ('TASKRSRC', 'PROJCOST', 'WBS_ROLLUP', 'RSRC_ROLLUP'),
+    'budget': ('TASKRSRC', 'PROJCOST', 'WBS_ROLLUP'),
+    'expense': ('PROJCOST',),
+    'calendar': ('CALENDAR',),
+    'holiday': ('CALENDAR',),
+    'workday': ('CALENDAR',),
+    'working': ('CALENDAR',),
+    'weekend': ('CALENDAR',),
+    'code': ('ACTVCODE', 'TASKACTV', 'ACTVTYPE'),
+    'responsible': ('ACTVCODE', 'TASKACTV', 'ACTVTYPE', 'ACTVCODE_ROLLUP'),
+    'company': ('ACTVCODE', 'TASKACTV', 'ACTVTYPE', 'ACTVCODE_ROLLUP'),
+    'contractor': ('ACTVCODE', 'TASKACTV', 'ACTVTYPE', 'ACTVCODE_ROLLUP'),
+    'histogram': ('RSRC_HISTOGRAM',),
+    'period': ('RSRC_HISTOGRAM',),
+    'month': ('RSRC_HISTOGRAM',),
+    'monthly': ('RSRC_HISTOGRAM',),
+    'weekly': ('RSRC_HISTOGRAM',),
+    'loading': ('RSRC_HISTOGRAM', 'RSRC_ROLLUP'),
+    'total': ('WBS_ROLLUP', 'RSRC_ROLLUP', 'ACTVCODE_ROLLUP'),
+    'rollup': ('WBS_ROLLUP', 'RSRC_ROLLUP', 'ACTVCODE_ROLLUP'),
+    'summary': ('WBS_ROLLUP', 'RSRC_ROLLUP', 'ACTVCODE_ROLLUP'),
+    'under': ('WBS_CLOSURE', 'WBS_TREE', 'OBS_CLOSURE'),
+    'below': ('WBS_CLOSURE', 'WBS_TREE', 'OBS_CLOSURE'),
+    'subtree': ('WBS_CLOSURE', 'WBS_TREE', 'OBS_CLOSURE'),
+    'hierarchy': ('WBS_TREE', 'OBS_TREE'),
+    'tree': ('WBS_TREE', 'OBS_TREE'),
+    'level': ('WBS_TREE', 'OBS_TREE'),
+    'organization': ('OBS', 'OBS_TREE'),
+    'step': ('TASKPROC',),
+    'project': ('PROJECT',),
+    'obs': ('OBS', 'OBS_TREE', 'OBS_CLOSURE'),
+    'manager': ('OBS', 'POBS', 'OBS_CLOSURE'),
+    'currency': ('CURRTYPE',),
+    'unit': ('UMEASURE',),
+    'snapshot': ('SNAPSHOT', 'ACTIVITY_DELTA'),
+    'update': ('SNAPSHOT', 'ACTIVITY_DELTA'),
+    'slip': ('ACTIVITY_DELTA',),
+    'slipped': ('ACTIVITY_DELTA',),
+    'slippage': ('ACTIVITY_DELTA',),
+    'delta': ('ACTIVITY_DELTA',),
+    'changed': ('ACTIVITY_DELTA',),
+    'moved': ('ACTIVITY_DELTA',),
+    'since': ('ACTIVITY_DELTA',),
+    'week': ('SNAPSHOT', 'ACTIVITY_DELTA', 'RSRC_HISTOGRAM'),
+    'latest': ('SNAPSHOT',),
+    'previous': ('SNAPSHOT', 'ACTIVITY_DELTA'),
+}
+
+# Expansions of the abbreviations used in P6 column names
+ABBREVIATIONS = {
+    'actv': ('activity',),
+    'task': ('activity',),
+    'pred': ('predecessor',),
+    'succ': ('successor',),
+    'rsrc': ('resource',),
+    'clndr': ('calendar',),
+    'proj': ('project',),
+    'drtn': ('duration',),
+    'pct': ('percent', 'complete'),
+    'hr': ('hour',),
+    'cnt': ('count',),
+    'qty': ('quantity',),
+    'act': ('actual',),
+    'remain': ('remaining',),
+    'targ': ('target', 'planned', 'baseline'),
+    'descr': ('description',),
+    'end': ('finish',),
+    'early': ('start', 'finish'),
+    'late': ('start', 'finish'),
+    'cstr': ('constraint',),
+    'catg': ('category',),
+    'seq': ('order',),
+    'num': ('number',),
+    'short': ('code',),
+    'float': ('slack',),
+}
+
+# Words that say nothing about which table or column is meant
+STOPWORDS = {
+    'a', 'all', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'each', 'for',
+    'from', 'get', 'give', 'have', 'how', 'i', 'in', 'is', 'it', 'list', 'many', 'me', 'much', 'of',
+    'on', 'or', 'our', 'show', 'than', 'that', 'the', 'their', 'there', 'these', 'this', 'to', 'us',
+    'was', 'we', 'were', 'what', 'when', 'where', 'which', 'who', 'with', 'id', 'flag', 'type',
+}
+
+# Prefixes of foreign-key columns that point at another table's primary key
+FK_PREFIXES = ('pred_', 'parent_', 'base_')
+
+DEFAULT_TOP_K = 6
+DEFAULT_MAX_COLUMNS = 12
+# Tables scoring below this fraction of the best table are treated as noise
+MIN_RELATIVE_SCORE = 0.3
+
+def normalize_word(word):
+    """
+    Reduce a word to a crude singular form so "activities" matches "activity".
+    """
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith(('ses', 'xes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+def tokenize_question(question):
+    """
+    Split a question into normalized search terms.
+
+    Parameters:
+        question (str): The user's natural language question.
+
+    Returns:
+        set of str: Terms with stopwords removed.
+    """
+    words = re.findall(r'[a-z0-9]+', question.lower())
+    return {normalize_word(word) for word in words if word not in STOPWORDS}
+
+def tokenize_name(name):
+    """
+    Split a table or column name into terms, expanding P6 abbreviations.
+
+    Parameters:
+        name (str): Table or column name, e.g. "total_float_hr_cnt".
+
+    Returns:
+        set of str: Terms the name answers to.
+    """
+    terms = set()
+    for part in re.split(r'[_\W]+', name.lower()):
+        if not part or part in STOPWORDS:
+            continue
+        terms.add(normalize_word(part))
+        terms.update(ABBREVIATIONS.get(part, ()))
+    return terms
+
+def get_referenced_table(column, table_names):
+    """
+    Find the table whose primary key a foreign-key column points at.
+
+    Parameters:
+        column (str): Foreign-key column name, e.g. "pred_task_id".
+        table_names (iterable of str): Tables present in the database.
+
+    Returns:
+        str: The referenced table, or None.
+    """
+    candidates = [column] + [column[len(prefix):] for prefix in FK_PREFIXES if column.startswith(prefix)]
+    for candidate in candidates:
+        for table_name, key in PRIMARY_KEYS.items():
+            if key == (candidate,) and table_name in table_names:
+                return table_name
+    return None
+
+def rank_schema(question, tables, top_k=DEFAULT_TOP_K, max_columns=DEFAULT_MAX_COLUMNS):
+    """
+    Rank tables and columns by their relevance to a question.
+
+    Tables score on synonyms of the question words, their own name and their
+    columns' names. The top_k tables are expanded with the tables their
+    foreign keys point at, so the model can still write the joins.
+
+    Parameters:
+        question (str): The user's natural language question.
+        tables (dict): Column names keyed by table name.
+        top_k (int): Number of directly relevant tables to keep.
+        max_columns (int): Columns shown with their types per table; the rest are only listed by name.
+
+    Returns:
+        list of tuple: (table name, list of columns to show in full), most relevant
+        first. Empty if nothing in the question matches the schema.
+    """
+    terms = tokenize_question(question)
+    if not terms:
+        return []
+
+    table_scores = {}
+    column_scores = {}
+    for table_name, columns in tables.items():
+        score = 3 * sum(1 for term in terms if table_name in TABLE_SYNONYMS.get(term, ()))
+        score += 2 * len(terms & tokenize_name(table_name))
+        scored_columns = {}
+        for col in columns:
+            col_score = len(terms & tokenize_name(col))
+            if col_score:
+                scored_columns[col] = col_score
+        score += min(sum(scored_columns.values()), 3)
+        table_scores[table_name] = score
+        column_scores[table_name] = scored_columns
+
+    best_score = max(table_scores.values(), default=0)
+    if best_score == 0:
+        return []
+    ranked = sorted(tables, key=lambda name: -table_scores[name])
+    selected = [name for name in ranked[:top_k] if table_scores[name] >= best_score * MIN_RELATIVE_SCORE]
+
+    # Foreign-key expansion: add the tables that the selected ones join to
+    for table_name in list(selected):
+        for col in FOREIGN_KEYS.get(table_name, ()):
+            referenced = get_referenced_table(col, tables)
+            if referenced and referenced not in selected and col in tables[table_name] and col != 'proj_id':
+                selected.append(referenced)
+
+    result = []
+    for table_name in selected:
+        columns = tables[table_name]
+        key_columns = set(PRIMARY_KEYS.get(table_name, ())) | set(FOREIGN_KEYS.get(table_name, ()))
+        matched = sorted(column_scores[table_name], key=lambda col: -column_scores[table_name][col])
+        required = [col for col in columns if col in key_columns] + [col for col in matched if col not in key_columns]
+        descriptive = [col for col in columns if col.endswith(('_name', '_code')) and col not in required]
+        shown = set(required + descriptive[:max(max_columns - len(required), 0)])
+        result.append((table_name, [col for col in columns if col in shown]))
+    return result
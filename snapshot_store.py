@@ -0,0 +1,343 @@
+import os
+import hashlib
+import sqlite3
+import argparse
+from datetime import datetime
+from xer_schema import get_column_types, get_primary_key
+
+STORE_FILE_NAME = "snapshot_store.db"
+# Imported tables whose history is kept; each row version is stored once
+SNAPSHOT_TABLES = ('PROJECT', 'PROJWBS', 'TASK', 'TASKPRED', 'TASKRSRC')
+VERSION_COLUMNS = ('first_snapshot_id', 'last_snapshot_id')
+
+SNAPSHOT_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS "SNAPSHOT" (
+        "snapshot_id" INTEGER PRIMARY KEY,
+        "snapshot_name" TEXT UNIQUE,
+        "data_date" DATETIME,
+        "source_database" TEXT,
+        "imported_date" DATETIME,
+        "source_hash" TEXT
+    )
+'''
+ACTIVITY_DELTA_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS "ACTIVITY_DELTA" (
+        "snapshot_id" INTEGER,
+        "prev_snapshot_id" INTEGER,
+        "proj_short_name" TEXT,
+        "task_code" TEXT,
+        "task_id" INTEGER,
+        "task_name" TEXT,
+        "change_type" TEXT,
+        "status_code" TEXT,
+        "prev_status_code" TEXT,
+        "start_date" DATETIME,
+        "prev_start_date" DATETIME,
+        "start_slip_day_cnt" REAL,
+        "end_date" DATETIME,
+        "prev_end_date" DATETIME,
+        "end_slip_day_cnt" REAL,
+        "total_float_hr_cnt" REAL,
+        "prev_total_float_hr_cnt" REAL,
+        "float_change_hr_cnt" REAL,
+        PRIMARY KEY ("snapshot_id", "proj_short_name", "task_code")
+    )
+'''
+ACTIVITY_DELTA_INDEX_SQLS = (
+    'CREATE INDEX IF NOT EXISTS "idx_ACTIVITY_DELTA_end_slip" ON "ACTIVITY_DELTA" ("snapshot_id", "end_slip_day_cnt")',
+    'CREATE INDEX IF NOT EXISTS "idx_ACTIVITY_DELTA_task_code" ON "ACTIVITY_DELTA" ("task_code", "snapshot_id")',
+)
+
+# One activity per row as of a snapshot, matched across snapshots by project and activity ID
+ACTIVITY_STATE_SQL = '''
+    SELECT p."proj_short_name" AS proj_short_name, t."task_code" AS task_code, t."task_id" AS task_id,
+           t."task_name" AS task_name, t."status_code" AS status_code,
+           COALESCE(t."act_start_date", t."early_start_date") AS start_date,
+           COALESCE(t."act_end_date", t."early_end_date") AS end_date,
+           t."total_float_hr_cnt" AS total_float_hr_cnt
+    FROM "TASK" t
+    JOIN "PROJECT" p ON p."proj_id" = t."proj_id"
+        AND p."first_snapshot_id" <= {snapshot} AND p."last_snapshot_id" >= {snapshot}
+    WHERE t."first_snapshot_id" <= {snapshot} AND t."last_snapshot_id" >= {snapshot}
+'''
+
+def open_snapshot_store(store_path):
+    """
+    Open (and create if needed) the snapshot store.
+
+    Parameters:
+        store_path (str): Path to the store database.
+
+    Returns:
+        sqlite3.Connection: Connection to the store.
+    """
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    conn = sqlite3.connect(store_path)
+    conn.execute(SNAPSHOT_TABLE_SQL)
+    conn.execute(ACTIVITY_DELTA_TABLE_SQL)
+    for index_sql in ACTIVITY_DELTA_INDEX_SQLS:
+        conn.execute(index_sql)
+    conn.commit()
+    return conn
+
+def get_table_columns(conn, schema, table_name):
+    """
+    Get the column names of a table in an attached schema, or [] if it does not exist.
+    """
+    return [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info("{table_name}")')]
+
+def prepare_version_table(conn, table_name, columns):
+    """
+    Create a versioned table in the store, or add columns that are new in this snapshot.
+
+    The versioned table has the columns of the imported table plus
+    first_snapshot_id and last_snapshot_id, the range of snapshots in which
+    the row version was current.
+
+    Returns:
+        tuple: The primary key of the imported table (empty if it has none).
+    """
+    primary_key = get_primary_key(table_name, columns)
+    existing = get_table_columns(conn, 'main', table_name)
+    if not existing:
+        definitions = [f'"{col}" {col_type}' for col, col_type in zip(columns, get_column_types(columns))]
+        definitions += [f'"{col}" INTEGER' for col in VERSION_COLUMNS]
+        key_columns = ', '.join([f'"{col}"' for col in primary_key + ('first_snapshot_id',)])
+        conn.execute(f'CREATE TABLE "{table_name}" ({", ".join(definitions)}, PRIMARY KEY ({key_columns}))')
+        current_key = ', '.join([f'"{col}"' for col in primary_key + ('last_snapshot_id',)])
+        conn.execute(f'CREATE INDEX "idx_{table_name}_current" ON "{table_name}" ({current_key})')
+        conn.execute(f'CREATE INDEX "idx_{table_name}_snapshots" ON "{table_name}" ("last_snapshot_id", "first_snapshot_id")')
+    else:
+        for col, col_type in zip(columns, get_column_types(columns)):
+            if col not in existing:
+                conn.execute(f'ALTER TABLE "{table_name}" ADD COLUMN "{col}" {col_type}')
+    return primary_key
+
+def add_table_versions(conn, table_name, snapshot_id, prev_snapshot_id):
+    """
+    Record the rows of an attached snapshot's table, extending unchanged rows instead of copying them.
+
+    Rows identical to their version in the previous snapshot get their
+    last_snapshot_id moved forward; new and changed rows are inserted as new
+    versions. Rows that disappeared keep their old last_snapshot_id.
+
+    Returns:
+        tuple: (rows carried forward unchanged, new row versions), or None if
+        the table is missing from the snapshot or has no primary key.
+    """
+    columns = get_table_columns(conn, 'src', table_name)
+    if not columns:
+        return None
+    primary_key = prepare_version_table(conn, table_name, columns)
+    if not primary_key:
+        return None
+
+    store_only = [col for col in get_table_columns(conn, 'main', table_name)
+                  if col not in columns and col not in VERSION_COLUMNS]
+    key_match = ' AND '.join([f's."{col}" = v."{col}"' for col in primary_key])
+    same_values = ' AND '.join(
+        [f's."{col}" IS v."{col}"' for col in columns if col not in primary_key]
+        + [f'v."{col}" IS NULL' for col in store_only]
+    ) or '1'
+    cursor = conn.execute(f'''
+        UPDATE "{table_name}" AS v SET "last_snapshot_id" = ?
+        WHERE v."last_snapshot_id" = ?
+          AND EXISTS (SELECT 1 FROM src."{table_name}" s WHERE {key_match} AND {same_values})
+    ''', (snapshot_id, prev_snapshot_id))
+    carried = cursor.rowcount
+
+    formatted_columns = ', '.join([f'"{col}"' for col in columns])
+    source_columns = ', '.join([f's."{col}"' for col in columns])
+    cursor = conn.execute(f'''
+        INSERT INTO "{table_name}" ({formatted_columns}, "first_snapshot_id", "last_snapshot_id")
+        SELECT {source_columns}, ?, ? FROM src."{table_name}" s
+        WHERE NOT EXISTS (SELECT 1 FROM "{table_name}" v WHERE {key_match} AND v."last_snapshot_id" = ?)
+    ''', (snapshot_id, snapshot_id, snapshot_id))
+    return carried, cursor.rowcount
+
+def compute_activity_deltas(conn, snapshot_id, prev_snapshot_id):
+    """
+    Store the activities that were added, removed or moved since the previous snapshot.
+
+    Activities are matched on project short name and activity ID (task_code),
+    so re-exported projects with new internal ids still line up. Slips are in
+    calendar days and positive when a date moved later.
+
+    Returns:
+        int: Number of delta rows stored.
+    """
+    current = ACTIVITY_STATE_SQL.format(snapshot=':snapshot_id')
+    previous = ACTIVITY_STATE_SQL.format(snapshot=':prev_snapshot_id')
+    delta_columns = '''
+               c.status_code, p.status_code,
+               c.start_date, p.start_date, julianday(c.start_date) - julianday(p.start_date),
+               c.end_date, p.end_date, julianday(c.end_date) - julianday(p.end_date),
+               c.total_float_hr_cnt, p.total_float_hr_cnt, c.total_float_hr_cnt - p.total_float_hr_cnt
+    '''
+    cursor = conn.execute(f'''
+        INSERT INTO "ACTIVITY_DELTA"
+        SELECT :snapshot_id, :prev_snapshot_id, c.proj_short_name, c.task_code, c.task_id, c.task_name,
+               CASE WHEN p.task_code IS NULL THEN 'added' ELSE 'changed' END, {delta_columns}
+        FROM ({current}) c
+        LEFT JOIN ({previous}) p ON p.proj_short_name = c.proj_short_name AND p.task_code = c.task_code
+        WHERE p.task_code IS NULL
+           OR c.start_date IS NOT p.start_date OR c.end_date IS NOT p.end_date
+           OR c.total_float_hr_cnt IS NOT p.total_float_hr_cnt OR c.status_code IS NOT p.status_code
+        UNION ALL
+        SELECT :snapshot_id, :prev_snapshot_id, p.proj_short_name, p.task_code, p.task_id, p.task_name,
+               'removed', {delta_columns}
+        FROM ({previous}) p
+        LEFT JOIN ({current}) c ON c.proj_short_name = p.proj_short_name AND c.task_code = p.task_code
+        WHERE c.task_code IS NULL
+    ''', {'snapshot_id': snapshot_id, 'prev_snapshot_id': prev_snapshot_id})
+    return cursor.rowcount
+
+def get_data_date(db_path):
+    """
+    Get the latest PROJECT.last_recalc_date of an imported XER database.
+
+    Returns:
+        str: The data date, or None if the database has no PROJECT table.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return conn.execute('SELECT MAX("last_recalc_date") FROM "PROJECT"').fetchone()[0]
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+def get_content_hash(db_path):
+    """
+    Hash the rows of the snapshot tables of an imported XER database.
+
+    Re-importing the same XER file gives the same hash, while a new update
+    written over the same database file gives a new one.
+
+    Returns:
+        str: Hex digest of the table contents.
+    """
+    digest = hashlib.sha256()
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        for table_name in SNAPSHOT_TABLES:
+            columns = get_table_columns(conn, 'main', table_name)
+            if not columns:
+                continue
+            order = ', '.join([f'"{col}"' for col in get_primary_key(table_name, columns) or columns])
+            digest.update(f"{table_name}\t{columns}\n".encode('utf-8'))
+            for row in conn.execute(f'SELECT * FROM "{table_name}" ORDER BY {order}'):
+                digest.update(repr(row).encode('utf-8'))
+    finally:
+        conn.close()
+    return digest.hexdigest()
+
+def add_snapshot(conn, db_path, snapshot_name, data_date, source_hash=None):
+    """
+    Add an imported XER database to the snapshot store as the newest snapshot.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection from open_snapshot_store.
+        db_path (str): Path to the imported database.
+        snapshot_name (str): Name of the snapshot, e.g. the XER file name.
+        data_date (str): Data date of the snapshot.
+        source_hash (str): Content hash of the database, from get_content_hash.
+
+    Returns:
+        int: The new snapshot id, or None if it was not added.
+    """
+    latest = conn.execute(
+        'SELECT snapshot_id, data_date FROM "SNAPSHOT" ORDER BY snapshot_id DESC LIMIT 1'
+    ).fetchone()
+    prev_snapshot_id, prev_data_date = latest if latest else (0, None)
+    if prev_data_date and data_date and data_date < prev_data_date:
+        print(f"Error: {snapshot_name} (data date {data_date}) is older than the latest snapshot "
+              f"({prev_data_date}). Rebuild the store with --rebuild to insert it in order.")
+        return None
+
+    snapshot_id = prev_snapshot_id + 1
+    conn.execute('ATTACH DATABASE ? AS src', (f"file:{db_path}?mode=ro",))
+    try:
+        conn.execute(
+            'INSERT INTO "SNAPSHOT" ("snapshot_id", "snapshot_name", "data_date", "source_database", '
+            '"imported_date", "source_hash") VALUES (?, ?, ?, ?, ?, ?)',
+            (snapshot_id, snapshot_name, data_date, os.path.basename(db_path),
+             datetime.now().strftime("%Y-%m-%d %H:%M"), source_hash)
+        )
+        for table_name in SNAPSHOT_TABLES:
+            counts = add_table_versions(conn, table_name, snapshot_id, prev_snapshot_id)
+            if counts:
+                print(f'  {table_name}: {counts[0]} rows unchanged, {counts[1]} new or changed.')
+        deltas = compute_activity_deltas(conn, snapshot_id, prev_snapshot_id) if prev_snapshot_id else 0
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        print(f"Error adding snapshot {snapshot_name}: {e}")
+        return None
+    finally:
+        conn.execute('DETACH DATABASE src')
+    print(f"Added snapshot {snapshot_id} ({snapshot_name}, data date {data_date}) with {deltas} activity changes.")
+    return snapshot_id
+
+def update_snapshot_store(database_dir, rebuild=False):
+    """
+    Add every imported XER database that is not yet in the snapshot store, oldest data date first.
+
+    Databases are matched to snapshots on their content hash, so a database
+    file overwritten by a later import is added again. A file name already
+    used by a snapshot gets the file's modification time appended to its
+    snapshot name.
+
+    Parameters:
+        database_dir (str): Directory holding the *_database.db files.
+        rebuild (bool): Delete the store and add every database again.
+    """
+    store_path = os.path.join(database_dir, STORE_FILE_NAME)
+    if rebuild and os.path.exists(store_path):
+        os.remove(store_path)
+    conn = open_snapshot_store(store_path)
+    try:
+        snapshots = conn.execute('SELECT snapshot_name, source_hash FROM "SNAPSHOT"').fetchall()
+        known_names = {row[0] for row in snapshots}
+        known_hashes = {row[1] for row in snapshots}
+        candidates = []
+        for db_file in sorted(os.listdir(database_dir)):
+            if not db_file.endswith('_database.db'):
+                continue
+            db_path = os.path.join(database_dir, db_file)
+            data_date = get_data_date(db_path)
+            if data_date is None:
+                # Not an XER import, e.g. a PDF database
+                continue
+            source_hash = get_content_hash(db_path)
+            if source_hash in known_hashes:
+                continue
+            snapshot_name = db_file[:-len('_database.db')]
+            if snapshot_name in known_names:
+                modified = datetime.fromtimestamp(os.path.getmtime(db_path))
+                snapshot_name = f"{snapshot_name} {modified.strftime('%Y-%m-%d %H:%M:%S')}"
+            candidates.append((data_date, snapshot_name, db_file, source_hash))
+
+        if not candidates:
+            print("Snapshot store is up to date.")
+        for data_date, snapshot_name, db_file, source_hash in sorted(candidates):
+            print(f"Adding {db_file} to the snapshot store...")
+            add_snapshot(conn, os.path.join(database_dir, db_file), snapshot_name, data_date, source_hash)
+    finally:
+        conn.close()
+
+def parse_args():
+    """
+    Parse command line options for the snapshot store.
+    """
+    parser = argparse.ArgumentParser(description="Combine imported XER databases into one snapshot store.")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Recreate the store from every imported database.")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    update_snapshot_store(os.path.join(os.getcwd(), "Database"), args.rebuild)
+
+if __name__ == "__main__":
+    main()
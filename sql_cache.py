@@ -0,0 +1,154 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+
+CACHE_DIR_NAME = "Query_Cache"
+CACHE_FILE_NAME = "sql_cache.sqlite"
+DEFAULT_TTL_DAYS = 30
+DEFAULT_MAX_ENTRIES = 5000
+
+# Politeness and filler that do not change what is being asked
+FILLER_PREFIXES = re.compile(r'^(please |can you |could you |show me |tell me |give me |list me )+')
+
+def normalize_question(question):
+    """
+    Normalize a question so trivially different phrasings share a cache entry.
+
+    Case, repeated whitespace, surrounding punctuation and leading filler such
+    as "please show me" are ignored. Values like dates and activity IDs are kept.
+
+    Parameters:
+        question (str): The user's natural language question.
+
+    Returns:
+        str: The normalized question.
+    """
+    normalized = re.sub(r'[^\w\s\-.:/%<>=]', ' ', question.lower())
+    normalized = ' '.join(normalized.split()).strip(' .')
+    return FILLER_PREFIXES.sub('', normalized)
+
+def get_schema_fingerprint(conn):
+    """
+    Hash the schema of a database so cached SQL is dropped when tables or columns change.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to the queried database.
+
+    Returns:
+        str: Hex digest of the CREATE statements of all tables.
+    """
+    rows = conn.execute("SELECT name, sql FROM sqlite_master WHERE type='table' ORDER BY name").fetchall()
+    return hashlib.sha256(repr(rows).encode('utf-8')).hexdigest()
+
+def open_sql_cache(cache_path):
+    """
+    Open (and create if needed) the persistent cache of generated SQL.
+
+    Parameters:
+        cache_path (str): Path to the cache database file.
+
+    Returns:
+        sqlite3.Connection: Connection to the cache.
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    conn = sqlite3.connect(cache_path)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sql_cache (
+            cache_key TEXT PRIMARY KEY,
+            question TEXT,
+            sql_query TEXT,
+            created_at REAL,
+            last_used REAL,
+            hit_count INTEGER DEFAULT 0
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sql_cache_last_used ON sql_cache (last_used)')
+    conn.execute('CREATE TABLE IF NOT EXISTS cache_stats (name TEXT PRIMARY KEY, value INTEGER)')
+    conn.commit()
+    return conn
+
+def get_cache_key(question, schema_fingerprint, model):
+    """
+    Build the cache key for a question asked against a schema with a given model.
+    """
+    key = '\n'.join([normalize_question(question), schema_fingerprint, model])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+def increment_stat(conn, name):
+    """
+    Add one to a persistent cache counter.
+    """
+    conn.execute(
+        'INSERT INTO cache_stats (name, value) VALUES (?, 1) ON CONFLICT (name) DO UPDATE SET value = value + 1',
+        (name,)
+    )
+
+def lookup_sql(conn, cache_key, ttl_days=DEFAULT_TTL_DAYS):
+    """
+    Look up cached SQL and record a hit or miss.
+
+    Parameters:
+        conn (sqlite3.Connection): Cache connection from open_sql_cache.
+        cache_key (str): Key from get_cache_key.
+        ttl_days (float): Entries older than this are treated as missing and removed.
+
+    Returns:
+        str: The cached SQL query, or None on a miss.
+    """
+    now = time.time()
+    row = conn.execute('SELECT sql_query, created_at FROM sql_cache WHERE cache_key = ?', (cache_key,)).fetchone()
+    if row and now - row[1] > ttl_days * 86400:
+        conn.execute('DELETE FROM sql_cache WHERE cache_key = ?', (cache_key,))
+        row = None
+
+    if row:
+        conn.execute('UPDATE sql_cache SET last_used = ?, hit_count = hit_count + 1 WHERE cache_key = ?',
+                     (now, cache_key))
+        increment_stat(conn, 'hits')
+    else:
+        increment_stat(conn, 'misses')
+    conn.commit()
+    return row[0] if row else None
+
+def store_sql(conn, cache_key, question, sql_query, max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    Store generated SQL and evict the least recently used entries beyond max_entries.
+
+    Parameters:
+        conn (sqlite3.Connection): Cache connection from open_sql_cache.
+        cache_key (str): Key from get_cache_key.
+        question (str): The original question, kept for inspection.
+        sql_query (str): The generated SQL.
+        max_entries (int): Maximum number of cached queries.
+    """
+    now = time.time()
+    conn.execute(
+        'INSERT OR REPLACE INTO sql_cache (cache_key, question, sql_query, created_at, last_used) VALUES (?, ?, ?, ?, ?)',
+        (cache_key, question, sql_query, now, now)
+    )
+    conn.execute(
+        'DELETE FROM sql_cache WHERE cache_key IN '
+        '(SELECT cache_key FROM sql_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+        (max_entries,)
+    )
+    conn.commit()
+
+def invalidate_sql(conn, cache_key):
+    """
+    Remove a cached query, e.g. because it failed to execute.
+    """
+    conn.execute('DELETE FROM sql_cache WHERE cache_key = ?', (cache_key,))
+    conn.commit()
+
+def get_cache_stats(conn):
+    """
+    Get the hit and miss counters and the number of cached queries.
+
+    Returns:
+        dict: ``hits``, ``misses`` and ``entries``.
+    """
+    stats = dict(conn.execute('SELECT name, value FROM cache_stats').fetchall())
+    entries = conn.execute('SELECT COUNT(*) FROM sql_cache').fetchone()[0]
+    return {'hits': stats.get('hits', 0), 'misses': stats.get('misses', 0), 'entries': entries}
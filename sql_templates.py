@@ -0,0 +1,314 @@
+import re
+import sqlite3
+from datetime import datetime
+
+# Days are converted to hours with the activity calendar's day_hr_cnt, or this when it is missing
+DEFAULT_DAY_HOURS = 8
+
+# Dates as planners type them: 2024-03-01, 01-Mar-24, 1 Mar 2024 or 03/01/2024
+DATE = r'\d{4}-\d{2}-\d{2}|\d{1,2}[-\s][A-Za-z]{3}[-\s]\d{2,4}|\d{1,2}/\d{1,2}/\d{4}'
+DATE_FORMATS = ('%Y-%m-%d', '%d-%b-%y', '%d-%b-%Y', '%d %b %y', '%d %b %Y', '%m/%d/%Y')
+# An activity ID, after the word "activity" or "task" unless it contains a digit (e.g. A1010)
+ACTIVITY = r'(?:(?:the\s+)?(?:activity|task)\s+(?:id\s+)?|(?=\S*\d))["\']?(?P<activity>[A-Za-z0-9][\w.\-/]*?)["\']?'
+# Words that qualify a question further than a template can answer, e.g. "... by status" or "... and A1020"
+QUALIFIERS = (r'and|or|with|without|where|whose|that|which|per|each|by|group|grouped|sorted|ordered|order|having|'
+              r'except|excluding|count|total|sum|average')
+# A WBS, OBS or resource name up to the end of the question. Unquoted names stop at a qualifier, so
+# "WBS 1.2 grouped by status" does not match; quoted names may contain anything but quotes.
+NAME = (r'(?:"(?P<quoted_name>[^"]+)"|\'(?P<single_quoted_name>[^\']+)\'|'
+        r'(?P<name>(?:(?!\s+(?:' + QUALIFIERS + r')\b)[^"\'])+?))')
+ACTIVITIES = r'(?:(?:open|incomplete|remaining|the|all)\s+)*(?:activities|tasks)\b'
+# The words a listing question may start with: "Which", "What are the", "List all", "Show me"...
+LEAD = (r'^\s*(?:(?:which|what|list|show|find|give|get|display)(?:\s+(?:me|us))?(?:\s+(?:are|were|is))?'
+        r'(?:\s+(?:all|the|any))*\s+)?')
+# "that start", "which are scheduled to finish", "will begin"...
+ACTIVITY_VERB = r'\s+(?:(?:that|which)\s+)?(?:(?:will|are\s+(?:scheduled|planned|due)\s+to)\s+)?'
+END = r'\s*[?.!]*\s*$'
+
+COMPARISONS = {
+    'less than': '<', 'lower than': '<', 'fewer than': '<', 'below': '<', 'under': '<', '<': '<',
+    'at most': '<=', 'no more than': '<=', '<=': '<=',
+    'more than': '>', 'greater than': '>', 'above': '>', 'over': '>', '>': '>',
+    'at least': '>=', 'no less than': '>=', '>=': '>=',
+}
+COMPARISON = '|'.join(re.escape(phrase) for phrase in sorted(COMPARISONS, key=len, reverse=True))
+DATE_EVENTS = {'start': 'start', 'begin': 'start', 'finish': 'end', 'end': 'end', 'complet': 'end'}
+
+# Float of an activity in days of its own calendar
+FLOAT_DAYS = f'TASK."total_float_hr_cnt" / COALESCE(NULLIF(CALENDAR."day_hr_cnt", 0), {DEFAULT_DAY_HOURS})'
+
+def question_pattern(body):
+    """
+    Compile a template pattern that must match the whole question, from an
+    optional lead-in to the closing punctuation. Anything the pattern does not
+    consume, such as a grouping or an extra filter, leaves the question to the LLM.
+    """
+    return re.compile(LEAD + body + END, re.IGNORECASE)
+
+def get_name(match):
+    """
+    Get the WBS, OBS or resource name of a match, with its quotes removed.
+    """
+    return next(match.group(group) for group in ('quoted_name', 'single_quoted_name', 'name')
+                if match.group(group) is not None).strip()
+
+def sql_literal(value):
+    """
+    Format a template parameter as a SQL literal.
+    """
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+def parse_date(text):
+    """
+    Parse a date in one of DATE_FORMATS to 'YYYY-MM-DD'.
+
+    Raises:
+        ValueError: If the text is not a date in a known format.
+    """
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date: {text}")
+
+def build_float_query(match):
+    """
+    Open activities whose total float compares to a number of days (or hours).
+    """
+    if match.groupdict().get('comparison'):
+        operator = COMPARISONS[match.group('comparison').lower()]
+        value = float(match.group('value'))
+        if (match.group('unit') or 'd').lower().startswith('h'):
+            condition = f'TASK."total_float_hr_cnt" {operator} :value'
+        else:
+            condition = f'{FLOAT_DAYS} {operator} :value'
+    else:
+        # Negative float
+        value = 0
+        condition = 'TASK."total_float_hr_cnt" < :value'
+    sql_query = f'''SELECT TASK."task_code", TASK."task_name", {FLOAT_DAYS} AS "total_float_days",
+       TASK."early_start_date", TASK."early_end_date"
+FROM "TASK"
+LEFT JOIN "CALENDAR" ON CALENDAR."clndr_id" = TASK."clndr_id"
+WHERE TASK."status_code" <> 'TK_Complete' AND {condition}
+ORDER BY TASK."total_float_hr_cnt", TASK."task_code"'''
+    return sql_query, {'value': value}
+
+def build_wbs_query(match):
+    """
+    Activities in a WBS element, given by code or name, and in the elements below it,
+    read as a range of the element's WBS_TREE interval.
+    """
+    sql_query = '''SELECT PROJWBS."wbs_short_name", PROJWBS."wbs_name", TASK."task_code", TASK."task_name",
+       TASK."status_code", TASK."early_start_date", TASK."early_end_date"
+FROM "WBS_TREE" AS "parent"
+JOIN "WBS_TREE" ON WBS_TREE."lft" BETWEEN "parent"."lft" AND "parent"."rgt"
+JOIN "TASK" ON TASK."wbs_id" = WBS_TREE."wbs_id"
+JOIN "PROJWBS" ON PROJWBS."wbs_id" = TASK."wbs_id"
+WHERE "parent"."wbs_id" IN (
+    SELECT "wbs_id" FROM "PROJWBS"
+    WHERE "wbs_short_name" = :wbs COLLATE NOCASE OR "wbs_name" = :wbs COLLATE NOCASE
+)
+ORDER BY TASK."early_start_date", TASK."task_code"'''
+    return sql_query, {'wbs': get_name(match)}
+
+def build_wbs_recursive_query(match):
+    """
+    The WBS template for databases imported before WBS_TREE existed, walking parent_wbs_id.
+    """
+    sql_query = '''WITH RECURSIVE "wbs_tree"("wbs_id") AS (
+    SELECT "wbs_id" FROM "PROJWBS"
+    WHERE "wbs_short_name" = :wbs COLLATE NOCASE OR "wbs_name" = :wbs COLLATE NOCASE
+    UNION
+    SELECT PROJWBS."wbs_id" FROM "PROJWBS" JOIN "wbs_tree" ON PROJWBS."parent_wbs_id" = "wbs_tree"."wbs_id"
+)
+SELECT PROJWBS."wbs_short_name", PROJWBS."wbs_name", TASK."task_code", TASK."task_name", TASK."status_code",
+       TASK."early_start_date", TASK."early_end_date"
+FROM "TASK"
+JOIN "PROJWBS" ON PROJWBS."wbs_id" = TASK."wbs_id"
+WHERE TASK."wbs_id" IN (SELECT "wbs_id" FROM "wbs_tree")
+ORDER BY TASK."early_start_date", TASK."task_code"'''
+    return sql_query, {'wbs': get_name(match)}
+
+def build_obs_query(match):
+    """
+    Activities in the WBS elements whose responsible manager is an OBS node, given by
+    name, or a node below it.
+    """
+    sql_query = '''SELECT OBS_TREE."obs_path", PROJWBS."wbs_short_name", TASK."task_code", TASK."task_name",
+       TASK."status_code", TASK."early_start_date", TASK."early_end_date"
+FROM "OBS_TREE" AS "parent"
+JOIN "OBS_TREE" ON OBS_TREE."lft" BETWEEN "parent"."lft" AND "parent"."rgt"
+JOIN "PROJWBS" ON PROJWBS."obs_id" = OBS_TREE."obs_id"
+JOIN "TASK" ON TASK."wbs_id" = PROJWBS."wbs_id"
+WHERE "parent"."obs_id" IN (SELECT "obs_id" FROM "OBS" WHERE "obs_name" = :obs COLLATE NOCASE)
+ORDER BY TASK."early_start_date", TASK."task_code"'''
+    return sql_query, {'obs': get_name(match)}
+
+def build_date_query(match):
+    """
+    Activities starting or finishing between two dates, or before, after or on a date.
+
+    Actual dates are used for started and finished activities, early dates otherwise.
+    """
+    event = DATE_EVENTS[match.group('event').lower()]
+    date_column = f'COALESCE(TASK."act_{event}_date", TASK."early_{event}_date")'
+    if match.groupdict().get('until'):
+        condition = f'{date_column} >= :start AND {date_column} < date(:until, \'+1 day\')'
+        params = {'start': parse_date(match.group('start')), 'until': parse_date(match.group('until'))}
+    else:
+        when = match.group('when').lower()
+        date = parse_date(match.group('date'))
+        condition = {
+            'before': f'{date_column} < :date',
+            'by': f'{date_column} < date(:date, \'+1 day\')',
+            'after': f'{date_column} >= date(:date, \'+1 day\')',
+            'on': f'{date_column} >= :date AND {date_column} < date(:date, \'+1 day\')',
+        }[when]
+        params = {'date': date}
+    sql_query = f'''SELECT TASK."task_code", TASK."task_name", TASK."status_code",
+       COALESCE(TASK."act_start_date", TASK."early_start_date") AS "start_date",
+       COALESCE(TASK."act_end_date", TASK."early_end_date") AS "finish_date"
+FROM "TASK"
+WHERE {condition}
+ORDER BY {date_column}, TASK."task_code"'''
+    return sql_query, params
+
+def build_relationship_query(match, direction):
+    """
+    Predecessors or successors of an activity, with relationship type and lag.
+    """
+    own, other = ('task_id', 'pred_task_id') if direction == 'predecessor' else ('pred_task_id', 'task_id')
+    sql_query = f'''SELECT RELATED."task_code" AS "{direction}_task_code",
+       RELATED."task_name" AS "{direction}_task_name", TASKPRED."pred_type", TASKPRED."lag_hr_cnt",
+       RELATED."status_code", TASK."task_code", TASK."task_name"
+FROM "TASK"
+JOIN "TASKPRED" ON TASKPRED."{own}" = TASK."task_id"
+JOIN "TASK" AS RELATED ON RELATED."task_id" = TASKPRED."{other}"
+WHERE TASK."task_code" = :activity COLLATE NOCASE
+ORDER BY RELATED."task_code"'''
+    return sql_query, {'activity': match.group('activity')}
+
+def build_assignment_query(match):
+    """
+    Resources assigned to an activity, with budgeted, remaining and actual units.
+    """
+    sql_query = '''SELECT RSRC."rsrc_short_name", RSRC."rsrc_name", TASKRSRC."target_qty", TASKRSRC."remain_qty",
+       TASKRSRC."act_reg_qty", TASK."task_code", TASK."task_name"
+FROM "TASK"
+JOIN "TASKRSRC" ON TASKRSRC."task_id" = TASK."task_id"
+JOIN "RSRC" ON RSRC."rsrc_id" = TASKRSRC."rsrc_id"
+WHERE TASK."task_code" = :activity COLLATE NOCASE
+ORDER BY RSRC."rsrc_short_name"'''
+    return sql_query, {'activity': match.group('activity')}
+
+def build_resource_query(match):
+    """
+    Activities a resource, given by code or name, is assigned to.
+    """
+    sql_query = '''SELECT TASK."task_code", TASK."task_name", RSRC."rsrc_short_name", TASKRSRC."target_qty",
+       TASKRSRC."remain_qty", TASK."early_start_date", TASK."early_end_date"
+FROM "TASKRSRC"
+JOIN "RSRC" ON RSRC."rsrc_id" = TASKRSRC."rsrc_id"
+JOIN "TASK" ON TASK."task_id" = TASKRSRC."task_id"
+WHERE RSRC."rsrc_short_name" = :resource COLLATE NOCASE OR RSRC."rsrc_name" = :resource COLLATE NOCASE
+ORDER BY TASK."early_start_date", TASK."task_code"'''
+    return sql_query, {'resource': get_name(match)}
+
+def build_count_query(match):
+    """
+    Number of activities.
+    """
+    return 'SELECT COUNT(*) AS "activity_count" FROM "TASK"', {}
+
+WBS_PATTERN = question_pattern(ACTIVITIES + r'\s+(?:are\s+)?(?:in|under|within|of|for|belonging\s+to)\s+'
+                               r'(?:the\s+)?wbs(?:\s+element)?\s+' + NAME)
+FLOAT_PATTERN = (r'(?:\s+(?:that|which))?\s+(?:have|has|with)\s+(?:a\s+)?(?:total\s+)?(?:float|slack)\s+'
+                 r'(?:of\s+|is\s+)?(?P<comparison>' + COMPARISON + r')\s*(?P<value>-?\d+(?:\.\d+)?)\s*'
+                 r'(?P<unit>days?|d|hours?|hrs?|h)?')
+EVENT = r'(?P<event>start|begin|finish|end|complet)\w*'
+
+# (name, pattern, builder) in matching order; the first template whose pattern matches the whole
+# question and whose SQL compiles against the database answers it
+SQL_TEMPLATES = [
+    ('negative_float', question_pattern(r'(?:' + ACTIVITIES + r'(?:\s+(?:that|which))?\s+(?:have|has|with)\s+'
+                                        r'(?:a\s+)?negative\s+(?:total\s+)?float|negative\s+(?:total\s+)?float\s+'
+                                        + ACTIVITIES + r')'), build_float_query),
+    ('float', question_pattern(ACTIVITIES + FLOAT_PATTERN), build_float_query),
+    ('wbs', WBS_PATTERN, build_wbs_query),
+    ('wbs', WBS_PATTERN, build_wbs_recursive_query),
+    ('obs', question_pattern(ACTIVITIES + r'\s+(?:are\s+)?(?:in|under|within|of|for|belonging\s+to|managed\s+by)\s+'
+                             r'(?:the\s+)?obs(?:\s+(?:node|element))?\s+' + NAME), build_obs_query),
+    ('date_range', question_pattern(ACTIVITIES + ACTIVITY_VERB + EVENT + r'\s+between\s+(?P<start>' + DATE +
+                                    r')\s+and\s+(?P<until>' + DATE + r')'), build_date_query),
+    ('date', question_pattern(ACTIVITIES + ACTIVITY_VERB + EVENT + r'\s+(?P<when>before|after|by|on)\s+(?P<date>' +
+                              DATE + r')'), build_date_query),
+    ('predecessors', question_pattern(r'(?:the\s+)?predecessors?\s+(?:of|for|to)\s+' + ACTIVITY),
+     lambda match: build_relationship_query(match, 'predecessor')),
+    ('successors', question_pattern(r'(?:the\s+)?successors?\s+(?:of|for|to)\s+' + ACTIVITY),
+     lambda match: build_relationship_query(match, 'successor')),
+    ('assignments', question_pattern(r'(?:the\s+)?resources?\s+(?:are\s+)?(?:assigned\s+)?(?:to|on|of|for)\s+' +
+                                     ACTIVITY), build_assignment_query),
+    ('resource', question_pattern(ACTIVITIES + r'\s+(?:are\s+)?(?:assigned\s+to|using|use|with|for)\s+'
+                                  r'(?:the\s+)?resource\s+' + NAME), build_resource_query),
+    ('count', re.compile(r'^\s*how\s+many\s+(?:activities|tasks)(?:\s+(?:are\s+there|in\s+total|are\s+in\s+the\s+'
+                         r'(?:project|schedule)|in\s+the\s+(?:project|schedule)|does\s+the\s+(?:project|schedule)'
+                         r'\s+have))?' + END, re.IGNORECASE), build_count_query),
+]
+
+def render_sql(sql_query, params):
+    """
+    Put the parameters of a template into its SQL as literals, so the query
+    can be shown, exported and re-run like generated SQL.
+    """
+    if not params:
+        return sql_query
+    names = '|'.join(re.escape(name) for name in params)
+    return re.sub(r':(' + names + r')\b', lambda match: sql_literal(params[match.group(1)]), sql_query)
+
+def is_valid_sql(conn, sql_query):
+    """
+    Check that a query compiles against the database, i.e. its tables and columns exist.
+    """
+    try:
+        conn.execute("EXPLAIN " + sql_query).fetchall()
+        return True
+    except sqlite3.Error:
+        return False
+
+def match_sql_template(question, conn=None):
+    """
+    Answer a common question with a parameterized SQL template instead of the LLM.
+
+    Templates cover open activities by total float, activities in a WBS
+    element or under an OBS node, activities starting or finishing in a date
+    range, predecessors and successors of an activity, resource assignments
+    and the number of activities. A template must match the whole question,
+    so a question with anything more (a grouping, a count, another filter)
+    goes to the LLM. It is also only used when its SQL compiles against the
+    database, so e.g. a PDF database without TASKPRED falls back to the LLM.
+
+    Parameters:
+        question (str): The user's natural language question.
+        conn (sqlite3.Connection): Connection used to check the SQL; not checked when None.
+
+    Returns:
+        tuple: (template name, SQL query), or None if no template answers the question.
+    """
+    question = question.strip()
+    for name, pattern, build in SQL_TEMPLATES:
+        match = pattern.match(question)
+        if not match:
+            continue
+        try:
+            sql_query = render_sql(*build(match))
+        except ValueError:
+            # E.g. a date that only looks like one
+            continue
+        if conn is not None and not is_valid_sql(conn, sql_query):
+            continue
+        return name, sql_query
+    return None
@@ -0,0 +1,445 @@
+import os
+import base64
+import random
+import argparse
+from datetime import datetime, timedelta
+
+XER_ENCODING = "cp1252"
+PROJECT_ID = 1000
+CALENDAR_ID = 100
+RESOURCE_COUNT = 50
+# Activities per lowest-level WBS node
+ACTIVITIES_PER_WBS = 100
+# Predecessors are picked from this many activities back, so paths stay long but not one chain
+PREDECESSOR_WINDOW = 20
+SCHEDULE_START = datetime(2024, 1, 1, 8, 0)  # a Monday
+HOURS_PER_DAY = 8
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+TABLE_FIELDS = {
+    "CURRTYPE": ['curr_id', 'decimal_digit_cnt', 'curr_symbol', 'decimal_symbol', 'digit_group_symbol', 'pos_curr_fmt_type',
+                 'neg_curr_fmt_type', 'curr_type', 'curr_short_name', 'group_digit_cnt', 'base_exch_rate'],
+    "PROJECT": ['proj_id', 'fy_start_month_num', 'rsrc_self_add_flag', 'allow_complete_flag', 'rsrc_multi_assign_flag',
+                'checkout_flag', 'project_flag', 'step_complete_flag', 'cost_qty_recalc_flag', 'batch_sum_flag',
+                'name_sep_char', 'def_complete_pct_type', 'proj_short_name', 'acct_id', 'orig_proj_id', 'source_proj_id',
+                'base_type_id', 'clndr_id', 'sum_base_proj_id', 'task_code_base', 'task_code_step', 'priority_num',
+                'wbs_max_sum_level', 'strgy_priority_num', 'last_checksum', 'critical_drtn_hr_cnt', 'def_cost_per_qty',
+                'last_recalc_date', 'plan_start_date', 'plan_end_date', 'scd_end_date', 'add_date', 'last_tasksum_date',
+                'fcst_start_date', 'def_duration_type', 'task_code_prefix', 'guid', 'def_qty_type', 'add_by_name',
+                'web_local_root_path', 'proj_url', 'def_rate_type', 'add_act_remain_flag', 'act_this_per_link_flag',
+                'def_task_type', 'act_pct_link_flag', 'critical_path_type', 'task_code_prefix_flag',
+                'def_rollup_dates_flag', 'use_project_baseline_flag', 'rem_target_link_flag', 'reset_planned_flag',
+                'allow_neg_act_flag', 'sum_assign_level', 'last_fin_dates_id', 'last_baseline_update_date',
+                'cr_external_key', 'apply_actuals_date', 'location_id', 'loaded_scope_level', 'export_flag',
+                'new_fin_dates_id', 'next_data_date', 'close_period_flag', 'sum_refresh_date', 'trsrcsum_loaded'],
+    "CALENDAR": ['clndr_id', 'default_flag', 'clndr_name', 'proj_id', 'base_clndr_id', 'last_chng_date', 'clndr_type',
+                 'day_hr_cnt', 'week_hr_cnt', 'month_hr_cnt', 'year_hr_cnt', 'rsrc_private', 'clndr_data'],
+    "SCHEDOPTIONS": ['schedoptions_id', 'proj_id', 'sched_outer_depend_type', 'sched_open_critical_flag',
+                     'sched_lag_early_start_flag', 'sched_retained_logic', 'sched_setplantoforecast',
+                     'sched_float_type', 'sched_calendar_on_relationship_lag', 'sched_use_expect_end_flag',
+                     'sched_progress_override', 'level_float_thrs_cnt', 'level_outer_assign_flag',
+                     'level_outer_assign_priority', 'level_over_alloc_pct', 'level_within_float_flag',
+                     'level_keep_sched_date_flag', 'level_all_rsrc_flag', 'sched_use_project_end_date_for_float',
+                     'enable_multiple_longest_path_calc', 'limit_multiple_longest_path_calc',
+                     'max_multiple_longest_path', 'use_total_float_multiple_longest_paths',
+                     'key_activity_for_multiple_longest_paths', 'LevelPriorityList'],
+    "PROJWBS": ['wbs_id', 'proj_id', 'obs_id', 'seq_num', 'proj_node_flag', 'sum_data_flag', 'status_code',
+                'wbs_short_name', 'wbs_name', 'phase_id', 'parent_wbs_id', 'ev_user_pct', 'ev_etc_user_value',
+                'orig_cost', 'indep_remain_total_cost', 'ann_dscnt_rate_pct', 'dscnt_period_type',
+                'indep_remain_work_qty', 'anticip_start_date', 'anticip_end_date', 'ev_compute_type',
+                'ev_etc_compute_type', 'guid', 'tmpl_guid', 'plan_open_state'],
+    "RSRC": ['rsrc_id', 'parent_rsrc_id', 'clndr_id', 'role_id', 'shift_id', 'user_id', 'pobs_id', 'guid',
+             'rsrc_seq_num', 'email_addr', 'employee_code', 'office_phone', 'other_phone', 'rsrc_name',
+             'rsrc_short_name', 'rsrc_title_name', 'def_qty_per_hr', 'cost_qty_type', 'ot_factor', 'active_flag',
+             'auto_compute_act_flag', 'def_cost_qty_link_flag', 'ot_flag', 'curr_id', 'unit_id', 'rsrc_type',
+             'location_id', 'rsrc_notes', 'load_tasks_flag', 'level_flag', 'last_checksum'],
+    "TASK": ['task_id', 'proj_id', 'wbs_id', 'clndr_id', 'phys_complete_pct', 'rev_fdbk_flag', 'lock_plan_flag',
+             'auto_compute_act_flag', 'complete_pct_type', 'task_type', 'duration_type', 'status_code', 'task_code',
+             'task_name', 'rsrc_id', 'total_float_hr_cnt', 'free_float_hr_cnt', 'remain_drtn_hr_cnt', 'act_work_qty',
+             'remain_work_qty', 'target_work_qty', 'target_drtn_hr_cnt', 'target_equip_qty', 'act_equip_qty',
+             'remain_equip_qty', 'cstr_date', 'act_start_date', 'act_end_date', 'late_start_date', 'late_end_date',
+             'expect_end_date', 'early_start_date', 'early_end_date', 'restart_date', 'reend_date',
+             'target_start_date', 'target_end_date', 'rem_late_start_date', 'rem_late_end_date', 'cstr_type',
+             'priority_type', 'suspend_date', 'resume_date', 'float_path', 'float_path_order', 'guid', 'tmpl_guid',
+             'cstr_date2', 'cstr_type2', 'driving_path_flag', 'act_this_per_work_qty', 'act_this_per_equip_qty',
+             'external_early_start_date', 'external_late_end_date', 'create_date', 'update_date', 'create_user',
+             'update_user', 'location_id'],
+    "TASKPRED": ['task_pred_id', 'task_id', 'pred_task_id', 'proj_id', 'pred_proj_id', 'pred_type', 'lag_hr_cnt',
+                 'float_path', 'aref', 'arls'],
+    "TASKRSRC": ['taskrsrc_id', 'task_id', 'proj_id', 'cost_qty_link_flag', 'role_id', 'acct_id', 'rsrc_id', 'pobs_id',
+                 'skill_level', 'remain_qty', 'target_qty', 'remain_qty_per_hr', 'target_lag_drtn_hr_cnt',
+                 'target_qty_per_hr', 'act_ot_qty', 'act_reg_qty', 'relag_drtn_hr_cnt', 'ot_factor', 'cost_per_qty',
+                 'target_cost', 'act_reg_cost', 'act_ot_cost', 'remain_cost', 'act_start_date', 'act_end_date',
+                 'restart_date', 'reend_date', 'target_start_date', 'target_end_date', 'rem_late_start_date',
+                 'rem_late_end_date', 'rollup_dates_flag', 'target_crv', 'remain_crv', 'actual_crv',
+                 'ts_pend_act_end_flag', 'guid', 'rate_type', 'act_this_per_cost', 'act_this_per_qty', 'curv_id',
+                 'rsrc_type', 'cost_per_qty_source_type', 'create_user', 'create_date', 'has_rsrchours',
+                 'taskrsrc_sum_id'],
+}
+
+# Monday to Friday, 08:00-16:00, in P6's clndr_data notation (days are numbered from Sunday = 1)
+WORK_DAY_DATA = "(0||{day}()(\x7f\x7f      (0||0(s|08:00|f|16:00)())))"
+CALENDAR_DATA = (
+    "(0||CalendarData()(\x7f\x7f  (0||DaysOfWeek()(\x7f\x7f    "
+    + "\x7f\x7f    ".join(WORK_DAY_DATA.format(day=day) if 2 <= day <= 6 else f"(0||{day}()())" for day in range(1, 8))
+    + "))\x7f\x7f  (0||VIEW(ShowTotal|Y)())\x7f\x7f  (0||Exceptions()()))"
+)
+
+PDF_COLUMNS = ['Activity ID', 'Activity Name', 'Company', 'Original Duration',
+               'RD', 'Start Date', 'Finish Date', 'Total Float']
+PDF_COLUMN_WIDTHS = [70, 220, 80, 80, 45, 90, 90, 60]
+PDF_PAGE_WIDTH = 792
+PDF_PAGE_HEIGHT = 612
+PDF_MARGIN = 30
+PDF_ROW_HEIGHT = 12
+PDF_FONT_SIZE = 7
+PDF_DATE_FORMAT = "%d-%b-%y"
+
+def work_hours_to_date(work_hours, finish=False):
+    """
+    Convert working hours from the schedule start to a date on the Monday-Friday 8-hour calendar.
+
+    Finish dates that fall on a day boundary are placed at the end of the
+    previous working day, as P6 shows them.
+    """
+    if finish and work_hours > 0:
+        return work_hours_to_date(work_hours - 1) + timedelta(hours=1)
+    days, hours = divmod(int(work_hours), HOURS_PER_DAY)
+    weeks, weekday = divmod(days, 5)
+    return SCHEDULE_START + timedelta(days=weeks * 7 + weekday, hours=hours)
+
+def make_guid(rng):
+    """
+    Make a random P6-style GUID (22 characters of base64).
+    """
+    return base64.b64encode(rng.getrandbits(128).to_bytes(16, "little")).decode("ascii")[:22]
+
+def make_row(table_name, values):
+    """
+    Build an XER %R line from a dict of field values; missing fields are left blank.
+    """
+    return "%R\t" + "\t".join(str(values.get(field, "")) for field in TABLE_FIELDS[table_name]) + "\n"
+
+def iter_activities(activity_count, seed=0):
+    """
+    Generate synthetic activities in topological order.
+
+    Parameters:
+        activity_count (int): Number of activities.
+        seed (int): Seed for the random generator, so runs are repeatable.
+
+    Yields:
+        dict: Activity index, duration, early start/finish and predecessor indexes.
+    """
+    rng = random.Random(seed)
+    early_finish = []
+    for index in range(activity_count):
+        predecessors = set()
+        if index:
+            predecessors.add(index - 1 - rng.randrange(min(index, PREDECESSOR_WINDOW)))
+            if index > 1 and rng.random() < 0.5:
+                predecessors.add(index - 1 - rng.randrange(min(index, PREDECESSOR_WINDOW)))
+        duration = HOURS_PER_DAY * rng.randint(1, 10)
+        start = max((early_finish[pred] for pred in predecessors), default=0)
+        early_finish.append(start + duration)
+        yield {
+            "index": index,
+            "duration": duration,
+            "start": start,
+            "finish": start + duration,
+            "predecessors": sorted(predecessors),
+            "total_float": HOURS_PER_DAY * rng.choice((0, 0, 1, 2, 5, 10)),
+        }
+
+def generate_xer(xer_file_path, activity_count, seed=0):
+    """
+    Write a synthetic single-project XER file with the given number of activities.
+
+    The file has the tables the importers and derived tables use (PROJECT,
+    CALENDAR, SCHEDOPTIONS, PROJWBS, RSRC, TASK, TASKPRED, TASKRSRC) with the same %F
+    headers as a P6 export. Rows are streamed to disk, so files with millions
+    of activities can be generated in constant memory.
+
+    Parameters:
+        xer_file_path (str): Path of the .xer file to write.
+        activity_count (int): Number of activities (TASK rows).
+        seed (int): Seed for the random generator, so runs are repeatable.
+
+    Returns:
+        dict: Row counts keyed by table name.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(xer_file_path)), exist_ok=True)
+    rng = random.Random(seed)
+    wbs_count = max(1, -(-activity_count // ACTIVITIES_PER_WBS))
+    project_end = work_hours_to_date(activity_count * HOURS_PER_DAY, finish=True)
+    now = SCHEDULE_START.strftime(DATE_FORMAT)
+    counts = {}
+
+    with open(xer_file_path, "w", encoding=XER_ENCODING, newline="") as xer_file:
+        def write_table(table_name, rows):
+            xer_file.write(f"%T\t{table_name}\n%F\t" + "\t".join(TABLE_FIELDS[table_name]) + "\n")
+            count = 0
+            for row in rows:
+                xer_file.write(make_row(table_name, row))
+                count += 1
+            counts[table_name] = count
+
+        xer_file.write("ERMHDR\t8.2\t2024-01-01\tProject\tadmin\tadmin\tdbxDatabaseNoName\tProject Management\tUSD\n")
+        write_table("CURRTYPE", [{
+            "curr_id": 1, "decimal_digit_cnt": 2, "curr_symbol": "$", "decimal_symbol": ".", "digit_group_symbol": ",",
+            "pos_curr_fmt_type": "#1.1", "neg_curr_fmt_type": "(#1.1)", "curr_type": "US Dollar",
+            "curr_short_name": "USD", "group_digit_cnt": 3, "base_exch_rate": 1,
+        }])
+        write_table("PROJECT", [{
+            "proj_id": PROJECT_ID, "fy_start_month_num": 1, "rsrc_self_add_flag": "Y", "allow_complete_flag": "Y",
+            "rsrc_multi_assign_flag": "Y", "checkout_flag": "N", "project_flag": "Y", "step_complete_flag": "N",
+            "cost_qty_recalc_flag": "N", "batch_sum_flag": "Y", "name_sep_char": ".", "def_complete_pct_type": "CP_Drtn",
+            "proj_short_name": f"SYN-{activity_count}", "clndr_id": CALENDAR_ID, "task_code_base": 1000,
+            "task_code_step": 10, "priority_num": 10, "wbs_max_sum_level": 2, "strgy_priority_num": 500,
+            "critical_drtn_hr_cnt": 0, "def_cost_per_qty": "0.00", "last_recalc_date": now, "plan_start_date": now,
+            "scd_end_date": project_end.strftime(DATE_FORMAT), "add_date": now, "def_duration_type": "DT_FixedDUR2",
+            "task_code_prefix": "A", "guid": make_guid(rng), "def_qty_type": "QT_Hour", "add_by_name": "admin",
+            "def_rate_type": "COST_PER_QTY", "add_act_remain_flag": "N", "act_this_per_link_flag": "Y",
+            "def_task_type": "TT_Task", "act_pct_link_flag": "Y", "critical_path_type": "CT_TotFloat",
+            "task_code_prefix_flag": "Y", "def_rollup_dates_flag": "Y", "use_project_baseline_flag": "Y",
+            "rem_target_link_flag": "Y", "reset_planned_flag": "N", "allow_neg_act_flag": "N",
+            "sum_assign_level": "SL_Taskrsrc", "loaded_scope_level": 7, "export_flag": "Y",
+        }])
+        write_table("CALENDAR", [{
+            "clndr_id": CALENDAR_ID, "default_flag": "Y", "clndr_name": "Standard 5 Day", "last_chng_date": now,
+            "clndr_type": "CA_Base", "day_hr_cnt": HOURS_PER_DAY, "week_hr_cnt": 5 * HOURS_PER_DAY,
+            "month_hr_cnt": 172, "year_hr_cnt": 2000, "rsrc_private": "N", "clndr_data": CALENDAR_DATA,
+        }])
+        write_table("SCHEDOPTIONS", [{
+            "schedoptions_id": 1, "proj_id": PROJECT_ID, "sched_outer_depend_type": "SD_Both",
+            "sched_open_critical_flag": "N", "sched_lag_early_start_flag": "Y", "sched_retained_logic": "Y",
+            "sched_setplantoforecast": "N", "sched_float_type": "FT_FF",
+            "sched_calendar_on_relationship_lag": "rcal_Predecessor", "sched_use_expect_end_flag": "Y",
+            "sched_progress_override": "N", "level_float_thrs_cnt": 0, "level_outer_assign_flag": "N",
+            "level_outer_assign_priority": 5, "level_over_alloc_pct": 25, "level_within_float_flag": "N",
+            "level_keep_sched_date_flag": "Y", "level_all_rsrc_flag": "Y", "sched_use_project_end_date_for_float": "Y",
+            "enable_multiple_longest_path_calc": "N", "limit_multiple_longest_path_calc": "Y",
+            "max_multiple_longest_path": 10, "use_total_float_multiple_longest_paths": "Y",
+            "LevelPriorityList": "priority_type,ASC\x7f\x7f",
+        }])
+        # One project node with one WBS node per ACTIVITIES_PER_WBS activities
+        project_wbs_id = 1
+        write_table("PROJWBS", ({
+            "wbs_id": wbs_id, "proj_id": PROJECT_ID, "seq_num": wbs_id * 10,
+            "proj_node_flag": "Y" if wbs_id == project_wbs_id else "N", "sum_data_flag": "N", "status_code": "WS_Open",
+            "wbs_short_name": f"SYN-{activity_count}" if wbs_id == project_wbs_id else f"W{wbs_id - 1:05d}",
+            "wbs_name": "Synthetic project" if wbs_id == project_wbs_id else f"Work package {wbs_id - 1}",
+            "parent_wbs_id": "" if wbs_id == project_wbs_id else project_wbs_id, "ev_user_pct": 6,
+            "ev_etc_user_value": "0.88", "orig_cost": "0.00", "indep_remain_total_cost": "0.00",
+            "ev_compute_type": "EC_Cmp_pct", "ev_etc_compute_type": "EE_Rem_hr", "guid": make_guid(rng),
+        } for wbs_id in range(project_wbs_id, project_wbs_id + wbs_count + 1)))
+        write_table("RSRC", ({
+            "rsrc_id": rsrc_id, "clndr_id": CALENDAR_ID, "guid": make_guid(rng), "rsrc_seq_num": rsrc_id,
+            "rsrc_name": f"Resource {rsrc_id}", "rsrc_short_name": f"R{rsrc_id:03d}", "def_qty_per_hr": 1,
+            "cost_qty_type": "QT_Hour", "active_flag": "Y", "auto_compute_act_flag": "Y", "def_cost_qty_link_flag": "Y",
+            "ot_flag": "N", "curr_id": 1, "rsrc_type": "RT_Labor",
+        } for rsrc_id in range(1, RESOURCE_COUNT + 1)))
+
+        # Activities are generated once per table from the same seed, so nothing is held in memory
+        def task_rows():
+            for activity in iter_activities(activity_count, seed):
+                start = work_hours_to_date(activity["start"]).strftime(DATE_FORMAT)
+                finish = work_hours_to_date(activity["finish"], finish=True).strftime(DATE_FORMAT)
+                late_start = work_hours_to_date(activity["start"] + activity["total_float"]).strftime(DATE_FORMAT)
+                late_finish = work_hours_to_date(activity["finish"] + activity["total_float"], finish=True)
+                late_finish = late_finish.strftime(DATE_FORMAT)
+                yield {
+                    "task_id": activity["index"] + 1, "proj_id": PROJECT_ID,
+                    "wbs_id": project_wbs_id + 1 + activity["index"] // ACTIVITIES_PER_WBS, "clndr_id": CALENDAR_ID,
+                    "phys_complete_pct": 0, "rev_fdbk_flag": "N", "lock_plan_flag": "N", "auto_compute_act_flag": "N",
+                    "complete_pct_type": "CP_Drtn", "task_type": "TT_Task", "duration_type": "DT_FixedDUR2",
+                    "status_code": "TK_NotStart", "task_code": f"A{activity['index'] + 1:07d}",
+                    "task_name": f"Synthetic activity {activity['index'] + 1}",
+                    "total_float_hr_cnt": activity["total_float"], "free_float_hr_cnt": 0,
+                    "remain_drtn_hr_cnt": activity["duration"], "act_work_qty": 0, "remain_work_qty": activity["duration"],
+                    "target_work_qty": activity["duration"], "target_drtn_hr_cnt": activity["duration"],
+                    "target_equip_qty": 0, "act_equip_qty": 0, "remain_equip_qty": 0,
+                    "late_start_date": late_start, "late_end_date": late_finish,
+                    "early_start_date": start, "early_end_date": finish, "restart_date": start, "reend_date": finish,
+                    "target_start_date": start, "target_end_date": finish,
+                    "rem_late_start_date": late_start, "rem_late_end_date": late_finish, "priority_type": "PT_Normal",
+                    "guid": make_guid(rng), "driving_path_flag": "Y" if activity["total_float"] == 0 else "N",
+                    "act_this_per_work_qty": 0, "act_this_per_equip_qty": 0, "create_date": now, "update_date": now,
+                    "create_user": "admin", "update_user": "admin",
+                }
+        write_table("TASK", task_rows())
+
+        def taskpred_rows():
+            task_pred_id = 0
+            for activity in iter_activities(activity_count, seed):
+                for pred in activity["predecessors"]:
+                    task_pred_id += 1
+                    yield {
+                        "task_pred_id": task_pred_id, "task_id": activity["index"] + 1, "pred_task_id": pred + 1,
+                        "proj_id": PROJECT_ID, "pred_proj_id": PROJECT_ID, "pred_type": "PR_FS", "lag_hr_cnt": 0,
+                        "aref": now, "arls": now,
+                    }
+        write_table("TASKPRED", taskpred_rows())
+
+        def taskrsrc_rows():
+            for activity in iter_activities(activity_count, seed):
+                start = work_hours_to_date(activity["start"]).strftime(DATE_FORMAT)
+                finish = work_hours_to_date(activity["finish"], finish=True).strftime(DATE_FORMAT)
+                cost = f"{activity['duration'] * 30:.2f}"
+                yield {
+                    "taskrsrc_id": activity["index"] + 1, "task_id": activity["index"] + 1, "proj_id": PROJECT_ID,
+                    "cost_qty_link_flag": "Y", "rsrc_id": 1 + activity["index"] % RESOURCE_COUNT,
+                    "remain_qty": activity["duration"], "target_qty": activity["duration"], "remain_qty_per_hr": 1,
+                    "target_lag_drtn_hr_cnt": 0, "target_qty_per_hr": 1, "act_ot_qty": 0, "act_reg_qty": 0,
+                    "relag_drtn_hr_cnt": 0, "cost_per_qty": "30.00", "target_cost": cost, "act_reg_cost": "0.00",
+                    "act_ot_cost": "0.00", "remain_cost": cost, "restart_date": start, "reend_date": finish,
+                    "target_start_date": start, "target_end_date": finish, "rollup_dates_flag": "Y",
+                    "ts_pend_act_end_flag": "N", "guid": make_guid(rng), "rate_type": "COST_PER_QTY",
+                    "act_this_per_cost": "0.00", "act_this_per_qty": 0, "rsrc_type": "RT_Labor",
+                    "cost_per_qty_source_type": "ST_Rsrc", "create_user": "admin", "create_date": now,
+                }
+        write_table("TASKRSRC", taskrsrc_rows())
+        xer_file.write("%E\n")
+    return counts
+
+def pdf_escape(text):
+    """
+    Escape a string for use inside a PDF literal string.
+    """
+    return str(text).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def build_pdf_page(project_name, rows):
+    """
+    Build the content stream of one schedule page: a ruled table whose first
+    row holds the project name, second row the column headers, then the activities.
+    """
+    table_width = sum(PDF_COLUMN_WIDTHS)
+    top = PDF_PAGE_HEIGHT - PDF_MARGIN
+    row_count = len(rows) + 2
+    bottom = top - row_count * PDF_ROW_HEIGHT
+    left = PDF_MARGIN
+    right = left + table_width
+    column_edges = [left]
+    for width in PDF_COLUMN_WIDTHS:
+        column_edges.append(column_edges[-1] + width)
+
+    commands = ["0.5 w"]
+    # Horizontal rules for every row boundary
+    for row in range(row_count + 1):
+        y = top - row * PDF_ROW_HEIGHT
+        commands.append(f"{left} {y} m {right} {y} l S")
+    # The title row is one merged cell; the other rows are split into columns
+    commands.append(f"{left} {top} m {left} {bottom} l S")
+    commands.append(f"{right} {top} m {right} {bottom} l S")
+    for x in column_edges[1:-1]:
+        commands.append(f"{x} {top - PDF_ROW_HEIGHT} m {x} {bottom} l S")
+
+    def add_text(x, row, text):
+        y = top - (row + 1) * PDF_ROW_HEIGHT + 3
+        commands.append(f"BT /F1 {PDF_FONT_SIZE} Tf {x + 2} {y} Td ({pdf_escape(text)}) Tj ET")
+
+    add_text(left, 0, project_name)
+    for row, values in enumerate([PDF_COLUMNS] + rows, 1):
+        for x, value in zip(column_edges, values):
+            add_text(x, row, value)
+    return "\n".join(commands).encode("latin-1")
+
+def generate_pdf(pdf_file_path, activity_count, rows_per_page=40, seed=0):
+    """
+    Write a synthetic P6-style activity table report as a PDF.
+
+    Every page repeats the project name and column headers above its rows,
+    the layout parse_pdf_to_sql expects. The PDF is written by hand (Helvetica,
+    ruled cells) so no PDF library is needed, and pages are streamed to disk.
+
+    Parameters:
+        pdf_file_path (str): Path of the .pdf file to write.
+        activity_count (int): Number of activity rows.
+        rows_per_page (int): Activity rows per page.
+        seed (int): Seed for the random generator, so runs are repeatable.
+
+    Returns:
+        int: Number of pages written.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(pdf_file_path)), exist_ok=True)
+    project_name = f"Synthetic Project {activity_count}"
+    offsets = {}
+    page_ids = []
+
+    with open(pdf_file_path, "wb") as pdf_file:
+        def write_object(object_id, body, stream=None):
+            offsets[object_id] = pdf_file.tell()
+            pdf_file.write(f"{object_id} 0 obj\n".encode("ascii"))
+            if stream is None:
+                pdf_file.write(body.encode("ascii") + b"\nendobj\n")
+            else:
+                pdf_file.write(f"<< /Length {len(stream)} >>\nstream\n".encode("ascii") + stream
+                               + b"\nendstream\nendobj\n")
+
+        pdf_file.write(b"%PDF-1.4\n")
+        write_object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+        write_object(3, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+        next_id = 4
+        page_rows = []
+
+        def write_page():
+            nonlocal next_id
+            page_id, content_id = next_id, next_id + 1
+            next_id += 2
+            write_object(content_id, None, build_pdf_page(project_name, page_rows))
+            write_object(page_id, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PDF_PAGE_WIDTH} {PDF_PAGE_HEIGHT}] "
+                                  f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+            page_ids.append(page_id)
+            page_rows.clear()
+
+        for activity in iter_activities(activity_count, seed):
+            days = activity["duration"] // HOURS_PER_DAY
+            page_rows.append([
+                f"A{activity['index'] + 1:07d}",
+                f"Synthetic activity {activity['index'] + 1}",
+                f"Company {activity['index'] % 7 + 1}",
+                f"{days}d",
+                f"{days}d",
+                work_hours_to_date(activity["start"]).strftime(PDF_DATE_FORMAT),
+                work_hours_to_date(activity["finish"], finish=True).strftime(PDF_DATE_FORMAT),
+                f"{activity['total_float'] // HOURS_PER_DAY}d",
+            ])
+            if len(page_rows) == rows_per_page:
+                write_page()
+        if page_rows or not page_ids:
+            write_page()
+
+        write_object(2, f"<< /Type /Pages /Kids [{' '.join(f'{page_id} 0 R' for page_id in page_ids)}] "
+                        f"/Count {len(page_ids)} >>")
+        xref_offset = pdf_file.tell()
+        pdf_file.write(f"xref\n0 {next_id}\n0000000000 65535 f \n".encode("ascii"))
+        for object_id in range(1, next_id):
+            pdf_file.write(f"{offsets[object_id]:010d} 00000 n \n".encode("ascii"))
+        pdf_file.write(f"trailer\n<< /Size {next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii"))
+    return len(page_ids)
+
+def parse_args():
+    """
+    Parse command line options for the synthetic schedule generator.
+    """
+    parser = argparse.ArgumentParser(description="Generate synthetic XER and PDF schedules for benchmarks.")
+    parser.add_argument("output", help="Path of the file to write; .xer or .pdf.")
+    parser.add_argument("--activities", type=int, default=10000, help="Number of activities to generate.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the random generator.")
+    parser.add_argument("--rows-per-page", type=int, default=40, help="Activity rows per page of a PDF.")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.output.lower().endswith(".pdf"):
+        pages = generate_pdf(args.output, args.activities, args.rows_per_page, args.seed)
+        print(f"Wrote {args.activities} activities on {pages} pages to: {args.output}")
+    elif args.output.lower().endswith(".xer"):
+        counts = generate_xer(args.output, args.activities, args.seed)
+        print(f"Wrote {', '.join(f'{count} {table}' for table, count in counts.items())} rows to: {args.output}")
+    else:
+        print("Error: output file must end in .xer or .pdf")
+
+if __name__ == "__main__":
+    main()
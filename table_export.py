@@ -0,0 +1,170 @@
+import os
+import csv
+import sqlite3
+
+EXPORT_FORMATS = ('csv', 'parquet', 'arrow')
+FILE_EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+# Rows per Parquet row group and per Arrow record batch
+ROW_GROUP_SIZE = 65536
+PARQUET_COMPRESSION = 'zstd'
+# DATETIME values that can be stored as timestamps, as a LIKE pattern
+DATETIME_PATTERN = '____-__-__ __:__'
+
+def import_pyarrow():
+    """
+    Import pyarrow, which is only needed for the Parquet and Arrow formats.
+
+    Returns:
+        module: The pyarrow module.
+
+    Raises:
+        RuntimeError: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+        import pyarrow.compute
+    except ImportError:
+        raise RuntimeError("Parquet and Arrow export require pyarrow (pip install pyarrow).")
+    return pyarrow
+
+def get_arrow_types(conn, table_name, columns):
+    """
+    Choose an Arrow type for each column from its declared SQLite type.
+
+    A column only gets a numeric or timestamp type when every stored value
+    fits it; anything else (e.g. text left in an INTEGER column) is exported
+    as a string so no value is lost. One scan of the table checks all columns.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to the database.
+        table_name (str): Table to export.
+        columns (list of tuple): Rows of PRAGMA table_info.
+
+    Returns:
+        list: pyarrow DataType per column.
+    """
+    pa = import_pyarrow()
+    candidates = {
+        'INTEGER': (pa.int64(), "typeof(\"{col}\") NOT IN ('integer', 'null')"),
+        'REAL': (pa.float64(), "typeof(\"{col}\") NOT IN ('real', 'integer', 'null')"),
+        'DATETIME': (pa.timestamp('s'), "\"{col}\" IS NOT NULL AND \"{col}\" NOT LIKE '" + DATETIME_PATTERN + "'"),
+        'BLOB': (pa.binary(), "typeof(\"{col}\") NOT IN ('blob', 'null')"),
+    }
+    checks = [candidates[col[2].upper()][1].format(col=col[1]) for col in columns if col[2].upper() in candidates]
+    mismatches = []
+    if checks:
+        row = conn.execute(f'SELECT {", ".join(f"MAX({check})" for check in checks)} FROM "{table_name}"').fetchone()
+        mismatches = list(row)
+
+    arrow_types = []
+    for col in columns:
+        declared = col[2].upper()
+        if declared in candidates:
+            mismatch = mismatches.pop(0)
+            arrow_types.append(pa.string() if mismatch else candidates[declared][0])
+        else:
+            arrow_types.append(pa.string())
+    return arrow_types
+
+def build_record_batch(rows, schema):
+    """
+    Convert fetched rows into an Arrow record batch with the given schema.
+    """
+    pa = import_pyarrow()
+    arrays = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if pa.types.is_timestamp(field.type):
+            arrays.append(pa.compute.strptime(pa.array(values, pa.string()), format='%Y-%m-%d %H:%M', unit='s'))
+        elif pa.types.is_string(field.type):
+            arrays.append(pa.array([None if value is None else str(value) for value in values], pa.string()))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def export_table(conn, table_name, output_path, export_format, batch_size=ROW_GROUP_SIZE):
+    """
+    Stream one SQLite table to a CSV, Parquet or Arrow IPC file.
+
+    Parquet files are zstd-compressed with one row group per batch_size rows.
+    Arrow IPC files are left uncompressed so they can be memory-mapped and
+    read without copying.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to the database.
+        table_name (str): Table to export.
+        output_path (str): Destination file.
+        export_format (str): One of EXPORT_FORMATS.
+        batch_size (int): Rows read and written at a time.
+
+    Returns:
+        int: Number of rows written.
+    """
+    columns = conn.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+    cursor = conn.execute(f'SELECT * FROM "{table_name}"')
+    row_count = 0
+    temp_path = f"{output_path}.tmp"
+    try:
+        if export_format == 'csv':
+            with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+                csv_writer = csv.writer(f, lineterminator='\n')
+                csv_writer.writerow([col[1] for col in columns])
+                for rows in iter(lambda: cursor.fetchmany(batch_size), []):
+                    csv_writer.writerows(rows)
+                    row_count += len(rows)
+        else:
+            pa = import_pyarrow()
+            schema = pa.schema([pa.field(col[1], arrow_type)
+                                for col, arrow_type in zip(columns, get_arrow_types(conn, table_name, columns))])
+            if export_format == 'parquet':
+                writer = pa.parquet.ParquetWriter(temp_path, schema, compression=PARQUET_COMPRESSION)
+            else:
+                writer = pa.ipc.new_file(temp_path, schema)
+            try:
+                for rows in iter(lambda: cursor.fetchmany(batch_size), []):
+                    writer.write_batch(build_record_batch(rows, schema))
+                    row_count += len(rows)
+            finally:
+                writer.close()
+        os.replace(temp_path, output_path)
+    finally:
+        cursor.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return row_count
+
+def export_sqlite_tables(sqlite_db_path, export_dir, export_format, tables=None, batch_size=ROW_GROUP_SIZE):
+    """
+    Export tables of a SQLite database, one file per table named <TABLE><extension>.
+
+    Parameters:
+        sqlite_db_path (str): Path to the SQLite database.
+        export_dir (str): Directory the files are written to.
+        export_format (str): One of EXPORT_FORMATS.
+        tables (list of str): Tables to export; every table when None.
+        batch_size (int): Rows read and written at a time (the Parquet row group size).
+
+    Returns:
+        bool: True if every table was exported, False otherwise.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    extension = FILE_EXTENSIONS[export_format]
+    conn = sqlite3.connect(f"file:{sqlite_db_path}?mode=ro", uri=True)
+    success = True
+    try:
+        if tables is None:
+            tables = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+        for table_name in tables:
+            output_path = os.path.join(export_dir, f"{table_name}{extension}")
+            try:
+                row_count = export_table(conn, table_name, output_path, export_format, batch_size)
+                print(f'Exported {row_count} rows of table "{table_name}" to: {output_path}')
+            except (RuntimeError, OSError, sqlite3.Error, ValueError) as e:
+                print(f"Error exporting table '{table_name}' as {export_format}: {e}")
+                success = False
+    finally:
+        conn.close()
+    return success
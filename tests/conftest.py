@@ -0,0 +1,43 @@
+import os
+import sqlite3
+import pytest
+from parse_xer_to_sql import parse_xer_to_sqlite_and_csv
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_XER = os.path.join(REPO_DIR, "XER_Data", "project.xer")
+
+@pytest.fixture(scope="session")
+def sample_database(tmp_path_factory):
+    """
+    Path to a database imported from the sample XER file with the default import.
+    """
+    work_dir = tmp_path_factory.mktemp("sample")
+    db_path = str(work_dir / "project_database.db")
+    parse_xer_to_sqlite_and_csv(SAMPLE_XER, db_path, str(work_dir / "csv"))
+    return db_path
+
+@pytest.fixture
+def sample_connection(sample_database):
+    """
+    Read-only connection to the imported sample database.
+    """
+    conn = sqlite3.connect(f"file:{sample_database}?mode=ro", uri=True)
+    yield conn
+    conn.close()
+
+def write_sample_without(path, *table_names):
+    """
+    Write a copy of the sample XER file with the given tables left out.
+    """
+    lines = []
+    skipping = False
+    with open(SAMPLE_XER, encoding="utf-8", errors="replace") as xer_file:
+        for line in xer_file:
+            if line.startswith("%T\t"):
+                skipping = line.rstrip("\r\n").split("\t")[1] in table_names
+            elif line.startswith("%E"):
+                skipping = False
+            if not skipping:
+                lines.append(line)
+    path.write_text("".join(lines), encoding="utf-8")
+    return str(path)
@@ -0,0 +1,71 @@
+import sqlite3
+import pytest
+from query_with_llm import (SOURCE_COLUMN, build_sql_messages, get_federated_ordering, order_federated_rows,
+                            run_federated_query, display_federated_results)
+
+@pytest.fixture
+def project_databases(tmp_path):
+    """
+    Two small project databases, the second with an extra TASK column.
+    """
+    floats = {"project1": [("A100", 40.0), ("A110", -8.0), ("A120", None)],
+              "project2": [("B100", 0.0), ("B110", 16.0), ("B120", -24.0)]}
+    db_paths = []
+    for project, tasks in floats.items():
+        db_path = str(tmp_path / f"{project}_database.db")
+        conn = sqlite3.connect(db_path)
+        extra = ', "extra" TEXT' if project == "project2" else ""
+        conn.execute(f'CREATE TABLE "TASK" ("task_code" TEXT, "total_float_hr_cnt" REAL{extra})')
+        conn.executemany('INSERT INTO "TASK" ("task_code", "total_float_hr_cnt") VALUES (?, ?)', tasks)
+        conn.commit()
+        conn.close()
+        db_paths.append(db_path)
+    return db_paths
+
+def get_merged_rows(sql_query, db_paths):
+    columns, rows, errors, _ = run_federated_query(sql_query, db_paths)
+    assert not errors
+    ordering = get_federated_ordering(sql_query, columns[1:])
+    return ordering, list(order_federated_rows(rows, ordering)) if ordering else rows
+
+def test_order_by_and_limit_apply_across_projects(project_databases):
+    sql_query = 'SELECT "task_code", "total_float_hr_cnt" FROM "TASK" ORDER BY "total_float_hr_cnt" LIMIT 2'
+    ordering, rows = get_merged_rows(sql_query, project_databases)
+    assert ordering is not None
+    # NULL sorts first, as in SQLite
+    assert [row[1] for row in rows] == ["A120", "B120"]
+
+@pytest.mark.parametrize("order_by, expected", [
+    ('2 DESC', ["A100", "B110", "B100", "A110", "B120", "A120"]),
+    ('t."total_float_hr_cnt" NULLS LAST', ["B120", "A110", "B100", "B110", "A100", "A120"]),
+    ('"task_code" DESC', ["B120", "B110", "B100", "A120", "A110", "A100"]),
+])
+def test_order_by_matches_sqlite(project_databases, order_by, expected):
+    sql_query = f'SELECT t."task_code", t."total_float_hr_cnt" FROM "TASK" t ORDER BY {order_by}'
+    _, rows = get_merged_rows(sql_query, project_databases)
+    assert [row[1] for row in rows] == expected
+
+@pytest.mark.parametrize("sql_query", [
+    'SELECT "task_code" FROM "TASK" ORDER BY "total_float_hr_cnt" LIMIT 2',
+    'SELECT "task_code" FROM "TASK" ORDER BY "task_code" LIMIT 2 OFFSET 1',
+])
+def test_ordering_that_cannot_be_merged_stays_per_project(sql_query):
+    assert get_federated_ordering(sql_query, ["task_code"]) is None
+
+def test_window_order_by_is_not_the_result_order():
+    sql_query = ('SELECT "task_code", RANK() OVER (ORDER BY "total_float_hr_cnt") AS "float_rank" '
+                 'FROM "TASK" LIMIT 5')
+    assert get_federated_ordering(sql_query, ["task_code", "float_rank"]) == ([], 5)
+
+def test_rejection_by_one_database_evicts_the_sql(project_databases, capsys):
+    rejected = []
+    display_federated_results('SELECT * FROM "TASK"', project_databases,
+                              on_rejected=lambda: rejected.append(True))
+    output = capsys.readouterr().out
+    assert rejected == [True]
+    assert "1 answered" in output and "1 failed" in output
+
+def test_prompt_describes_federated_mode(sample_database):
+    prompt = build_sql_messages("How many activities are there?", sample_database, federated=True)[0]["content"]
+    assert SOURCE_COLUMN in prompt and "per project" in prompt
+    assert SOURCE_COLUMN not in build_sql_messages("How many activities are there?", sample_database)[0]["content"]
@@ -0,0 +1,28 @@
+import sqlite3
+from parse_pdf_to_sql import parse_pdf_to_sqlite_and_csv
+from synthetic_schedule import generate_pdf
+
+def test_reimport_replaces_an_older_project_data_table(tmp_path, monkeypatch):
+    # PDF imports write their original tables under the working directory
+    monkeypatch.chdir(tmp_path)
+    pdf_path = str(tmp_path / "project.pdf")
+    generate_pdf(pdf_path, 30)
+    db_path = str(tmp_path / "project_database.db")
+    conn = sqlite3.connect(db_path)
+    # Layout of PDF databases built before the typed columns
+    conn.execute('CREATE TABLE "PROJECT_DATA" ("Start Date" TEXT, "Finish Date" TEXT, "Activity Name" TEXT, '
+                 '"Activity ID" TEXT)')
+    conn.execute('INSERT INTO "PROJECT_DATA" VALUES (\'01-Jan-20\', \'02-Jan-20\', \'Old\', \'OLD1\')')
+    conn.commit()
+    conn.close()
+
+    for _ in range(2):
+        parse_pdf_to_sqlite_and_csv(pdf_path, db_path, str(tmp_path / "csv"))
+
+    conn = sqlite3.connect(db_path)
+    columns = {row[1]: row[2] for row in conn.execute('PRAGMA table_info("PROJECT_DATA")')}
+    activity_ids = [row[0] for row in conn.execute('SELECT "Activity ID" FROM "PROJECT_DATA"')]
+    conn.close()
+    assert columns["Start Date"] == "DATETIME"
+    assert "OLD1" not in activity_ids
+    assert len(activity_ids) == len(set(activity_ids)) == 30
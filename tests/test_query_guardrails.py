@@ -0,0 +1,30 @@
+import pytest
+from query_guardrails import apply_default_limit, check_query_plan, estimate_table_rows, get_table_aliases
+
+def test_aliases_of_comma_joins_are_resolved():
+    aliases = get_table_aliases('SELECT * FROM "TASK" t, TASKPRED AS p, TASKRSRC r WHERE t.task_id = 1')
+    assert aliases['t'] == 'TASK'
+    assert aliases['p'] == 'TASKPRED'
+    assert aliases['r'] == 'TASKRSRC'
+
+def test_aliases_after_a_bracketed_join_condition_are_resolved():
+    aliases = get_table_aliases('SELECT * FROM TASK t JOIN PROJWBS w ON (w.wbs_id = t.wbs_id), RSRC r ORDER BY 1')
+    assert aliases['w'] == 'PROJWBS'
+    assert aliases['r'] == 'RSRC'
+
+def test_row_estimate_is_the_row_count_not_the_largest_key(sample_connection):
+    task_count = sample_connection.execute('SELECT COUNT(*) FROM "TASK"').fetchone()[0]
+    assert estimate_table_rows(sample_connection, 'TASK', {}) == task_count
+
+def test_cartesian_comma_join_is_rejected(sample_connection):
+    with pytest.raises(RuntimeError, match="Query rejected"):
+        check_query_plan(sample_connection, 'SELECT * FROM TASK t, TASKPRED p, TASKRSRC r')
+
+def test_keyed_join_is_allowed(sample_connection):
+    sql_query = ('SELECT t.task_code FROM TASK t, TASKPRED p, TASKRSRC r '
+                 'WHERE p.task_id = t.task_id AND r.task_id = t.task_id')
+    assert check_query_plan(sample_connection, sql_query) == []
+
+def test_default_limit_is_added_once():
+    assert apply_default_limit('SELECT * FROM TASK;', 10) == 'SELECT * FROM TASK\nLIMIT 10'
+    assert apply_default_limit('SELECT * FROM TASK LIMIT 5', 10) == 'SELECT * FROM TASK LIMIT 5'
@@ -0,0 +1,51 @@
+import sqlite3
+import pytest
+from schedule_hierarchy import build_hierarchy_tables
+
+# (wbs_id, parent_wbs_id, seq_num, wbs_short_name); 7 and 8 are each other's parent
+WBS_NODES = [
+    (1, 100, 10, "P"), (2, 1, 20, "A"), (3, 1, 10, "B"), (4, 2, 10, "A1"), (5, 2, 20, "A2"),
+    (6, 4, None, "A1X"), (7, 8, 10, "L1"), (8, 7, 10, "L2"),
+]
+
+@pytest.fixture
+def wbs_connection(capsys):
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE "PROJWBS" ("wbs_id" INTEGER PRIMARY KEY, "parent_wbs_id" INTEGER, '
+                 '"seq_num" INTEGER, "wbs_short_name" TEXT)')
+    conn.executemany('INSERT INTO "PROJWBS" VALUES (?, ?, ?, ?)', WBS_NODES)
+    build_hierarchy_tables(conn)
+    yield conn
+    conn.close()
+
+def get_tree(conn, tree_table="WBS_TREE", id_column="wbs_id"):
+    return {row[0]: row[1:] for row in conn.execute(f'SELECT "{id_column}", depth, lft, rgt FROM "{tree_table}"')}
+
+def test_nested_set_intervals_match_the_closure_table(wbs_connection):
+    tree = get_tree(wbs_connection)
+    for node, (depth, lft, rgt) in tree.items():
+        under_interval = {other for other, (_, other_lft, _) in tree.items() if lft <= other_lft <= rgt}
+        under_closure = {row[0] for row in wbs_connection.execute(
+            'SELECT wbs_id FROM "WBS_CLOSURE" WHERE ancestor_wbs_id = ?', (node,))}
+        assert under_interval == under_closure
+        assert rgt - lft + 1 == len(under_closure)
+        assert depth == wbs_connection.execute(
+            'SELECT MAX(depth) FROM "WBS_CLOSURE" WHERE wbs_id = ?', (node,)).fetchone()[0]
+
+def test_tree_follows_p6_order_and_paths(wbs_connection):
+    order = [row[0] for row in wbs_connection.execute('SELECT wbs_id FROM "WBS_TREE" ORDER BY lft')]
+    assert order == [1, 3, 2, 4, 6, 5]
+    assert sorted(lft for _, lft, _ in get_tree(wbs_connection).values()) == list(range(1, 7))
+    paths = dict(wbs_connection.execute('SELECT wbs_id, wbs_path FROM "WBS_TREE"'))
+    assert paths[6] == "P.A.A1.A1X"
+
+def test_parent_loop_is_left_out_of_the_tree(wbs_connection, capsys):
+    assert "2 PROJWBS nodes are on a parent loop" in capsys.readouterr().out
+    assert not {7, 8} & set(get_tree(wbs_connection))
+
+def test_sample_trees_hold_every_node(sample_connection):
+    for source, tree_table, id_column in (("PROJWBS", "WBS_TREE", "wbs_id"), ("OBS", "OBS_TREE", "obs_id")):
+        source_count = sample_connection.execute(f'SELECT COUNT(*) FROM "{source}"').fetchone()[0]
+        tree = get_tree(sample_connection, tree_table, id_column)
+        assert len(tree) == source_count
+        assert sorted(lft for _, lft, _ in tree.values()) == list(range(1, source_count + 1))
@@ -0,0 +1,38 @@
+import sqlite3
+from query_with_llm import build_sql_messages
+from schedule_network import build_network_tables
+
+def test_logic_only_float_matches_p6_on_the_unconstrained_sample(sample_connection):
+    # The sample has one calendar and no constraints, so the logic-only pass reproduces P6
+    rows = sample_connection.execute('''
+        SELECT t.task_code, t.total_float_hr_cnt, c.total_float_hr_cnt
+        FROM "TASK" t JOIN "CPM_TASK" c ON c.task_id = t.task_id
+        WHERE t.status_code <> 'TK_Complete' AND t.total_float_hr_cnt IS NOT NULL
+    ''').fetchall()
+    assert rows
+    mismatches = [row for row in rows if abs(row[1] - row[2]) > 0.01]
+    assert mismatches == []
+
+def test_critical_path_is_in_schedule_order(sample_connection):
+    starts = [row[0] for row in sample_connection.execute(
+        'SELECT early_start_hr_cnt FROM "CPM_CRITICAL_PATH" ORDER BY path_seq')]
+    assert starts and starts == sorted(starts)
+
+def test_relationship_loop_is_left_without_dates(capsys):
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE "TASK" (task_id INTEGER PRIMARY KEY, remain_drtn_hr_cnt REAL, target_drtn_hr_cnt REAL)')
+    conn.execute('CREATE TABLE "TASKPRED" (task_pred_id INTEGER PRIMARY KEY, task_id INTEGER, pred_task_id INTEGER, '
+                 'pred_type TEXT, lag_hr_cnt REAL)')
+    conn.executemany('INSERT INTO "TASK" VALUES (?, ?, ?)', [(1, 8, 8), (2, 8, 8), (3, 8, 8), (4, 8, 8)])
+    conn.executemany('INSERT INTO "TASKPRED" VALUES (?, ?, ?, ?, ?)',
+                     [(1, 2, 1, 'PR_FS', 0), (2, 3, 2, 'PR_FS', 0), (3, 2, 3, 'PR_FS', 0), (4, 4, 1, 'PR_FS', 0)])
+    assert build_network_tables(conn)
+    assert "relationship loop" in capsys.readouterr().out
+    dates = dict(conn.execute('SELECT task_id, early_start_hr_cnt FROM "CPM_TASK"'))
+    assert dates[1] == 0 and dates[4] == 8
+    assert dates[2] is None and dates[3] is None
+
+def test_prompt_takes_float_from_task_not_cpm(sample_database):
+    system_prompt = build_sql_messages("Which activities are critical?", sample_database)[0]["content"]
+    assert 'TASK."total_float_hr_cnt"' in system_prompt
+    assert "Do not take float from the CPM tables" in system_prompt
@@ -0,0 +1,68 @@
+import sqlite3
+import pytest
+from parse_xer_to_sql import parse_xer_to_sqlite_and_csv, stream_xer_to_sqlite_and_csv
+from synthetic_schedule import generate_xer
+from tests.conftest import write_sample_without
+
+@pytest.fixture(scope="module")
+def synthetic_database(tmp_path_factory):
+    """
+    Path to a database imported from a synthetic XER with one WBS node per few activities.
+    """
+    work_dir = tmp_path_factory.mktemp("synthetic")
+    xer_path = str(work_dir / "synthetic.xer")
+    generate_xer(xer_path, 300)
+    db_path = str(work_dir / "synthetic_database.db")
+    parse_xer_to_sqlite_and_csv(xer_path, db_path, str(work_dir / "csv"))
+    return db_path
+
+@pytest.fixture(params=["sample_database", "synthetic_database"])
+def rollup_connection(request):
+    conn = sqlite3.connect(request.getfixturevalue(request.param))
+    yield conn
+    conn.close()
+
+def test_wbs_rollup_adds_up_its_children(rollup_connection):
+    rollups = {row[0]: row[1:] for row in rollup_connection.execute(
+        'SELECT wbs_id, task_count, target_qty FROM "WBS_ROLLUP"')}
+    own = dict(rollup_connection.execute('SELECT wbs_id, COUNT(*) FROM "TASK" GROUP BY wbs_id'))
+    for wbs_id, parent_wbs_id in rollup_connection.execute('SELECT wbs_id, parent_wbs_id FROM "PROJWBS"'):
+        children = [row[0] for row in rollup_connection.execute(
+            'SELECT wbs_id FROM "PROJWBS" WHERE parent_wbs_id = ?', (wbs_id,))]
+        assert rollups[wbs_id][0] == own.get(wbs_id, 0) + sum(rollups[child][0] for child in children)
+
+def test_project_node_totals_match_the_schedule(rollup_connection):
+    task_count, target_qty = rollup_connection.execute('''
+        SELECT r.task_count, r.target_qty FROM "WBS_ROLLUP" r
+        JOIN "PROJWBS" w ON w.wbs_id = r.wbs_id WHERE w.proj_node_flag = 'Y'
+    ''').fetchone()
+    assert task_count == rollup_connection.execute('SELECT COUNT(*) FROM "TASK"').fetchone()[0]
+    assert target_qty == pytest.approx(
+        rollup_connection.execute('SELECT TOTAL(target_qty) FROM "TASKRSRC"').fetchone()[0])
+
+def test_resource_histogram_spreads_every_unit(rollup_connection):
+    rollup = dict(rollup_connection.execute('SELECT rsrc_id, target_qty FROM "RSRC_ROLLUP"'))
+    for period_type in ("week", "month"):
+        spread = dict(rollup_connection.execute(
+            'SELECT rsrc_id, TOTAL(target_qty) FROM "RSRC_HISTOGRAM" WHERE period_type = ? GROUP BY rsrc_id',
+            (period_type,)))
+        for rsrc_id, target_qty in rollup.items():
+            assert spread.get(rsrc_id, 0) == pytest.approx(target_qty, abs=0.01)
+
+@pytest.mark.parametrize("import_xer", [parse_xer_to_sqlite_and_csv, stream_xer_to_sqlite_and_csv])
+def test_expenses_roll_up_without_resource_assignments(import_xer, tmp_path, capsys):
+    xer_path = write_sample_without(tmp_path / "no_resources.xer", "TASKRSRC")
+    db_path = str(tmp_path / "project_database.db")
+    import_xer(xer_path, db_path, str(tmp_path / "csv"))
+    assert "Error" not in capsys.readouterr().out
+
+    conn = sqlite3.connect(db_path)
+    target_cost, target_qty = conn.execute('''
+        SELECT r.target_cost, r.target_qty FROM "WBS_ROLLUP" r
+        JOIN "PROJWBS" w ON w.wbs_id = r.wbs_id WHERE w.proj_node_flag = 'Y'
+    ''').fetchone()
+    expenses = conn.execute('SELECT TOTAL(target_cost) FROM "PROJCOST"').fetchone()[0]
+    conn.close()
+    assert expenses > 0
+    assert target_cost == pytest.approx(expenses)
+    assert target_qty == 0
@@ -0,0 +1,43 @@
+import sqlite3
+from parse_xer_to_sql import parse_xer_to_sqlite_and_csv
+from snapshot_store import STORE_FILE_NAME, update_snapshot_store
+from tests.conftest import SAMPLE_XER
+
+def get_snapshots(database_dir):
+    conn = sqlite3.connect(str(database_dir / STORE_FILE_NAME))
+    try:
+        return conn.execute('SELECT snapshot_name, source_hash FROM "SNAPSHOT" ORDER BY snapshot_id').fetchall()
+    finally:
+        conn.close()
+
+def test_overwritten_database_is_snapshotted_again(tmp_path, capsys):
+    database_dir = tmp_path / "Database"
+    database_dir.mkdir()
+    db_path = str(database_dir / "project_database.db")
+    parse_xer_to_sqlite_and_csv(SAMPLE_XER, db_path, str(tmp_path / "csv"))
+    update_snapshot_store(str(database_dir))
+    assert len(get_snapshots(database_dir)) == 1
+
+    # The same XER imported again is the same snapshot
+    parse_xer_to_sqlite_and_csv(SAMPLE_XER, db_path, str(tmp_path / "csv"))
+    capsys.readouterr()
+    update_snapshot_store(str(database_dir))
+    assert "up to date" in capsys.readouterr().out
+
+    # The next update written over the same file
+    conn = sqlite3.connect(db_path)
+    conn.execute('UPDATE "PROJECT" SET "last_recalc_date" = \'2099-01-01 08:00\'')
+    task_code = conn.execute('SELECT "task_code" FROM "TASK" ORDER BY "task_id" LIMIT 1').fetchone()[0]
+    conn.execute('UPDATE "TASK" SET "total_float_hr_cnt" = -40 WHERE "task_code" = ?', (task_code,))
+    conn.commit()
+    conn.close()
+    update_snapshot_store(str(database_dir))
+
+    snapshots = get_snapshots(database_dir)
+    assert len(snapshots) == 2
+    assert snapshots[0][0] == "project" and snapshots[1][0].startswith("project ")
+    assert snapshots[0][1] != snapshots[1][1]
+    conn = sqlite3.connect(str(database_dir / STORE_FILE_NAME))
+    deltas = conn.execute('SELECT task_code, float_change_hr_cnt FROM "ACTIVITY_DELTA" WHERE snapshot_id = 2').fetchall()
+    conn.close()
+    assert [row[0] for row in deltas] == [task_code]
@@ -0,0 +1,19 @@
+import pytest
+from query_with_llm import build_sql_messages
+
+def get_system_prompt(question, db_path):
+    return build_sql_messages(question, db_path)[0]["content"]
+
+@pytest.mark.parametrize("question, note", [
+    ("Which activities are on the longest path?", "CPM_CRITICAL_PATH: The longest chain"),
+    ("List the activities under WBS node 5", "WBS and OBS hierarchy indexes"),
+    ("Show the monthly histogram of each resource", "Precomputed rollups"),
+    ("How many working days does each calendar have in March?", "Calendar functions"),
+])
+def test_derived_table_note_follows_retrieval(sample_database, question, note):
+    assert note in get_system_prompt(question, sample_database)
+
+def test_unrelated_notes_are_left_out(sample_database):
+    system_prompt = get_system_prompt("List the expense items with their currency", sample_database)
+    for note in ("CPM_TASK", "WBS_CLOSURE", "RSRC_HISTOGRAM", "work_hours_between", "snapshot_store.db"):
+        assert note not in system_prompt
@@ -0,0 +1,38 @@
+import pytest
+from sql_templates import match_sql_template
+
+@pytest.mark.parametrize("question, template", [
+    ("Which activities have float less than 5 days?", "float"),
+    ("Show me all open activities with total float below 10 hours", "float"),
+    ("Which activities have negative float?", "negative_float"),
+    ("Activities in WBS W00001", "wbs"),
+    ("Which activities are in WBS 'Design and Build'?", "wbs"),
+    ("List all activities under the OBS node Civil", "obs"),
+    ("Which activities start between 2024-01-01 and 15-Jan-2024?", "date_range"),
+    ("Which activities finish before 2024-05-01?", "date"),
+    ("What are the predecessors of activity A1010?", "predecessors"),
+    ("Successors of A1010", "successors"),
+    ("Which resources are assigned to A1010?", "assignments"),
+    ("Which activities use the resource Welder?", "resource"),
+    ("How many activities are there?", "count"),
+])
+def test_plain_questions_use_a_template(question, template):
+    assert match_sql_template(question)[0] == template
+
+@pytest.mark.parametrize("question", [
+    "How many activities have negative float in each WBS?",
+    "Which activities with total float less than 5 days are in WBS 1.2?",
+    "Which activities have float less than 5 days in WBS 1.2?",
+    "How many activities are in WBS 1.2?",
+    "Which activities are in WBS 1.2 grouped by status?",
+    "Which activities start between 2024-01-01 and 2024-02-01 grouped by status?",
+    "Which activities use the resource Welder and finish before 2024-05-01?",
+    "How many predecessors of A1010 are critical?",
+    "What is the total float of A1010?",
+])
+def test_qualified_questions_go_to_the_llm(question):
+    assert match_sql_template(question) is None
+
+def test_template_parameters_are_literals():
+    _, sql_query = match_sql_template("Which activities are in WBS \"O'Brien Yard\"?")
+    assert "'O''Brien Yard'" in sql_query
@@ -0,0 +1,62 @@
+import sqlite3
+import pytest
+from work_calendar import register_calendar_functions
+
+# The sample calendar works 08:00-16:00 every day but Friday, with a 10 hour day_hr_cnt.
+# Its exceptions make 2001-01-06 (a Saturday) a day off and give 2001-04-02 (a Monday)
+# the periods 08:00-12:00 and 13:00-17:00.
+CALENDAR_ID = 6690
+
+@pytest.fixture
+def calendar_connection(sample_database):
+    conn = sqlite3.connect(f"file:{sample_database}?mode=ro", uri=True)
+    register_calendar_functions(conn)
+    yield conn
+    conn.close()
+
+def call(conn, sql, *args):
+    return conn.execute(f"SELECT {sql}", (CALENDAR_ID,) + args).fetchone()[0]
+
+@pytest.mark.parametrize("day, expected", [
+    ("2013-09-16", 1),  # Monday
+    ("2013-09-20", 0),  # Friday, off in the work week
+    ("2013-09-21", 1),  # Saturday, on in the work week
+    ("2001-01-06", 0),  # Saturday made a day off by an exception
+    ("2001-04-02", 1),
+])
+def test_is_work_day_follows_the_week_and_exceptions(calendar_connection, day, expected):
+    assert call(calendar_connection, "is_work_day(?, ?)", day) == expected
+
+@pytest.mark.parametrize("start, finish, expected", [
+    ("2013-09-16 08:00", "2013-09-17 08:00", 8),
+    ("2013-09-16 12:00", "2013-09-16 15:30", 3.5),
+    ("2013-09-19 00:00", "2013-09-22 00:00", 16),  # Friday adds nothing
+    ("2013-09-17 08:00", "2013-09-16 08:00", -8),
+    ("2001-04-02 00:00", "2001-04-03 00:00", 8),  # exception periods around a lunch break
+    ("2001-01-06 00:00", "2001-01-07 00:00", 0),
+])
+def test_work_hours_between(calendar_connection, start, finish, expected):
+    assert call(calendar_connection, "work_hours_between(?, ?, ?)", start, finish) == pytest.approx(expected)
+
+@pytest.mark.parametrize("start, hours, expected", [
+    ("2013-09-16 08:00", 8, "2013-09-16 16:00"),
+    ("2013-09-19 12:00", 6, "2013-09-21 10:00"),  # over the Friday off
+    ("2001-04-02 08:00", 5, "2001-04-02 14:00"),  # over the lunch break
+    ("2013-09-17 08:00", -8, "2013-09-16 08:00"),
+])
+def test_add_work_hours(calendar_connection, start, hours, expected):
+    assert call(calendar_connection, "add_work_hours(?, ?, ?)", start, hours) == expected
+
+def test_add_work_days_uses_the_calendar_day_length(calendar_connection):
+    # One day is 10 hours: the 8 working hours of Monday and 2 on Tuesday
+    assert call(calendar_connection, "add_work_days(?, ?, ?)", "2013-09-16 08:00", 1) == "2013-09-17 10:00"
+    assert call(calendar_connection, "work_days_between(?, ?, ?)", "2013-09-16 08:00", "2013-09-17 10:00") == 1
+
+@pytest.mark.parametrize("sql, args", [
+    ("add_work_hours(?, ?, ?)", ("2024-01-05 16:00", "abc")),
+    ("add_work_days(?, ?, ?)", ("2024-01-05 16:00", "abc")),
+    ("add_work_hours(?, ?, ?)", ("not a date", 4)),
+    ("work_hours_between(?, ?, ?)", ("2024-01-05 16:00", None)),
+])
+def test_bad_input_gives_null(calendar_connection, sql, args):
+    assert call(calendar_connection, sql, *args) is None
@@ -0,0 +1,100 @@
+import sqlite3
+import pytest
+from parse_xer_to_sql import parse_xer_to_sqlite_and_csv, stream_xer_to_sqlite_and_csv, bulk_load_xer_to_sqlite_and_csv
+from tests.conftest import SAMPLE_XER, write_sample_without
+
+def get_row_counts(db_path):
+    """
+    Row count of every table in a database, keyed by table name.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")]
+        return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize("import_xer", [parse_xer_to_sqlite_and_csv, stream_xer_to_sqlite_and_csv])
+def test_importing_the_same_file_twice_matches_importing_it_once(import_xer, tmp_path, capsys):
+    db_path = str(tmp_path / "project_database.db")
+    import_xer(SAMPLE_XER, db_path, str(tmp_path / "csv"))
+    first_counts = get_row_counts(db_path)
+    capsys.readouterr()
+
+    import_xer(SAMPLE_XER, db_path, str(tmp_path / "csv"))
+    output = capsys.readouterr().out
+    assert "Error" not in output
+    assert get_row_counts(db_path) == first_counts
+    assert first_counts["TASK"] > 0
+
+def test_reimport_drops_tables_missing_from_the_new_file(tmp_path):
+    db_path = str(tmp_path / "project_database.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE "OLDTABLE" ("old_id" INTEGER)')
+    conn.commit()
+    conn.close()
+
+    parse_xer_to_sqlite_and_csv(SAMPLE_XER, db_path, str(tmp_path / "csv"))
+    assert "OLDTABLE" not in get_row_counts(db_path)
+
+@pytest.mark.parametrize("import_xer", [parse_xer_to_sqlite_and_csv, stream_xer_to_sqlite_and_csv])
+def test_reimport_drops_derived_tables_whose_sources_are_missing(import_xer, tmp_path):
+    db_path = str(tmp_path / "project_database.db")
+    import_xer(SAMPLE_XER, db_path, str(tmp_path / "csv"))
+    assert get_row_counts(db_path)["CPM_RELATIONSHIP"] > 0
+
+    import_xer(write_sample_without(tmp_path / "partial.xer", "TASKPRED", "TASKRSRC"), db_path,
+               str(tmp_path / "csv"))
+    counts = get_row_counts(db_path)
+    for table in ("TASKPRED", "TASKRSRC", "CPM_RELATIONSHIP", "RSRC_ROLLUP", "RSRC_HISTOGRAM"):
+        assert table not in counts
+    assert counts["WBS_ROLLUP"] > 0
+
+def write_taskactv_xer(path, rows):
+    """
+    Write a minimal XER file holding only TASKACTV rows.
+    """
+    lines = ["ERMHDR\t8.2\t2013-09-18\tProject\tadmin\tadmin\tdbxDatabaseNoName\tProject Management\tEP",
+             "%T\tTASKACTV", "%F\ttask_id\tactv_code_type_id\tactv_code_id\tproj_id"]
+    lines += ["%R\t" + "\t".join(row) for row in rows]
+    lines.append("%E")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+def test_upsert_deletes_stale_rows_when_a_key_holds_a_null(tmp_path):
+    db_path = str(tmp_path / "project_database.db")
+    first = [("1", "10", "100", "5"), ("2", "", "200", "5"), ("3", "10", "300", "5")]
+    stream_xer_to_sqlite_and_csv(write_taskactv_xer(tmp_path / "first.xer", first), db_path,
+                                 str(tmp_path / "csv"), upsert=True)
+    stream_xer_to_sqlite_and_csv(write_taskactv_xer(tmp_path / "second.xer", first[:2]), db_path,
+                                 str(tmp_path / "csv"), upsert=True)
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute('SELECT "task_id", "actv_code_type_id" FROM "TASKACTV" ORDER BY "task_id"').fetchall()
+    conn.close()
+    assert rows == [(1, 10), (2, None)]
+
+def write_task_xer(path, rows):
+    """
+    Write a minimal XER file holding only TASK rows.
+    """
+    lines = ["ERMHDR\t8.2\t2013-09-18\tProject\tadmin\tadmin\tdbxDatabaseNoName\tProject Management\tEP",
+             "%T\tTASK", "%F\ttask_id\tproj_id\ttask_code\ttotal_float_hr_cnt"]
+    lines += ["%R\t" + "\t".join(row) for row in rows]
+    lines.append("%E")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+@pytest.mark.parametrize("import_xer", [stream_xer_to_sqlite_and_csv, bulk_load_xer_to_sqlite_and_csv])
+def test_rows_with_a_blank_integer_key_are_skipped(import_xer, tmp_path, capsys):
+    db_path = str(tmp_path / "project_database.db")
+    rows = [("1", "5", "A1000", "8"), ("", "5", "A1010", "16"), ("3", "5", "A1020", "x"), ("", "5", "A1030", "0")]
+    import_xer(write_task_xer(tmp_path / "tasks.xer", rows), db_path, str(tmp_path / "csv"))
+    output = capsys.readouterr().out
+
+    conn = sqlite3.connect(db_path)
+    tasks = conn.execute('SELECT "task_id", "task_code", "total_float_hr_cnt" FROM "TASK" ORDER BY "task_id"').fetchall()
+    conn.close()
+    assert tasks == [(1, "A1000", 8.0), (3, "A1020", None)]
+    assert 'Warning: skipped 2 rows of "TASK" with a blank or non-numeric task_id.' in output
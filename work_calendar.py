@@ -0,0 +1,368 @@
+import re
+import sqlite3
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from datetime import date, datetime, timedelta
+from xer_schema import create_table_sql, insert_sql
+
+# Compiled calendars, one row per CALENDAR row, built at import time
+CALENDAR_WORKTIME_TABLE = "CALENDAR_WORKTIME"
+CALENDAR_WORKTIME_COLUMNS = ['clndr_id', 'first_date', 'day_count', 'day_hr_cnt', 'work_bitmap']
+
+# Working time is recorded in slots of this many minutes, one bit per slot
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+BYTES_PER_DAY = SLOTS_PER_DAY // 8
+# Years compiled before the earliest and after the latest date in the schedule
+YEARS_BEFORE = 2
+YEARS_AFTER = 10
+# Day 0 of the serial numbers used for exception dates in clndr_data
+SERIAL_DATE_ORIGIN = date(1899, 12, 30)
+DEFAULT_DAY_HOURS = 8.0
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+
+# Day headers, exception headers and work periods inside clndr_data
+CALENDAR_TOKEN = re.compile(
+    r'\(0\|\|(?P<weekday>\d+)\(\)'
+    r'|\(0\|\|\d+\(d\|(?P<serial>\d+)\)'
+    r'|\((?:s\|(?P<start>\d{1,2}:\d{2})\|f\|(?P<finish>\d{1,2}:\d{2})'
+    r'|f\|(?P<finish2>\d{1,2}:\d{2})\|s\|(?P<start2>\d{1,2}:\d{2}))\)'
+)
+
+def parse_time(text):
+    """
+    Convert "HH:MM" to minutes after midnight.
+    """
+    hours, minutes = text.split(':')
+    return int(hours) * 60 + int(minutes)
+
+def parse_clndr_data(clndr_data):
+    """
+    Parse the work week and exceptions out of a P6 clndr_data blob.
+
+    Parameters:
+        clndr_data (str): The CALENDAR.clndr_data text.
+
+    Returns:
+        tuple: (work periods keyed by Python weekday 0=Monday, work periods keyed
+        by exception date). Periods are (start minute, finish minute) lists; an
+        empty list is a non-working day.
+    """
+    week, exceptions = {}, {}
+    week_part, _, exception_part = (clndr_data or '').partition('Exceptions')
+    for text, target in ((week_part, week), (exception_part, exceptions)):
+        periods = None
+        for match in CALENDAR_TOKEN.finditer(text):
+            if match.group('weekday') and target is week:
+                # P6 numbers the days of the week from 1 = Sunday
+                periods = target.setdefault((int(match.group('weekday')) + 5) % 7, [])
+            elif match.group('serial') and target is exceptions:
+                day = SERIAL_DATE_ORIGIN + timedelta(days=int(match.group('serial')))
+                periods = target.setdefault(day, [])
+            elif periods is not None and (match.group('start') or match.group('start2')):
+                start = parse_time(match.group('start') or match.group('start2'))
+                finish = parse_time(match.group('finish') or match.group('finish2'))
+                # A period that finishes at 00:00 runs to midnight
+                periods.append((start, finish if finish > start else 24 * 60))
+    return week, exceptions
+
+def count_bits(bits):
+    """
+    Count the set bits of an integer (int.bit_count needs Python 3.10).
+    """
+    return bin(bits).count('1')
+
+def get_day_bits(periods):
+    """
+    Turn a day's work periods into a bitmap with one bit per working slot.
+    """
+    bits = 0
+    for start, finish in periods:
+        first_slot = round(start / SLOT_MINUTES)
+        last_slot = round(finish / SLOT_MINUTES)
+        if last_slot > first_slot:
+            bits |= ((1 << (last_slot - first_slot)) - 1) << first_slot
+    return bits
+
+def get_schedule_date_range(conn, calendars):
+    """
+    Get the first day and number of days to compile calendars for.
+
+    The range covers the project and activity dates and every calendar
+    exception, padded by YEARS_BEFORE and YEARS_AFTER.
+    """
+    years = set()
+    for _, exceptions in calendars.values():
+        years.update(day.year for day in exceptions)
+    queries = (
+        'SELECT MIN(plan_start_date), MAX(scd_end_date), MAX(last_recalc_date) FROM "PROJECT"',
+        'SELECT MIN(target_start_date), MAX(target_end_date), MIN(act_start_date), MAX(late_end_date) FROM "TASK"',
+    )
+    for query in queries:
+        try:
+            row = conn.execute(query).fetchone()
+        except sqlite3.Error:
+            continue
+        years.update(int(value[:4]) for value in row if isinstance(value, str) and value[:4].isdigit())
+    if not years:
+        years.add(date.today().year)
+    first_date = date(min(years) - YEARS_BEFORE, 1, 1)
+    last_date = date(max(years) + YEARS_AFTER, 12, 31)
+    return first_date, (last_date - first_date).days + 1
+
+def compile_calendar_bitmap(week, exceptions, first_date, day_count):
+    """
+    Compile a calendar into BYTES_PER_DAY bytes per day starting at first_date.
+
+    Parameters:
+        week (dict): Work periods keyed by weekday.
+        exceptions (dict): Work periods keyed by date, overriding the week.
+        first_date (datetime.date): First compiled day.
+        day_count (int): Number of compiled days.
+
+    Returns:
+        bytes: The bitmaps of all days, little-endian per day.
+    """
+    week_bits = [get_day_bits(week.get(weekday, [])) for weekday in range(7)]
+    exception_bits = {day: get_day_bits(periods) for day, periods in exceptions.items()}
+    first_weekday = first_date.weekday()
+    chunks = []
+    for offset in range(day_count):
+        bits = week_bits[(first_weekday + offset) % 7]
+        if exception_bits:
+            bits = exception_bits.get(first_date + timedelta(days=offset), bits)
+        chunks.append(bits.to_bytes(BYTES_PER_DAY, 'little'))
+    return b''.join(chunks)
+
+def build_calendar_tables(conn):
+    """
+    Parse every CALENDAR row once and store its working time as a bitmap in CALENDAR_WORKTIME.
+
+    Calendars without a work week of their own (e.g. resource calendars that
+    only list exceptions) use the work week of their base calendar, and
+    calendars without any work week fall back to Monday to Friday. The
+    caller commits.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to an imported XER database.
+
+    Returns:
+        bool: True if the table was built, False if there is no CALENDAR table.
+    """
+    try:
+        rows = conn.execute('SELECT clndr_id, base_clndr_id, day_hr_cnt, clndr_data FROM "CALENDAR"').fetchall()
+    except sqlite3.Error:
+        return False
+
+    calendars = {clndr_id: parse_clndr_data(clndr_data) for clndr_id, _, _, clndr_data in rows}
+    base_ids = {clndr_id: base_id for clndr_id, base_id, _, _ in rows}
+    first_date, day_count = get_schedule_date_range(conn, calendars)
+    default_week = {weekday: [(8 * 60, 8 * 60 + int(DEFAULT_DAY_HOURS * 60))] for weekday in range(5)}
+
+    table_rows = []
+    for clndr_id, _, day_hr_cnt, _ in rows:
+        week, exceptions = calendars[clndr_id]
+        base = calendars.get(base_ids[clndr_id])
+        if not week:
+            week = base[0] if base and base[0] else default_week
+            exceptions = {**(base[1] if base else {}), **exceptions}
+        bitmap = compile_calendar_bitmap(week, exceptions, first_date, day_count)
+        if not day_hr_cnt:
+            working_days = [periods for periods in week.values() if periods]
+            week_slots = sum(count_bits(get_day_bits(periods)) for periods in working_days)
+            day_hr_cnt = week_slots * SLOT_MINUTES / 60 / len(working_days) if working_days else DEFAULT_DAY_HOURS
+        table_rows.append([clndr_id, first_date.isoformat(), day_count, day_hr_cnt, bitmap])
+
+    conn.execute(f'DROP TABLE IF EXISTS "{CALENDAR_WORKTIME_TABLE}"')
+    conn.execute(create_table_sql(CALENDAR_WORKTIME_TABLE, CALENDAR_WORKTIME_COLUMNS, if_not_exists=False))
+    conn.executemany(insert_sql(CALENDAR_WORKTIME_TABLE, CALENDAR_WORKTIME_COLUMNS), table_rows)
+    print(f"Compiled {len(table_rows)} calendars from {first_date} for {day_count} days.")
+    return True
+
+def load_calendar(conn, clndr_id):
+    """
+    Load a compiled calendar for date arithmetic.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to the database.
+        clndr_id (int): Calendar to load.
+
+    Returns:
+        dict: first_date, day_hr_cnt, the bitmap of each day and the number of
+        working slots before each day, or None if the calendar is unknown.
+    """
+    row = conn.execute(
+        f'SELECT first_date, day_count, day_hr_cnt, work_bitmap FROM "{CALENDAR_WORKTIME_TABLE}" WHERE clndr_id = ?',
+        (clndr_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    first_date, day_count, day_hr_cnt, bitmap = row
+    day_bits = [
+        int.from_bytes(bitmap[i * BYTES_PER_DAY:(i + 1) * BYTES_PER_DAY], 'little') for i in range(day_count)
+    ]
+    return {
+        'first_date': datetime.fromisoformat(first_date),
+        'day_hr_cnt': day_hr_cnt or DEFAULT_DAY_HOURS,
+        'day_bits': day_bits,
+        'slots_before': [0] + list(accumulate(count_bits(bits) for bits in day_bits)),
+    }
+
+def parse_datetime(value):
+    """
+    Parse a DATETIME value ("YYYY-MM-DD HH:MM" or "YYYY-MM-DD"), or return None.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+
+def parse_number(value):
+    """
+    Convert a SQL value to a float, or return None if it is not a number.
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def get_working_slots_before(calendar, moment):
+    """
+    Count the working slots between the start of the calendar and a moment.
+
+    Two list lookups and one bit count per call, whatever the distance between dates.
+
+    Returns:
+        float: Working slots before the moment, or None if it is outside the compiled range.
+    """
+    elapsed = moment - calendar['first_date']
+    day = elapsed.days
+    if not 0 <= day < len(calendar['day_bits']):
+        return None
+    position = elapsed.seconds / 60 / SLOT_MINUTES
+    slot = int(position)
+    bits = calendar['day_bits'][day]
+    slots = count_bits(bits & ((1 << slot) - 1))
+    if bits >> slot & 1:
+        slots += position - slot
+    return calendar['slots_before'][day] + slots
+
+def find_working_moment(calendar, slots, forward=True):
+    """
+    Find the moment at which a given number of working slots has elapsed.
+
+    Going forward the earliest such moment is returned (e.g. the end of the
+    last period of a day), going backward the latest (the start of the next
+    period).
+
+    Returns:
+        datetime: The moment, or None if it is outside the compiled range.
+    """
+    slots_before = calendar['slots_before']
+    if forward:
+        day = bisect_left(slots_before, slots) - 1
+    else:
+        day = bisect_right(slots_before, slots) - 1
+    if not 0 <= day < len(calendar['day_bits']):
+        return None
+
+    remaining = slots - slots_before[day]
+    bits = calendar['day_bits'][day]
+    for slot in range(SLOTS_PER_DAY):
+        if bits >> slot & 1:
+            if remaining < 1 or (forward and remaining == 1):
+                return calendar['first_date'] + timedelta(days=day, minutes=(slot + remaining) * SLOT_MINUTES)
+            remaining -= 1
+    return calendar['first_date'] + timedelta(days=day + 1)
+
+def work_hours_between(calendar, start, finish):
+    """
+    Working hours between two moments (negative if finish is before start).
+    """
+    start_slots = get_working_slots_before(calendar, start)
+    finish_slots = get_working_slots_before(calendar, finish)
+    if start_slots is None or finish_slots is None:
+        return None
+    return (finish_slots - start_slots) * SLOT_MINUTES / 60
+
+def add_work_hours(calendar, start, hours):
+    """
+    The moment a number of working hours after (or before, if negative) start.
+    """
+    start_slots = get_working_slots_before(calendar, start)
+    if start_slots is None:
+        return None
+    return find_working_moment(calendar, start_slots + hours * 60 / SLOT_MINUTES, forward=hours >= 0)
+
+def register_calendar_functions(conn):
+    """
+    Register the calendar SQL functions on a connection.
+
+    Calendars are loaded from CALENDAR_WORKTIME the first time a function
+    uses them. Every function returns NULL for an unknown calendar, an
+    unparsable date or number, or a date outside the compiled range.
+
+    - work_hours_between(clndr_id, start, finish): working hours from start to finish
+    - work_days_between(clndr_id, start, finish): the same in days of the calendar's day_hr_cnt
+    - add_work_hours(clndr_id, start, hours): the date after that many working hours
+    - add_work_days(clndr_id, start, days): the date after that many days of day_hr_cnt hours
+    - is_work_day(clndr_id, date): 1 if the day has any working time, else 0
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to a database with CALENDAR_WORKTIME.
+    """
+    calendars = {}
+
+    def get_calendar(clndr_id):
+        try:
+            clndr_id = int(clndr_id)
+        except (TypeError, ValueError):
+            return None
+        if clndr_id not in calendars:
+            try:
+                calendars[clndr_id] = load_calendar(conn, clndr_id)
+            except sqlite3.Error:
+                calendars[clndr_id] = None
+        return calendars[clndr_id]
+
+    def format_moment(moment):
+        return moment.strftime(DATETIME_FORMAT) if moment else None
+
+    def sql_work_hours_between(clndr_id, start, finish):
+        calendar, start, finish = get_calendar(clndr_id), parse_datetime(start), parse_datetime(finish)
+        if calendar is None or start is None or finish is None:
+            return None
+        return work_hours_between(calendar, start, finish)
+
+    def sql_work_days_between(clndr_id, start, finish):
+        hours = sql_work_hours_between(clndr_id, start, finish)
+        return None if hours is None else hours / get_calendar(clndr_id)['day_hr_cnt']
+
+    def sql_add_work_hours(clndr_id, start, hours):
+        calendar, start, hours = get_calendar(clndr_id), parse_datetime(start), parse_number(hours)
+        if calendar is None or start is None or hours is None:
+            return None
+        return format_moment(add_work_hours(calendar, start, hours))
+
+    def sql_add_work_days(clndr_id, start, days):
+        calendar, days = get_calendar(clndr_id), parse_number(days)
+        if calendar is None or days is None:
+            return None
+        return sql_add_work_hours(clndr_id, start, days * calendar['day_hr_cnt'])
+
+    def sql_is_work_day(clndr_id, day):
+        calendar, day = get_calendar(clndr_id), parse_datetime(day)
+        if calendar is None or day is None:
+            return None
+        index = (day - calendar['first_date']).days
+        if not 0 <= index < len(calendar['day_bits']):
+            return None
+        return 1 if calendar['day_bits'][index] else 0
+
+    conn.create_function("work_hours_between", 3, sql_work_hours_between, deterministic=True)
+    conn.create_function("work_days_between", 3, sql_work_days_between, deterministic=True)
+    conn.create_function("add_work_hours", 3, sql_add_work_hours, deterministic=True)
+    conn.create_function("add_work_days", 3, sql_add_work_days, deterministic=True)
+    conn.create_function("is_work_day", 2, sql_is_work_day, deterministic=True)
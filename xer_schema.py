@@ -0,0 +1,328 @@
+import re
+
+# Primary keys of the P6 tables we know about. Tables that are not listed fall
+# back to their first %F column when it is named "<table>_id".
+PRIMARY_KEYS = {
+    'ACCOUNT': ('acct_id',),
+    'ACTVCODE': ('actv_code_id',),
+    'ACTVTYPE': ('actv_code_type_id',),
+    'CALENDAR': ('clndr_id',),
+    'COSTTYPE': ('cost_type_id',),
+    'CURRTYPE': ('curr_id',),
+    'MEMOTYPE': ('memo_type_id',),
+    'OBS': ('obs_id',),
+    'PCATTYPE': ('proj_catg_type_id',),
+    'PCATVAL': ('proj_catg_id',),
+    'PROJCOST': ('cost_item_id',),
+    'PROJECT': ('proj_id',),
+    'PROJEVNT': ('proj_event_id',),
+    'PROJISSU': ('issue_id',),
+    'PROJPCAT': ('proj_id', 'proj_catg_type_id'),
+    'PROJWBS': ('wbs_id',),
+    'RCATTYPE': ('rsrc_catg_type_id',),
+    'RCATVAL': ('rsrc_catg_id',),
+    'ROLES': ('role_id',),
+    'RSRC': ('rsrc_id',),
+    'RSRCCURV': ('curv_id',),
+    'RSRCRATE': ('rsrc_rate_id',),
+    'RSRCRCAT': ('rsrc_id', 'rsrc_catg_type_id'),
+    'SCHEDOPTIONS': ('schedoptions_id',),
+    'TASK': ('task_id',),
+    'TASKACTV': ('task_id', 'actv_code_type_id'),
+    'TASKMEMO': ('memo_id',),
+    'TASKPRED': ('task_pred_id',),
+    'TASKPROC': ('proc_id',),
+    'TASKRSRC': ('taskrsrc_id',),
+    'UDFTYPE': ('udf_type_id',),
+    'UDFVALUE': ('udf_type_id', 'fk_id'),
+    'UMEASURE': ('unit_id',),
+    # Critical path tables built from TASK and TASKPRED at import time
+    'CPM_TASK': ('task_id',),
+    'CPM_RELATIONSHIP': ('task_pred_id',),
+    'CPM_CRITICAL_PATH': ('path_seq',),
+    # Calendars compiled from CALENDAR.clndr_data at import time
+    'CALENDAR_WORKTIME': ('clndr_id',),
+    # WBS and OBS trees indexed as closure tables and nested sets at import time
+    'WBS_CLOSURE': ('ancestor_wbs_id', 'wbs_id'),
+    'WBS_TREE': ('wbs_id',),
+    'OBS_CLOSURE': ('ancestor_obs_id', 'obs_id'),
+    'OBS_TREE': ('obs_id',),
+    # Summary tables built from the activities, assignments and expenses at import time
+    'WBS_ROLLUP': ('wbs_id',),
+    'RSRC_ROLLUP': ('rsrc_id',),
+    'RSRC_HISTOGRAM': ('rsrc_id', 'period_type', 'period_start_date'),
+    'ACTVCODE_ROLLUP': ('actv_code_id',),
+}
+
+# Foreign-key columns that the LLM joins on. Unknown tables get an index on
+# every id column other than their primary key.
+FOREIGN_KEYS = {
+    'ACTVCODE': ('actv_code_type_id', 'parent_actv_code_id'),
+    'ACTVTYPE': ('proj_id',),
+    'CALENDAR': ('proj_id', 'base_clndr_id'),
+    'OBS': ('parent_obs_id',),
+    'PROJCOST': ('proj_id', 'task_id', 'acct_id', 'cost_type_id'),
+    'PROJECT': ('clndr_id', 'obs_id'),
+    'PROJWBS': ('proj_id', 'obs_id', 'parent_wbs_id'),
+    'RCATVAL': ('rsrc_catg_type_id', 'parent_rsrc_catg_id'),
+    'RSRC': ('parent_rsrc_id', 'clndr_id', 'role_id', 'unit_id'),
+    'RSRCRATE': ('rsrc_id',),
+    'RSRCRCAT': ('rsrc_catg_id',),
+    'SCHEDOPTIONS': ('proj_id',),
+    'TASK': ('proj_id', 'wbs_id', 'clndr_id', 'rsrc_id'),
+    'TASKACTV': ('actv_code_id', 'proj_id'),
+    'TASKMEMO': ('task_id', 'proj_id', 'memo_type_id'),
+    'TASKPRED': ('task_id', 'pred_task_id', 'proj_id', 'pred_proj_id'),
+    'TASKPROC': ('task_id', 'proj_id'),
+    'TASKRSRC': ('task_id', 'proj_id', 'rsrc_id', 'role_id', 'acct_id'),
+    'UDFVALUE': ('fk_id', 'proj_id'),
+    'CPM_TASK': ('driving_pred_task_id',),
+    'CPM_RELATIONSHIP': ('task_id', 'pred_task_id'),
+    'CPM_CRITICAL_PATH': ('task_id',),
+    'WBS_CLOSURE': ('wbs_id',),
+    'WBS_TREE': ('parent_wbs_id', 'lft'),
+    'OBS_CLOSURE': ('obs_id',),
+    'OBS_TREE': ('parent_obs_id', 'lft'),
+    'WBS_ROLLUP': ('proj_id',),
+    'RSRC_HISTOGRAM': ('period_start_date',),
+    'ACTVCODE_ROLLUP': ('actv_code_type_id',),
+}
+
+# Columns whose names do not follow the suffix rules below
+COLUMN_TYPES = {
+    'seq_num': 'INTEGER',
+    'priority_num': 'INTEGER',
+    'topo_level': 'INTEGER',
+    'pred_count': 'INTEGER',
+    'succ_count': 'INTEGER',
+    'path_seq': 'INTEGER',
+    'day_count': 'INTEGER',
+    'depth': 'INTEGER',
+    'lft': 'INTEGER',
+    'rgt': 'INTEGER',
+    'task_count': 'INTEGER',
+    'complete_task_count': 'INTEGER',
+    'active_task_count': 'INTEGER',
+    'not_started_task_count': 'INTEGER',
+    'assignment_count': 'INTEGER',
+    'work_bitmap': 'BLOB',
+}
+
+ID_COLUMN = re.compile(r'(^|_)id$')
+REAL_SUFFIXES = ('_cnt', '_qty', '_cost', '_pct', '_rate')
+DATE_SUFFIXES = ('_date',)
+# Types whose values must parse as numbers; anything else is stored as NULL
+NUMERIC_TYPES = ('INTEGER', 'REAL')
+
+def infer_column_type(column):
+    """
+    Infer the SQLite type of an XER column from its name.
+
+    Parameters:
+        column (str): Column name from a %F header.
+
+    Returns:
+        str: One of INTEGER, REAL, DATETIME or TEXT.
+    """
+    if column in COLUMN_TYPES:
+        return COLUMN_TYPES[column]
+    if ID_COLUMN.search(column):
+        return 'INTEGER'
+    if column.endswith(DATE_SUFFIXES):
+        # NUMERIC affinity keeps "YYYY-MM-DD HH:MM" strings as text, which sort chronologically
+        return 'DATETIME'
+    if column.endswith(REAL_SUFFIXES):
+        return 'REAL'
+    return 'TEXT'
+
+def get_primary_key(table_name, columns):
+    """
+    Get the primary key columns for a table.
+
+    Parameters:
+        table_name (str): XER table name.
+        columns (list of str): Columns present in the %F header.
+
+    Returns:
+        tuple: Primary key column names, or an empty tuple if none applies.
+    """
+    key = PRIMARY_KEYS.get(table_name)
+    if key is None and columns and columns[0] == f"{table_name.lower()}_id":
+        key = (columns[0],)
+    if key and all(col in columns for col in key):
+        return key
+    return ()
+
+def get_index_columns(table_name, columns):
+    """
+    Get the foreign-key columns that should be indexed for a table.
+
+    Parameters:
+        table_name (str): XER table name.
+        columns (list of str): Columns present in the %F header.
+
+    Returns:
+        list of str: Columns to index, in header order.
+    """
+    primary_key = get_primary_key(table_name, columns)
+    if table_name in FOREIGN_KEYS:
+        candidates = FOREIGN_KEYS[table_name]
+    else:
+        candidates = [col for col in columns if ID_COLUMN.search(col)]
+    # A leading primary key column is already covered by its own index
+    covered = primary_key[:1]
+    return [col for col in columns if col in candidates and col not in covered]
+
+def get_column_types(columns):
+    """
+    Get the inferred SQLite type for each column.
+
+    Parameters:
+        columns (list of str): Column names.
+
+    Returns:
+        list of str: Column types, in the same order.
+    """
+    return [infer_column_type(col) for col in columns]
+
+def create_table_sql(table_name, columns, if_not_exists=True):
+    """
+    Build a typed CREATE TABLE statement for an XER table.
+
+    Parameters:
+        table_name (str): XER table name.
+        columns (list of str): Columns present in the %F header.
+        if_not_exists (bool): Whether to add IF NOT EXISTS.
+
+    Returns:
+        str: The CREATE TABLE statement.
+    """
+    primary_key = get_primary_key(table_name, columns)
+    definitions = []
+    for col, col_type in zip(columns, get_column_types(columns)):
+        definition = f'"{col}" {col_type}'
+        if primary_key == (col,):
+            definition += ' PRIMARY KEY'
+        definitions.append(definition)
+    if len(primary_key) > 1:
+        quoted_key = ', '.join([f'"{col}"' for col in primary_key])
+        definitions.append(f'PRIMARY KEY ({quoted_key})')
+    exists_clause = 'IF NOT EXISTS ' if if_not_exists else ''
+    return f'CREATE TABLE {exists_clause}"{table_name}" ({", ".join(definitions)})'
+
+def create_index_sqls(table_name, columns):
+    """
+    Build CREATE INDEX statements for the foreign-key columns of an XER table.
+
+    Parameters:
+        table_name (str): XER table name.
+        columns (list of str): Columns present in the %F header.
+
+    Returns:
+        list of str: CREATE INDEX IF NOT EXISTS statements.
+    """
+    return [
+        f'CREATE INDEX IF NOT EXISTS "idx_{table_name}_{col}" ON "{table_name}" ("{col}")'
+        for col in get_index_columns(table_name, columns)
+    ]
+
+def get_rowid_key_index(table_name, columns):
+    """
+    Get the position of a primary key column that SQLite stores as the rowid.
+
+    A single INTEGER PRIMARY KEY is an alias of the rowid, so a row whose key
+    is NULL would be given a key made up by SQLite, which can collide with a
+    real one. The importers skip such rows.
+
+    Parameters:
+        table_name (str): XER table name.
+        columns (list of str): Columns present in the %F header.
+
+    Returns:
+        int: Index of the key in columns, or None if the table has no rowid key.
+    """
+    primary_key = get_primary_key(table_name, columns)
+    if len(primary_key) == 1 and infer_column_type(primary_key[0]) == 'INTEGER':
+        return columns.index(primary_key[0])
+    return None
+
+def coerce_value(value, col_type):
+    """
+    Convert an empty value in a typed column, or a non-numeric value in a numeric one, to NULL.
+    """
+    if col_type == 'TEXT':
+        return value
+    if value == '':
+        return None
+    if col_type in NUMERIC_TYPES and isinstance(value, str):
+        try:
+            float(value)
+        except ValueError:
+            return None
+    return value
+
+def coerce_row(row, column_types):
+    """
+    Convert empty strings in typed columns and text in numeric columns to NULL
+    so numeric and date comparisons work.
+
+    Parameters:
+        row (list): Row values in column order.
+        column_types (list of str): Column types from get_column_types.
+
+    Returns:
+        list: The converted row.
+    """
+    return [coerce_value(value, col_type) for value, col_type in zip(row, column_types)]
+
+def insert_sql(table_name, columns):
+    """
+    Build a plain INSERT statement for an XER table.
+
+    Parameters:
+        table_name (str): XER table name.
+        columns (list of str): Columns present in the %F header.
+
+    Returns:
+        str: The INSERT statement with one placeholder per column.
+    """
+    formatted_columns = ', '.join([f'"{col}"' for col in columns])
+    placeholders = ', '.join(['?'] * len(columns))
+    return f'INSERT INTO "{table_name}" ({formatted_columns}) VALUES ({placeholders})'
+
+def create_derived_table(cursor, table_name, columns, rows):
+    """
+    Replace a table computed at import time with new rows and index its key columns.
+
+    Parameters:
+        cursor (sqlite3.Cursor): Cursor on the imported database. The caller commits.
+        table_name (str): Name of the derived table.
+        columns (list of str): Column names, typed by the same rules as XER columns.
+        rows (iterable of list): Row values in column order.
+    """
+    cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+    cursor.execute(create_table_sql(table_name, columns, if_not_exists=False))
+    cursor.executemany(insert_sql(table_name, columns), rows)
+    for index_sql in create_index_sqls(table_name, columns):
+        cursor.execute(index_sql)
+
+def upsert_sql(table_name, columns):
+    """
+    Build an INSERT that updates an existing row only when its content changed.
+
+    Parameters:
+        table_name (str): XER table name.
+        columns (list of str): Columns present in the %F header.
+
+    Returns:
+        str: The upsert statement, or a plain INSERT when the table has no primary key.
+    """
+    insert = insert_sql(table_name, columns)
+    primary_key = get_primary_key(table_name, columns)
+    value_columns = [col for col in columns if col not in primary_key]
+    if not primary_key or not value_columns:
+        return insert
+    conflict_target = ', '.join([f'"{col}"' for col in primary_key])
+    assignments = ', '.join([f'"{col}" = excluded."{col}"' for col in value_columns])
+    changed = ' OR '.join([f'"{col}" IS NOT excluded."{col}"' for col in value_columns])
+    return f'{insert} ON CONFLICT ({conflict_target}) DO UPDATE SET {assignments} WHERE {changed}'